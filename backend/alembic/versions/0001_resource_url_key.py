@@ -0,0 +1,63 @@
+"""resources.url_key: normalized URL with a unique index
+
+Backfills url_key for existing rows and removes rows whose normalized URL
+duplicates an earlier one (lowest id wins). Run POST /resources/reindex_all
+afterwards to drop the removed rows from the vector index.
+
+Tables may already have been created by init_db() (create_all), so every
+step checks the current schema first.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.services.urls import normalize_url
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+INDEX = "ix_resources_url_key"
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    if "resources" not in insp.get_table_names():
+        return  # fresh database: init_db() creates the table with url_key
+
+    if "url_key" not in {c["name"] for c in insp.get_columns("resources")}:
+        op.add_column("resources", sa.Column("url_key", sa.String(length=1000), nullable=True))
+
+    resources = sa.table("resources", sa.column("id", sa.String), sa.column("url", sa.String), sa.column("url_key", sa.String))
+    rows = bind.execute(sa.select(resources.c.id, resources.c.url).where(resources.c.url_key.is_(None)).order_by(resources.c.id)).all()
+    seen = {
+        key for (key,) in bind.execute(sa.select(resources.c.url_key).where(resources.c.url_key.is_not(None)))
+    }
+    updates, duplicates = [], []
+    for rid, url in rows:
+        key = normalize_url(url or "")
+        if key in seen:
+            duplicates.append(rid)
+            continue
+        seen.add(key)
+        updates.append({"rid": rid, "key": key})
+    if updates:
+        bind.execute(
+            resources.update().where(resources.c.id == sa.bindparam("rid")).values(url_key=sa.bindparam("key")),
+            updates,
+        )
+    for start in range(0, len(duplicates), 1000):
+        bind.execute(resources.delete().where(resources.c.id.in_(duplicates[start : start + 1000])))
+
+    if INDEX not in {ix["name"] for ix in insp.get_indexes("resources")}:
+        op.create_index(INDEX, "resources", ["url_key"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(INDEX, table_name="resources")
+    op.drop_column("resources", "url_key")
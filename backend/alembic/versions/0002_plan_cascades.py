@@ -0,0 +1,65 @@
+"""ON DELETE CASCADE from plans to plan_items and progress
+
+Deleting a plan is then a single DELETE: its items and their progress rows
+go with it in the database instead of being loaded and deleted by the ORM.
+The constraints are swapped in one short transaction with the new ones
+added NOT VALID (no scan under the ACCESS EXCLUSIVE lock the swap takes).
+They are validated after that transaction has committed; VALIDATE only
+takes SHARE UPDATE EXCLUSIVE, so the scan runs without blocking writes.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+# (table, column, referenced table)
+CASCADES = [
+    ("plan_items", "plan_id", "plans"),
+    ("progress", "plan_id", "plans"),
+    ("progress", "item_id", "plan_items"),
+]
+
+
+def _name(table: str, column: str) -> str:
+    return f"{table}_{column}_fkey"  # Postgres' default naming
+
+
+def _replace_fks(ondelete) -> None:
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    tables = set(insp.get_table_names())
+    replaced = []
+    for table, column, ref in CASCADES:
+        if table not in tables:
+            continue
+        for fk in insp.get_foreign_keys(table):
+            if fk["constrained_columns"] == [column]:
+                if (fk.get("options") or {}).get("ondelete", "").upper() == (ondelete or "").upper():
+                    break  # already as wanted
+                op.drop_constraint(fk["name"], table, type_="foreignkey")
+                op.create_foreign_key(
+                    _name(table, column), table, ref, [column], ["id"],
+                    ondelete=ondelete, postgresql_not_valid=True,
+                )
+                replaced.append((table, column))
+                break
+    if replaced:
+        # commits the swap first, so validation doesn't hold its locks
+        with op.get_context().autocommit_block():
+            for table, column in replaced:
+                op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {_name(table, column)}")
+
+
+def upgrade() -> None:
+    _replace_fks("CASCADE")
+
+
+def downgrade() -> None:
+    _replace_fks(None)
@@ -0,0 +1,119 @@
+"""Native UUID keys, step 1 of 2 (expand)
+
+Adds a shadow `<column>_new uuid` next to every text id / foreign-key column,
+keeps it in sync with a trigger, backfills existing rows in small committed
+batches and builds the indexes the contract step (0004) will swap in:
+
+* a unique index on id_new (becomes the primary key),
+* an index on each foreign-key shadow column,
+* a validated CHECK (<column>_new IS NOT NULL), so 0004 can SET NOT NULL
+  without scanning the table.
+
+Nothing here takes more than a brief lock: indexes are built CONCURRENTLY
+and the CHECKs are added NOT VALID and validated separately.
+
+Run it while the previous (text id) application version is still serving;
+the triggers fill the uuid columns for everything it writes. The Uuid-model
+version must not start before 0004: psycopg2 binds its ids as '...'::uuid,
+and `varchar = uuid` has no operator, so every lookup by id would fail
+(init_db() refuses to start against the text layout for that reason).
+
+Tables may already have been created with uuid ids by init_db() (create_all);
+those are skipped.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+# table -> id / foreign-key columns that become uuid
+COLUMNS = {
+    "users": ["id"],
+    "resources": ["id"],
+    "plans": ["id", "user_id"],
+    "plan_items": ["id", "plan_id"],
+    "progress": ["id", "user_id", "plan_id", "item_id"],
+}
+BACKFILL_BATCH = 5000
+
+
+def pending_tables(insp) -> list:
+    """Tables whose id is still text."""
+    existing = set(insp.get_table_names())
+    out = []
+    for table in COLUMNS:
+        if table not in existing:
+            continue
+        id_col = next(c for c in insp.get_columns(table) if c["name"] == "id")
+        if not isinstance(id_col["type"], sa.Uuid):
+            out.append(table)
+    return out
+
+
+def _sync_trigger(table: str) -> None:
+    assigns = " ".join(f"NEW.{c}_new := NEW.{c}::uuid;" for c in COLUMNS[table])
+    op.execute(
+        f"CREATE OR REPLACE FUNCTION {table}_uuid_sync() RETURNS trigger AS $$ "
+        f"BEGIN {assigns} RETURN NEW; END $$ LANGUAGE plpgsql"
+    )
+    op.execute(f"DROP TRIGGER IF EXISTS {table}_uuid_sync ON {table}")
+    op.execute(
+        f"CREATE TRIGGER {table}_uuid_sync BEFORE INSERT OR UPDATE ON {table} "
+        f"FOR EACH ROW EXECUTE FUNCTION {table}_uuid_sync()"
+    )
+
+
+def _backfill(bind, table: str) -> None:
+    cols = COLUMNS[table]
+    sets = ", ".join(f"{c}_new = {c}::uuid" for c in cols)
+    stmt = sa.text(
+        f"UPDATE {table} SET {sets} WHERE id IN "
+        f"(SELECT id FROM {table} WHERE id_new IS NULL LIMIT {BACKFILL_BATCH})"
+    )
+    while bind.execute(stmt).rowcount:
+        pass  # autocommit: every batch is its own short transaction
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    tables = pending_tables(insp)
+    if not tables:
+        return
+
+    for table in tables:
+        for col in COLUMNS[table]:
+            op.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {col}_new uuid")
+        _sync_trigger(table)
+
+    with op.get_context().autocommit_block():
+        for table in tables:
+            _backfill(bind, table)
+            op.execute(f"CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS {table}_id_new_key ON {table} (id_new)")
+            for col in COLUMNS[table][1:]:
+                op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_{table}_{col}_new ON {table} ({col}_new)")
+
+            checks = {c["name"] for c in insp.get_check_constraints(table)}
+            for col in COLUMNS[table]:
+                name = f"{table}_{col}_new_not_null"
+                if name not in checks:
+                    op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {name} CHECK ({col}_new IS NOT NULL) NOT VALID")
+                op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {name}")
+
+
+def downgrade() -> None:
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+    for table, cols in COLUMNS.items():
+        if table not in existing:
+            continue
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_uuid_sync ON {table}")
+        op.execute(f"DROP FUNCTION IF EXISTS {table}_uuid_sync()")
+        for col in cols:
+            op.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS {col}_new")
@@ -0,0 +1,97 @@
+"""Native UUID keys, step 2 of 2 (contract)
+
+Swaps the uuid shadow columns built by 0003 in place of the text ones in one
+short transaction: no data is rewritten and no index is built under the
+lock. The primary keys are attached to the prebuilt unique indexes and
+NOT NULL is proven by the validated CHECKs. The foreign keys are recreated
+NOT VALID and validated after the swap has committed.
+
+Run it once 0003 has finished, as the first step of deploying the
+Uuid-model application version, then roll that version out. Instances of
+the previous version keep working in between: they bind ids as untyped
+text literals, which Postgres reads as uuid.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+COLUMNS = {
+    "users": ["id"],
+    "resources": ["id"],
+    "plans": ["id", "user_id"],
+    "plan_items": ["id", "plan_id"],
+    "progress": ["id", "user_id", "plan_id", "item_id"],
+}
+# (table, column, referenced table, ondelete)
+FOREIGN_KEYS = [
+    ("plans", "user_id", "users", None),
+    ("plan_items", "plan_id", "plans", "CASCADE"),
+    ("progress", "user_id", "users", None),
+    ("progress", "plan_id", "plans", "CASCADE"),
+    ("progress", "item_id", "plan_items", "CASCADE"),
+]
+
+
+def _drop_foreign_keys(insp, tables) -> None:
+    for table in tables:
+        for fk in insp.get_foreign_keys(table):
+            op.drop_constraint(fk["name"], table, type_="foreignkey")
+
+
+def _create_foreign_keys(tables) -> None:
+    for table, col, ref, ondelete in FOREIGN_KEYS:
+        if table in tables:
+            op.create_foreign_key(
+                f"{table}_{col}_fkey", table, ref, [col], ["id"],
+                ondelete=ondelete, postgresql_not_valid=True,
+            )
+    with op.get_context().autocommit_block():
+        for table, col, _, _ in FOREIGN_KEYS:
+            if table in tables:
+                op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {table}_{col}_fkey")
+
+
+def upgrade() -> None:
+    insp = sa.inspect(op.get_bind())
+    existing = set(insp.get_table_names())
+    tables = [
+        t for t in COLUMNS
+        if t in existing and "id_new" in {c["name"] for c in insp.get_columns(t)}
+    ]
+    if not tables:
+        return  # fresh database, or already swapped
+
+    op.execute(f"LOCK TABLE {', '.join(tables)} IN ACCESS EXCLUSIVE MODE")
+    _drop_foreign_keys(insp, tables)
+    for table in tables:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_uuid_sync ON {table}")
+        op.execute(f"DROP FUNCTION IF EXISTS {table}_uuid_sync()")
+        op.drop_constraint(insp.get_pk_constraint(table)["name"], table, type_="primary")
+        for col in COLUMNS[table]:
+            op.drop_column(table, col)  # drops the old text indexes with it
+            op.alter_column(table, f"{col}_new", new_column_name=col)
+            op.alter_column(table, col, nullable=False)  # no scan: the CHECK is validated
+            op.drop_constraint(f"{table}_{col}_new_not_null", table, type_="check")
+        op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY USING INDEX {table}_id_new_key")
+        for col in COLUMNS[table][1:]:
+            op.execute(f"ALTER INDEX ix_{table}_{col}_new RENAME TO ix_{table}_{col}")
+    _create_foreign_keys(tables)
+
+
+def downgrade() -> None:
+    insp = sa.inspect(op.get_bind())
+    existing = set(insp.get_table_names())
+    tables = [t for t in COLUMNS if t in existing]
+    _drop_foreign_keys(insp, tables)
+    for table in tables:
+        for col in COLUMNS[table]:
+            op.alter_column(table, col, type_=sa.String(), postgresql_using=f"{col}::text")
+    _create_foreign_keys(tables)
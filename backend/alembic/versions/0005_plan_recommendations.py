@@ -0,0 +1,38 @@
+"""plan_recommendations: precomputed top-k resources per plan item
+
+Filled by app/services/recommendations.py after plan creation and after
+/resources/reindex_all. Existing plans get rows on the next reindex, or
+on their first GET /plans/{id}/recommendations.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+TABLE = "plan_recommendations"
+
+
+def upgrade() -> None:
+    if TABLE in sa.inspect(op.get_bind()).get_table_names():
+        return  # created by init_db()
+    op.create_table(
+        TABLE,
+        sa.Column("plan_id", sa.Uuid(), sa.ForeignKey("plans.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("item_id", sa.Uuid(), sa.ForeignKey("plan_items.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("rank", sa.Integer(), primary_key=True),
+        sa.Column("resource_id", sa.Uuid(), sa.ForeignKey("resources.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("score", sa.Float(), nullable=False),
+        sa.Column("computed_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_plan_recommendations_resource_id", TABLE, ["resource_id"])
+
+
+def downgrade() -> None:
+    op.drop_table(TABLE)
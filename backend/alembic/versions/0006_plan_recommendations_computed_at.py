@@ -0,0 +1,30 @@
+"""plans.recommendations_computed_at
+
+Set when a plan's recommendations were last computed, so an empty result
+can be told apart from "never computed" and reads only schedule a refresh
+for the latter. Nullable without a default: adding it is a catalog-only
+change, and existing plans are computed on their next read or reindex.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+COLUMN = "recommendations_computed_at"
+
+
+def upgrade() -> None:
+    if COLUMN in {c["name"] for c in sa.inspect(op.get_bind()).get_columns("plans")}:
+        return  # created by init_db()
+    op.add_column("plans", sa.Column(COLUMN, sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("plans", COLUMN)
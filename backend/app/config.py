@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from pydantic import computed_field
+from typing import Optional
 
 class Settings(BaseSettings):
     APP_NAME: str = "SkillSetu API"
@@ -14,6 +15,23 @@ class Settings(BaseSettings):
     DB_PASSWORD: str = "postgres"
     DB_NAME: str = "postgres"
 
+    # Primary keys: 7 = time-ordered UUIDv7 (inserts land at the right edge of
+    # the btree), 4 = random UUIDv4
+    UUID_VERSION: int = 7
+
+    # ---- Rate limiting / admission control ----
+    RATE_LIMIT_BACKEND: str = "memory"          # memory | sql (shared across workers)
+    RATE_LIMIT_DB_URL: Optional[str] = None     # sql backend; defaults to the app database
+    RATE_LIMIT_LLM_PER_MIN: float = 4.0         # token refill rate per user
+    RATE_LIMIT_LLM_BURST: int = 3
+    RATE_LIMIT_INGEST_PER_MIN: float = 1.0
+    RATE_LIMIT_INGEST_BURST: int = 2
+    LLM_MAX_CONCURRENCY: int = 2                # per worker (memory) / per deployment (sql)
+    EMBED_MAX_CONCURRENCY: int = 1
+    ADMISSION_WAIT_SECONDS: float = 0.5
+    ADMISSION_RETRY_AFTER: int = 15
+    ADMISSION_LEASE_SECONDS: int = 60           # sql slots are renewed while held; a dead worker's frees up after this
+
     @computed_field
     @property
     def SQLALCHEMY_DATABASE_URI(self) -> str:
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import Uuid, create_engine, inspect
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 from .config import settings
 
@@ -8,6 +8,19 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, futu
 class Base(DeclarativeBase):
     pass
 
+def _check_uuid_keys():
+    # create_all can't add uuid foreign keys to text ids (plan_recommendations)
+    insp = inspect(engine)
+    if "plans" not in insp.get_table_names():
+        return
+    id_type = next(c["type"] for c in insp.get_columns("plans") if c["name"] == "id")
+    if not isinstance(id_type, Uuid):
+        raise RuntimeError(
+            "plans.id is not a uuid column yet: run `alembic upgrade head` "
+            "(migrations 0003 and 0004) before starting this version"
+        )
+
 def init_db():
     from . import models  # noqa: F401
+    _check_uuid_keys()
     Base.metadata.create_all(bind=engine)
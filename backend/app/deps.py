@@ -3,6 +3,7 @@ from __future__ import annotations
 
 import datetime as dt
 from typing import Generator
+from uuid import UUID
 
 import jwt
 from fastapi import Depends, HTTPException
@@ -58,9 +59,9 @@ def get_current_user(
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
-    user_id = payload.get("sub")
-
-    if not user_id:
+    try:
+        user_id = UUID(str(payload.get("sub")))
+    except ValueError:
         raise HTTPException(status_code=401, detail="Invalid token payload")
 
     # ✅ correct way to fetch primary key
@@ -0,0 +1,132 @@
+# app/idempotency.py
+"""
+Idempotency-Key handling for POST /plans/auto.
+
+The first request with a given key runs the work; repeats within
+IDEMPOTENCY_TTL_SECONDS get its result instead of running it again, and a
+repeat with a different request body is rejected with 422. Repeats that
+arrive while the first request is still running wait for it.
+
+Keys live where the rate limit buckets live: in this process with the
+memory backend, or in the idempotency_keys table with RATE_LIMIT_BACKEND=sql,
+so a retry that lands on another worker is still recognised.
+"""
+from __future__ import annotations
+
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import Column, Float, MetaData, String, Table, Text, delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from .ratelimit import SqlBackend, get_backend
+from .services.singleflight import SingleFlight
+
+IDEMPOTENCY_TTL_SECONDS = 600.0
+# a running first request older than this is presumed dead and taken over
+PENDING_SECONDS = 300.0
+POLL_SECONDS = 0.25
+
+Result = Dict[str, Any]
+
+_metadata = MetaData()
+idempotency_keys = Table(
+    "idempotency_keys",
+    _metadata,
+    Column("key", String(300), primary_key=True),
+    Column("body_hash", String(64), nullable=False),
+    Column("result", Text, nullable=True),
+    Column("created_at", Float, nullable=False),
+    Column("finished_at", Float, nullable=True),
+)
+
+
+def _mismatch() -> HTTPException:
+    return HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request body")
+
+
+class MemoryIdempotency:
+    def __init__(self, ttl: float = IDEMPOTENCY_TTL_SECONDS):
+        self._flights: SingleFlight[Tuple[str, Result]] = SingleFlight(ttl=ttl)
+
+    def run(self, key: str, body_hash: str, fn: Callable[[], Result]) -> Tuple[Result, bool]:
+        (first_hash, result), shared = self._flights.do(key, lambda: (body_hash, fn()))
+        if first_hash != body_hash:
+            raise _mismatch()
+        return result, shared
+
+
+class SqlIdempotency:
+    """Keys in a table; the row's insert decides which request runs the work."""
+
+    def __init__(self, engine, ttl: float = IDEMPOTENCY_TTL_SECONDS, pending: float = PENDING_SECONDS):
+        self.engine = engine
+        self.ttl = ttl
+        self.pending = pending
+        _metadata.create_all(engine)
+
+    def _lead(self, key: str, started: float, fn: Callable[[], Result]) -> Result:
+        mine = (idempotency_keys.c.key == key) & (idempotency_keys.c.created_at == started)
+        try:
+            result = fn()
+        except BaseException:
+            with self.engine.begin() as conn:
+                conn.execute(delete(idempotency_keys).where(mine))  # let a retry run it again
+            raise
+        with self.engine.begin() as conn:
+            conn.execute(
+                update(idempotency_keys).where(mine)
+                .values(result=json.dumps(result, default=str), finished_at=time.time())
+            )
+        return result
+
+    def run(self, key: str, body_hash: str, fn: Callable[[], Result]) -> Tuple[Result, bool]:
+        while True:
+            now = time.time()
+            with self.engine.begin() as conn:
+                row = conn.execute(select(idempotency_keys).where(idempotency_keys.c.key == key)).first()
+            if row is None:
+                try:
+                    with self.engine.begin() as conn:
+                        conn.execute(insert(idempotency_keys).values(key=key, body_hash=body_hash, created_at=now))
+                except IntegrityError:
+                    continue  # another worker got there first
+                return self._lead(key, now, fn), False
+
+            expired = now - row.finished_at > self.ttl if row.finished_at is not None else now - row.created_at > self.pending
+            if expired:
+                with self.engine.begin() as conn:
+                    taken = conn.execute(
+                        update(idempotency_keys)
+                        .where(idempotency_keys.c.key == key, idempotency_keys.c.created_at == row.created_at)
+                        .values(body_hash=body_hash, result=None, created_at=now, finished_at=None)
+                    ).rowcount
+                if taken:
+                    return self._lead(key, now, fn), False
+                continue
+            if row.body_hash != body_hash:
+                raise _mismatch()
+            if row.finished_at is not None:
+                return json.loads(row.result), True
+            time.sleep(POLL_SECONDS)
+
+
+_store: Optional[Any] = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            backend = get_backend()
+            _store = SqlIdempotency(backend.engine) if isinstance(backend, SqlBackend) else MemoryIdempotency()
+        return _store
+
+
+def run_once(key: str, body_hash: str, fn: Callable[[], Result]) -> Tuple[Result, bool]:
+    """fn() once per idempotency key. Returns (result, shared) like SingleFlight.do."""
+    return get_store().run(key, body_hash, fn)
@@ -1,17 +1,49 @@
-from sqlalchemy import String, Integer, DateTime, ForeignKey, Text
+from sqlalchemy import String, Integer, DateTime, Float, ForeignKey, Text, Uuid
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from sqlalchemy.sql import func
-from uuid import uuid4
+from uuid import UUID, uuid4
 from .db import Base
+from .config import settings
 from datetime import datetime
 from typing import Optional  # <-- add
+import os
+import threading
+import time
 
-def gen_uuid():
-    return str(uuid4())
+_uuid7_lock = threading.Lock()
+_uuid7_last = (0, 0)  # (ms, rand_a) of the previous id
+
+def uuid7() -> UUID:
+    """
+    RFC 9562 UUIDv7: 48-bit unix ms timestamp, version, 12-bit rand_a, 62
+    random bits. Ids from this process are strictly increasing: within one
+    millisecond (or if the clock steps back) rand_a is used as a counter
+    (RFC 9562 section 6.2, method 1).
+    """
+    global _uuid7_last
+    rand = int.from_bytes(os.urandom(10), "big")  # 80 bits, 74 used
+    ms = time.time_ns() // 1_000_000
+    rand_a = (rand >> 62) & 0x7FF  # top bit clear leaves room to count
+    with _uuid7_lock:
+        last_ms, last_a = _uuid7_last
+        if ms <= last_ms:
+            ms, rand_a = last_ms, last_a + 1
+            if rand_a > 0xFFF:  # counter exhausted: borrow the next millisecond
+                ms, rand_a = ms + 1, 0
+        _uuid7_last = (ms, rand_a)
+    value = (ms & 0xFFFF_FFFF_FFFF) << 80
+    value |= 0x7 << 76
+    value |= rand_a << 64
+    value |= 0b10 << 62                      # RFC variant
+    value |= rand & 0x3FFF_FFFF_FFFF_FFFF    # rand_b
+    return UUID(int=value)
+
+def gen_uuid() -> UUID:
+    return uuid7() if settings.UUID_VERSION == 7 else uuid4()
 
 class User(Base):
     __tablename__ = "users"
-    id: Mapped[str] = mapped_column(String, primary_key=True, default=gen_uuid)
+    id: Mapped[UUID] = mapped_column(Uuid, primary_key=True, default=gen_uuid)
     email: Mapped[str] = mapped_column(String(255), unique=True, index=True, nullable=False)
     name: Mapped[Optional[str]] = mapped_column(String(120), nullable=True)
     hashed_password: Mapped[str] = mapped_column(String(255), nullable=False)
@@ -22,9 +54,11 @@ class User(Base):
 
 class Resource(Base):
     __tablename__ = "resources"
-    id: Mapped[str] = mapped_column(String, primary_key=True, default=gen_uuid)
+    id: Mapped[UUID] = mapped_column(Uuid, primary_key=True, default=gen_uuid)
     title: Mapped[str] = mapped_column(String(500), nullable=False)
     url: Mapped[str] = mapped_column(String(1000), nullable=False)
+    # normalized url (services/urls.normalize_url); ingest upserts on it
+    url_key: Mapped[Optional[str]] = mapped_column(String(1000), unique=True, index=True, nullable=True)
     source: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
     tags: Mapped[Optional[str]] = mapped_column(Text, nullable=True)   # simple CSV for phase 1
     level: Mapped[Optional[str]] = mapped_column(String(32), nullable=True)
@@ -33,21 +67,29 @@ class Resource(Base):
 
 class Plan(Base):
     __tablename__ = "plans"
-    id: Mapped[str] = mapped_column(String, primary_key=True, default=gen_uuid)
-    user_id: Mapped[str] = mapped_column(String, ForeignKey("users.id"), index=True)
+    id: Mapped[UUID] = mapped_column(Uuid, primary_key=True, default=gen_uuid)
+    user_id: Mapped[UUID] = mapped_column(Uuid, ForeignKey("users.id"), index=True)
     target_role: Mapped[str] = mapped_column(String(255), nullable=False)
     duration_weeks: Mapped[int] = mapped_column(Integer, default=12)
     status: Mapped[str] = mapped_column(String(24), default="active")
     summary: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())  # <-- typed
+    # set by services/recommendations.py; NULL until the first refresh succeeds
+    recommendations_computed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
 
     user = relationship("User", back_populates="plans")
-    items = relationship("PlanItem", back_populates="plan", cascade="all, delete-orphan")
+    items = relationship(
+        "PlanItem",
+        back_populates="plan",
+        cascade="all, delete-orphan",
+        passive_deletes=True,  # plan_items.plan_id is ON DELETE CASCADE
+        order_by=lambda: [PlanItem.week_no, PlanItem.day_no],
+    )
 
 class PlanItem(Base):
     __tablename__ = "plan_items"
-    id: Mapped[str] = mapped_column(String, primary_key=True, default=gen_uuid)
-    plan_id: Mapped[str] = mapped_column(String, ForeignKey("plans.id"), index=True)
+    id: Mapped[UUID] = mapped_column(Uuid, primary_key=True, default=gen_uuid)
+    plan_id: Mapped[UUID] = mapped_column(Uuid, ForeignKey("plans.id", ondelete="CASCADE"), index=True)
     week_no: Mapped[int] = mapped_column(Integer, nullable=False)
     day_no: Mapped[int] = mapped_column(Integer, nullable=False)
     title: Mapped[str] = mapped_column(String(500), nullable=False)
@@ -60,11 +102,23 @@ class PlanItem(Base):
 
 class Progress(Base):
     __tablename__ = "progress"
-    id: Mapped[str] = mapped_column(String, primary_key=True, default=gen_uuid)
-    user_id: Mapped[str] = mapped_column(String, ForeignKey("users.id"), index=True)
-    plan_id: Mapped[str] = mapped_column(String, ForeignKey("plans.id"), index=True)
-    item_id: Mapped[str] = mapped_column(String, ForeignKey("plan_items.id"), index=True)
+    id: Mapped[UUID] = mapped_column(Uuid, primary_key=True, default=gen_uuid)
+    user_id: Mapped[UUID] = mapped_column(Uuid, ForeignKey("users.id"), index=True)
+    plan_id: Mapped[UUID] = mapped_column(Uuid, ForeignKey("plans.id", ondelete="CASCADE"), index=True)
+    item_id: Mapped[UUID] = mapped_column(Uuid, ForeignKey("plan_items.id", ondelete="CASCADE"), index=True)
     status: Mapped[str] = mapped_column(String(16), default="todo")  # todo/doing/done
     notes: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     started_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)     # <-- typed
     completed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)   # <-- typed
+
+class PlanRecommendation(Base):
+    """Top-k resources per plan item, precomputed by services/recommendations.py."""
+    __tablename__ = "plan_recommendations"
+    # (plan_id, item_id, rank) is the primary key so /plans/{id}/recommendations
+    # is one range scan over it
+    plan_id: Mapped[UUID] = mapped_column(Uuid, ForeignKey("plans.id", ondelete="CASCADE"), primary_key=True)
+    item_id: Mapped[UUID] = mapped_column(Uuid, ForeignKey("plan_items.id", ondelete="CASCADE"), primary_key=True)
+    rank: Mapped[int] = mapped_column(Integer, primary_key=True)
+    resource_id: Mapped[UUID] = mapped_column(Uuid, ForeignKey("resources.id", ondelete="CASCADE"), index=True)
+    score: Mapped[float] = mapped_column(Float, nullable=False)
+    computed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
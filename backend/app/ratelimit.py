@@ -0,0 +1,269 @@
+# app/ratelimit.py
+"""
+Per-user rate limiting and admission control for expensive endpoints.
+
+- rate_limit(route_class): dependency with a token bucket keyed by
+  (user, route class). Over the limit -> 429 with Retry-After. charge()
+  does the same from inside a handler, for requests that only sometimes
+  cost anything.
+- admission(work_class): context manager around LLM / embedding work that
+  bounds how many run at once. Saturated -> 503 with Retry-After, so heavy
+  jobs can't occupy the whole threadpool and cheap endpoints keep answering.
+
+Buckets and admission slots live in memory (one worker) or in SQL tables
+shared by all workers (RATE_LIMIT_BACKEND=sql; point RATE_LIMIT_DB_URL at
+sqlite for local runs). SQL slots are leases renewed every third of
+ADMISSION_LEASE_SECONDS while the work runs, so long generations keep
+their slot and a worker that dies gives it back within one lease.
+"""
+from __future__ import annotations
+
+import logging
+import math
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from fastapi import Depends, HTTPException
+from sqlalchemy import Column, Float, Integer, MetaData, String, Table, create_engine, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from . import models
+from .config import settings
+from .deps import get_current_user
+
+log = logging.getLogger(__name__)
+
+# route class -> (bucket capacity, refill tokens per second)
+LIMITS: Dict[str, Tuple[int, float]] = {
+    "llm": (settings.RATE_LIMIT_LLM_BURST, settings.RATE_LIMIT_LLM_PER_MIN / 60.0),
+    "ingest": (settings.RATE_LIMIT_INGEST_BURST, settings.RATE_LIMIT_INGEST_PER_MIN / 60.0),
+}
+# work class -> concurrent slots (per deployment with the sql backend)
+CONCURRENCY: Dict[str, int] = {
+    "llm": settings.LLM_MAX_CONCURRENCY,
+    "embed": settings.EMBED_MAX_CONCURRENCY,
+}
+# how often a waiting request re-checks the shared slots
+SLOT_POLL_SECONDS = 0.05
+
+
+def _refill(tokens: float, updated_at: float, now: float, capacity: int, rate: float) -> float:
+    return min(float(capacity), tokens + max(0.0, now - updated_at) * rate)
+
+
+def _take(tokens: float, rate: float) -> Tuple[float, float]:
+    """Spend one token if possible. Returns (tokens_left, seconds_to_wait)."""
+    if tokens >= 1.0:
+        return tokens - 1.0, 0.0
+    return tokens, (1.0 - tokens) / rate
+
+
+class MemoryBackend:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._semaphores = {c: threading.BoundedSemaphore(n) for c, n in CONCURRENCY.items()}
+
+    def take(self, key: str, capacity: int, rate: float) -> float:
+        now = time.time()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (float(capacity), now))
+            tokens, wait = _take(_refill(tokens, updated_at, now, capacity, rate), rate)
+            self._buckets[key] = (tokens, now)
+        return wait
+
+    def acquire(self, work_class: str, timeout: float) -> Optional[str]:
+        return work_class if self._semaphores[work_class].acquire(timeout=timeout) else None
+
+    def release(self, work_class: str, lease: str) -> None:
+        self._semaphores[work_class].release()
+
+
+_metadata = MetaData()
+rate_limit_buckets = Table(
+    "rate_limit_buckets",
+    _metadata,
+    Column("key", String(200), primary_key=True),
+    Column("tokens", Float, nullable=False),
+    Column("updated_at", Float, nullable=False),
+)
+admission_slots = Table(
+    "admission_slots",
+    _metadata,
+    Column("work_class", String(50), primary_key=True),
+    Column("slot", Integer, primary_key=True, autoincrement=False),
+    Column("holder", String(32), nullable=True),
+    Column("expires_at", Float, nullable=False, default=0.0),
+)
+
+
+class SqlBackend:
+    """Buckets and slot leases in tables, updated under row locks so all workers share them."""
+
+    def __init__(self, url: str, lease_seconds: float = settings.ADMISSION_LEASE_SECONDS):
+        self.engine = create_engine(url, pool_pre_ping=True, future=True)
+        self.lease_seconds = lease_seconds
+        self._renewals: Dict[str, threading.Event] = {}
+        self._renewals_lock = threading.Lock()
+        _metadata.create_all(self.engine)
+        for work_class, n in CONCURRENCY.items():
+            self._ensure_slots(work_class, n)
+
+    def _ensure_slots(self, work_class: str, n: int) -> None:
+        with self.engine.begin() as conn:
+            have = set(conn.execute(
+                select(admission_slots.c.slot).where(admission_slots.c.work_class == work_class)
+            ).scalars())
+        for slot in range(n):
+            if slot in have:
+                continue
+            try:
+                with self.engine.begin() as conn:
+                    conn.execute(insert(admission_slots).values(work_class=work_class, slot=slot, expires_at=0.0))
+            except IntegrityError:
+                pass  # another worker created it
+
+    def take(self, key: str, capacity: int, rate: float) -> float:
+        for _ in range(2):
+            now = time.time()
+            try:
+                with self.engine.begin() as conn:
+                    row = conn.execute(
+                        select(rate_limit_buckets.c.tokens, rate_limit_buckets.c.updated_at)
+                        .where(rate_limit_buckets.c.key == key)
+                        .with_for_update()
+                    ).first()
+                    if row is None:
+                        tokens, wait = _take(float(capacity), rate)
+                        conn.execute(insert(rate_limit_buckets).values(key=key, tokens=tokens, updated_at=now))
+                        return wait
+                    tokens, wait = _take(_refill(row.tokens, row.updated_at, now, capacity, rate), rate)
+                    conn.execute(
+                        update(rate_limit_buckets)
+                        .where(rate_limit_buckets.c.key == key)
+                        .values(tokens=tokens, updated_at=now)
+                    )
+                    return wait
+            except IntegrityError:
+                # another worker created the bucket first; retry against its row
+                continue
+        return 0.0
+
+    def _claim(self, work_class: str, holder: str) -> bool:
+        n = CONCURRENCY[work_class]
+        start = random.randrange(n)  # spread workers over the slots
+        now = time.time()
+        for i in range(n):
+            with self.engine.begin() as conn:
+                # single-row conditional UPDATE: atomic on both Postgres and sqlite
+                claimed = conn.execute(
+                    update(admission_slots)
+                    .where(
+                        admission_slots.c.work_class == work_class,
+                        admission_slots.c.slot == (start + i) % n,
+                        (admission_slots.c.holder.is_(None)) | (admission_slots.c.expires_at < now),
+                    )
+                    .values(holder=holder, expires_at=now + self.lease_seconds)
+                ).rowcount
+            if claimed:
+                return True
+        return False
+
+    def acquire(self, work_class: str, timeout: float) -> Optional[str]:
+        holder = uuid.uuid4().hex
+        deadline = time.monotonic() + timeout
+        while True:
+            if self._claim(work_class, holder):
+                stop = threading.Event()
+                with self._renewals_lock:
+                    self._renewals[holder] = stop
+                threading.Thread(
+                    target=self._renew, args=(work_class, holder, stop), daemon=True, name=f"lease-{work_class}"
+                ).start()
+                return holder
+            left = deadline - time.monotonic()
+            if left <= 0:
+                return None
+            time.sleep(min(SLOT_POLL_SECONDS, left))
+
+    def _renew(self, work_class: str, holder: str, stop: threading.Event) -> None:
+        """Push the lease's expiry forward until it is released."""
+        while not stop.wait(self.lease_seconds / 3):
+            try:
+                with self.engine.begin() as conn:
+                    conn.execute(
+                        update(admission_slots)
+                        .where(admission_slots.c.work_class == work_class, admission_slots.c.holder == holder)
+                        .values(expires_at=time.time() + self.lease_seconds)
+                    )
+            except Exception:
+                log.exception("renewing %s admission lease failed", work_class)
+
+    def release(self, work_class: str, lease: str) -> None:
+        with self._renewals_lock:
+            stop = self._renewals.pop(lease, None)
+        if stop is not None:
+            stop.set()
+        with self.engine.begin() as conn:
+            conn.execute(
+                update(admission_slots)
+                .where(admission_slots.c.work_class == work_class, admission_slots.c.holder == lease)
+                .values(holder=None, expires_at=0.0)
+            )
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            if settings.RATE_LIMIT_BACKEND == "sql":
+                _backend = SqlBackend(settings.RATE_LIMIT_DB_URL or settings.SQLALCHEMY_DATABASE_URI)
+            else:
+                _backend = MemoryBackend()
+        return _backend
+
+
+def charge(user: models.User, route_class: str) -> None:
+    """Spend one token from the user's `route_class` bucket, or raise 429."""
+    capacity, rate = LIMITS[route_class]
+    wait = get_backend().take(f"{user.id}:{route_class}", capacity, rate)
+    if wait > 0:
+        raise HTTPException(
+            status_code=429,
+            detail=f"Rate limit exceeded for {route_class} requests",
+            headers={"Retry-After": str(math.ceil(wait))},
+        )
+
+
+def rate_limit(route_class: str) -> Callable[..., models.User]:
+    """Dependency: authenticated user, or 429 when their bucket for `route_class` is empty."""
+    def dependency(user: models.User = Depends(get_current_user)) -> models.User:
+        charge(user, route_class)
+        return user
+
+    return dependency
+
+
+@contextmanager
+def admission(work_class: str, wait: Optional[float] = None) -> Iterator[None]:
+    """Hold one of the `work_class` slots, or raise 503 if none frees up in time."""
+    backend = get_backend()
+    lease = backend.acquire(work_class, settings.ADMISSION_WAIT_SECONDS if wait is None else wait)
+    if lease is None:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Server is busy with {work_class} work, try again shortly",
+            headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER)},
+        )
+    try:
+        yield
+    finally:
+        backend.release(work_class, lease)
@@ -1,17 +1,31 @@
 # app/routers/plans.py
 from __future__ import annotations
 
-from typing import List, Dict, Any, Optional
-from fastapi import APIRouter, Depends, HTTPException
+import hashlib
+from typing import List, Dict, Any, Literal, Optional
+from uuid import UUID
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session, selectinload
 
-from .. import models
+from .. import models, schemas
 from ..deps import get_db, get_current_user
+from ..idempotency import run_once
+from ..ratelimit import admission, charge
 from ..services.planner import build_plan, persist_plan
+from ..services.singleflight import SingleFlight, request_key
+from ..services.export import MEDIA_TYPES, export_plans
+from ..services.model_router import model_stats
+from ..services.recommendations import refresh_plan_job
+from ..services.templates import template_stats
 
 router = APIRouter(prefix="/plans", tags=["plans"])
 
+# one in-flight generation per (user, goal, skills, duration) in this worker
+_inflight_plans: SingleFlight[Dict[str, Any]] = SingleFlight()
+
 # ---------------------------
 # Pydantic Schemas
 # ---------------------------
@@ -20,36 +34,30 @@ class PlanCreate(BaseModel):
     duration_weeks: int = Field(12, ge=1, le=52)
     summary: Optional[str] = Field(None, example="Custom plan created manually.")
 
+class BulkPlanAction(BaseModel):
+    plan_ids: List[UUID] = Field(..., min_length=1, max_length=500)
+    action: Literal["archive", "delete"]
+
 class AutoPlanIn(BaseModel):
     goal: str = Field(..., description="Target role/goal")
     current_skills: List[str] = Field(default_factory=list)
     duration_weeks: int = Field(ge=1, le=52, default=12)
+    use_templates: bool = Field(True, description="Allow reuse of a similar stored plan")
 
 # ---------------------------
 # CRUD Endpoints
 # ---------------------------
-@router.get("/", response_model=List[Dict[str, Any]])
+@router.get("/", response_model=List[schemas.PlanSummaryOut])
 def list_plans(
     db: Session = Depends(get_db),
     user: models.User = Depends(get_current_user),
 ):
-    rows = (
+    return (
         db.query(models.Plan)
         .filter(models.Plan.user_id == user.id)
         .order_by(models.Plan.created_at.desc())
         .all()
     )
-    return [
-        {
-            "id": p.id,
-            "target_role": p.target_role,
-            "duration_weeks": p.duration_weeks,
-            "status": p.status,
-            "summary": p.summary,
-            "created_at": p.created_at,
-        }
-        for p in rows
-    ]
 
 @router.post("/", response_model=Dict[str, Any])
 def create_plan(
@@ -73,89 +81,201 @@ def create_plan(
         "summary": plan.summary,
     }
 
-@router.get("/{plan_id}", response_model=Dict[str, Any])
-def get_plan(
-    plan_id: str,
+@router.get("/templates/stats", response_model=Dict[str, Any])
+def get_template_stats(user: models.User = Depends(get_current_user)):
+    """Template reuse rate and estimated LLM latency saved (this process)."""
+    return template_stats()
+
+@router.get("/models/stats", response_model=Dict[str, Any])
+def get_model_stats(user: models.User = Depends(get_current_user)):
+    """Per-model latency and success rate that drive planner routing (this process)."""
+    return model_stats()
+
+EXPORT_FORMAT = Query("csv", alias="format", pattern="^(csv|ndjson|ics)$")
+
+def _export_response(fmt: str, user: models.User, filename: str, plan_id: Optional[UUID] = None) -> StreamingResponse:
+    return StreamingResponse(
+        export_plans(fmt, user.id, user.timezone, plan_id),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'},
+    )
+
+@router.get("/export", response_class=StreamingResponse)
+def export_all_plans(
+    fmt: str = EXPORT_FORMAT,
+    user: models.User = Depends(get_current_user),
+):
+    """Stream every plan item of the user as CSV, NDJSON or an .ics calendar."""
+    return _export_response(fmt, user, "skillsetu-plans")
+
+@router.get("/{plan_id}/export", response_class=StreamingResponse)
+def export_plan(
+    plan_id: UUID,
+    fmt: str = EXPORT_FORMAT,
     db: Session = Depends(get_db),
     user: models.User = Depends(get_current_user),
 ):
-    plan = (
-        db.query(models.Plan)
+    """Stream one plan as CSV, NDJSON or an .ics calendar (dates in the user's timezone)."""
+    owned = (
+        db.query(models.Plan.id)
         .filter(models.Plan.id == plan_id, models.Plan.user_id == user.id)
         .first()
     )
-    if not plan:
+    if not owned:
         raise HTTPException(status_code=404, detail="Plan not found")
+    return _export_response(fmt, user, f"plan-{plan_id}", plan_id)
 
-    items = (
-        db.query(models.PlanItem)
-        .filter(models.PlanItem.plan_id == plan.id)
-        .order_by(models.PlanItem.week_no.asc(), models.PlanItem.day_no.asc())
-        .all()
+@router.get("/{plan_id}/recommendations", response_model=schemas.PlanRecommendationsOut)
+def get_plan_recommendations(
+    plan_id: UUID,
+    background_tasks: BackgroundTasks,
+    item_id: Optional[UUID] = None,
+    db: Session = Depends(get_db),
+    user: models.User = Depends(get_current_user),
+):
+    """
+    Precomputed top-k resources per plan item (all items, or just `item_id`).
+    Plans that were never computed get a background refresh and pending=true.
+    """
+    rec = models.PlanRecommendation
+    stmt = (
+        select(rec.item_id, rec.rank, rec.score, *(getattr(models.Resource, f) for f in schemas.ResourceOut.model_fields))
+        .join(models.Resource, models.Resource.id == rec.resource_id)
+        .join(models.Plan, models.Plan.id == rec.plan_id)
+        .where(rec.plan_id == plan_id, models.Plan.user_id == user.id)
+        .order_by(rec.item_id, rec.rank)
     )
+    if item_id is not None:
+        stmt = stmt.where(rec.item_id == item_id)
+    rows = db.execute(stmt).mappings().all()
+
+    if not rows:
+        owned = (
+            db.query(models.Plan.recommendations_computed_at)
+            .filter(models.Plan.id == plan_id, models.Plan.user_id == user.id)
+            .first()
+        )
+        if not owned:
+            raise HTTPException(status_code=404, detail="Plan not found")
+        if owned.recommendations_computed_at is not None:
+            return {"plan_id": plan_id, "items": []}  # computed, nothing matched
+        background_tasks.add_task(refresh_plan_job, plan_id)
+        return {"plan_id": plan_id, "pending": True, "items": []}
+
+    items: Dict[UUID, List[Dict[str, Any]]] = {}
+    for r in rows:
+        items.setdefault(r["item_id"], []).append(dict(r))
     return {
-        "id": plan.id,
-        "target_role": plan.target_role,
-        "duration_weeks": plan.duration_weeks,
-        "status": plan.status,
-        "summary": plan.summary,
-        "items": [
-            {
-                "id": it.id,
-                "week_no": it.week_no,
-                "day_no": it.day_no,
-                "title": it.title,
-                "url": it.url,
-                "est_minutes": it.est_minutes,
-                "type": it.type,
-                "required_skill": it.required_skill,
-            }
-            for it in items
-        ],
+        "plan_id": plan_id,
+        "items": [{"item_id": iid, "resources": recs} for iid, recs in items.items()],
     }
 
-@router.delete("/{plan_id}", response_model=Dict[str, Any])
-def delete_plan(
-    plan_id: str,
+@router.get("/{plan_id}", response_model=schemas.PlanOut)
+def get_plan(
+    plan_id: UUID,
     db: Session = Depends(get_db),
     user: models.User = Depends(get_current_user),
 ):
     plan = (
         db.query(models.Plan)
+        .options(selectinload(models.Plan.items))
         .filter(models.Plan.id == plan_id, models.Plan.user_id == user.id)
         .first()
     )
     if not plan:
         raise HTTPException(status_code=404, detail="Plan not found")
-    db.delete(plan)
+    return plan
+
+@router.delete("/{plan_id}", response_model=Dict[str, Any])
+def delete_plan(
+    plan_id: UUID,
+    db: Session = Depends(get_db),
+    user: models.User = Depends(get_current_user),
+):
+    # one statement; items and progress go with it via ON DELETE CASCADE
+    deleted = db.execute(
+        delete(models.Plan)
+        .where(models.Plan.id == plan_id, models.Plan.user_id == user.id)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Plan not found")
     db.commit()
     return {"deleted": True, "plan_id": plan_id}
 
+@router.post("/bulk", response_model=Dict[str, Any])
+def bulk_plans(
+    payload: BulkPlanAction,
+    db: Session = Depends(get_db),
+    user: models.User = Depends(get_current_user),
+):
+    """Archive or delete several plans with a single statement. Unknown/foreign ids are ignored."""
+    owned = (models.Plan.id.in_(payload.plan_ids), models.Plan.user_id == user.id)
+    if payload.action == "delete":
+        stmt = delete(models.Plan).where(*owned)
+    else:
+        stmt = update(models.Plan).where(*owned).values(status="archived")
+    affected = db.execute(
+        stmt.returning(models.Plan.id).execution_options(synchronize_session=False)
+    ).scalars().all()
+    db.commit()
+    return {"action": payload.action, "affected": len(affected), "plan_ids": affected}
+
 # ---------------------------
 # Auto Plan (LLM)
 # ---------------------------
 @router.post("/auto")
 def create_auto_plan(
     payload: AutoPlanIn,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     user: models.User = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=200),
 ) -> Dict[str, Any]:
     """
     Generates a plan with the local LLM (Ollama) and persists it.
     Returns the stored plan id and a short summary.
+
+    Identical concurrent requests from the same user share one generation.
+    With an Idempotency-Key header, repeats within IDEMPOTENCY_TTL_SECONDS
+    return the plan created by the first request, on any worker when the
+    sql rate limit backend is used; reusing the key for a different body is
+    a 422. Only the request that actually generates is
+    charged against the llm rate limit. Item recommendations are computed
+    in the background once the response is sent.
     """
-    try:
-        plan_json = build_plan(payload.goal, payload.current_skills, payload.duration_weeks)
-    except HTTPException as e:
-        raise e
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Planner error: {e}")
+    def generate() -> Dict[str, Any]:
+        charge(user, "llm")
+        try:
+            with admission("llm"):
+                plan_json = build_plan(
+                    payload.goal, payload.current_skills, payload.duration_weeks, payload.use_templates
+                )
+        except HTTPException as e:
+            raise e
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Planner error: {e}")
 
-    plan = persist_plan(db, user, plan_json)
+        plan = persist_plan(db, user, plan_json)
 
-    return {
-        "plan_id": plan.id,
-        "summary": plan.summary or "",
-        "weeks": payload.duration_weeks,
-        "message": "Plan created",
-    }
+        return {
+            "plan_id": plan.id,
+            "summary": plan.summary or "",
+            "weeks": payload.duration_weeks,
+            "source": plan_json.get("source", "llm"),
+            "message": "Plan created",
+        }
+
+    if idempotency_key:
+        body_hash = hashlib.sha256(payload.model_dump_json().encode()).hexdigest()
+        result, shared = run_once(request_key(user.id, idempotency_key), body_hash, generate)
+    else:
+        skills = sorted({s.strip().lower() for s in payload.current_skills if s.strip()})
+        key = request_key(
+            user.id, payload.goal.strip().lower(), ",".join(skills),
+            payload.duration_weeks, payload.use_templates,
+        )
+        result, shared = _inflight_plans.do(key, generate)
+    if not shared:
+        background_tasks.add_task(refresh_plan_job, result["plan_id"])
+    return {**result, "coalesced": shared}
@@ -1,9 +1,16 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, Body
+from typing import List, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Body, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from ..db import SessionLocal
 from ..models import Resource
+from ..schemas import ResourceOut
+from ..services.dedup import ingest_resources
+from ..services.recommendations import refresh_all_job
+from ..streaming import iter_rows, json_array
 from ..routers._auth_utils import get_current_user
+from ..ratelimit import admission, rate_limit
 
 # ---- DB session dep ----
 def get_db():
@@ -17,61 +24,71 @@ router = APIRouter()
 
 # ---------- ORIGINAL ENDPOINTS ----------
 @router.post("/", response_model=dict)
-def add_resource(payload: dict, db: Session = Depends(get_db), user=Depends(get_current_user)):
-    r = Resource(
-        title=payload.get("title"),
-        url=payload.get("url"),
-        source=payload.get("source"),
-        tags=payload.get("tags"),
-        level=payload.get("level"),
-        lang=payload.get("lang"),
-        duration_min=payload.get("duration_min"),
-    )
-    db.add(r); db.commit(); db.refresh(r)
-    return {"id": r.id}
+def add_resource(payload: dict, db: Session = Depends(get_db), user=Depends(rate_limit("ingest"))):
+    if not payload.get("title") or not payload.get("url"):
+        raise HTTPException(status_code=400, detail="title and url are required")
+    with admission("embed"):
+        result = ingest_resources(db, [payload])
+    return {"id": result["ids"][0], "inserted": bool(result["inserted"])}
 
-@router.get("/", response_model=List[dict])
-def list_resources(db: Session = Depends(get_db), user=Depends(get_current_user)):
-    rows = db.query(Resource).limit(100).all()
-    return [{
-        "id": r.id, "title": r.title, "url": r.url, "source": r.source,
-        "tags": r.tags, "level": r.level, "lang": r.lang, "duration_min": r.duration_min
-    } for r in rows]
+@router.get("/", response_model=None, responses={200: {"model": List[ResourceOut]}})
+def list_resources(
+    limit: int = Query(100, ge=1, le=10_000),
+    offset: int = Query(0, ge=0),
+    user=Depends(get_current_user),
+):
+    """Page through resources; the JSON array is streamed from a server-side cursor."""
+    stmt = (
+        select(*(getattr(Resource, f) for f in ResourceOut.model_fields))
+        .order_by(Resource.id)
+        .limit(limit)
+        .offset(offset)
+    )
+    return StreamingResponse(json_array(iter_rows(stmt), model=ResourceOut), media_type="application/json")
 
 # ---------- PHASE 2: RAG ENDPOINTS ----------
-from ..services.rag import index_resources, query_by_skills  # <-- requires services/ folder added
+from ..services.rag import index_resources, prune_index, query_by_skills  # <-- requires services/ folder added
 
 @router.post("/ingest_bulk", response_model=dict)
-def ingest_bulk(payload: List[dict] = Body(...), db: Session = Depends(get_db), user=Depends(get_current_user)):
-    """Insert a list of resources into DB and index them into Chroma."""
-    rows: List[Resource] = []
+def ingest_bulk(
+    payload: List[dict] = Body(...),
+    near_dup: Optional[float] = Query(None, ge=0.5, le=1.0, description="Skip new rows this similar to an indexed one"),
+    db: Session = Depends(get_db),
+    user=Depends(rate_limit("ingest")),
+):
+    """Upsert resources by normalized URL and index the new/changed ones into Chroma."""
     for p in payload:
         if not p.get("title") or not p.get("url"):
             raise HTTPException(status_code=400, detail="title and url are required")
-        r = Resource(
-            title=p.get("title"),
-            url=p.get("url"),
-            source=p.get("source"),
-            tags=p.get("tags"),
-            level=p.get("level"),
-            lang=p.get("lang"),
-            duration_min=p.get("duration_min"),
-        )
-        db.add(r); rows.append(r)
-    db.commit()
-    for r in rows: db.refresh(r)
-    count = index_resources(rows)
-    return {"inserted": len(rows), "indexed": count}
+    with admission("embed"):
+        result = ingest_resources(db, payload, near_dup_threshold=near_dup)
+    result.pop("ids")
+    return result
 
 @router.post("/reindex_all", response_model=dict)
-def reindex_all(db: Session = Depends(get_db), user=Depends(get_current_user)):
-    """Rebuild the Chroma index from all DB resources."""
-    resources = db.query(Resource).all()
-    count = index_resources(resources)
-    return {"indexed": count}
+def reindex_all(
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    user=Depends(rate_limit("ingest")),
+):
+    """Rebuild the vector index from all DB resources, then refresh plan recommendations in the background."""
+    with admission("embed"):
+        resources = db.query(Resource).all()
+        count = index_resources(resources)
+        pruned = prune_index(r.id for r in resources)
+    background_tasks.add_task(refresh_all_job)
+    return {"indexed": count, "pruned": pruned, "recommendations": "refreshing"}
 
 @router.get("/search", response_model=List[dict])
-def search(skills: str, k: int = 5, db: Session = Depends(get_db), user=Depends(get_current_user)):
-    """Search indexed resources by comma-separated skills."""
+def search(
+    skills: str,
+    k: int = 5,
+    level: Optional[str] = None,
+    source: Optional[str] = None,
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    """Search indexed resources by comma-separated skills, optionally only one level/source."""
     skill_list = [s.strip() for s in skills.split(",") if s.strip()]
-    return query_by_skills(skill_list, k=k)
+    where = {f: v for f, v in (("level", level), ("source", source)) if v}
+    return query_by_skills(skill_list, k=k, where=where or None)
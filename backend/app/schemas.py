@@ -1,6 +1,7 @@
 from pydantic import BaseModel, EmailStr, Field
 from typing import Optional, List
 from datetime import datetime
+from uuid import UUID
 
 # -------- Auth --------
 class UserCreate(BaseModel):
@@ -9,7 +10,7 @@ class UserCreate(BaseModel):
     password: str
 
 class UserOut(BaseModel):
-    id: str
+    id: UUID
     email: EmailStr
     name: Optional[str] = None
     class Config:
@@ -40,21 +41,51 @@ class PlanCreate(BaseModel):
     items: List[PlanItemIn] = []
 
 class PlanItemOut(PlanItemIn):
-    id: str
+    id: UUID
+    class Config:
+        from_attributes = True
 
-class PlanOut(BaseModel):
-    id: str
+class PlanSummaryOut(BaseModel):
+    id: UUID
     target_role: str
     duration_weeks: int
     status: str
     summary: Optional[str]
     created_at: datetime
+    class Config:
+        from_attributes = True
+
+class PlanOut(PlanSummaryOut):
     items: List[PlanItemOut] = []
+
+# -------- Resources --------
+class ResourceOut(BaseModel):
+    id: UUID
+    title: str
+    url: str
+    source: Optional[str] = None
+    tags: Optional[str] = None
+    level: Optional[str] = None
+    lang: Optional[str] = None
+    duration_min: Optional[int] = None
     class Config:
         from_attributes = True
 
+class RecommendedResourceOut(ResourceOut):
+    rank: int
+    score: float
+
+class ItemRecommendationsOut(BaseModel):
+    item_id: UUID
+    resources: List[RecommendedResourceOut] = []
+
+class PlanRecommendationsOut(BaseModel):
+    plan_id: UUID
+    pending: bool = False  # not computed yet; a refresh has been scheduled
+    items: List[ItemRecommendationsOut] = []
+
 # -------- Progress --------
 class ProgressUpdate(BaseModel):
-    item_id: str
+    item_id: UUID
     status: str  # todo/doing/done
     notes: Optional[str] = None
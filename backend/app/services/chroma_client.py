@@ -1,10 +1,39 @@
 import os
 import chromadb
+from chromadb.db.base import UniqueConstraintError
 
 # Persist inside the container; volume-mount if you want persistence across rebuilds.
 CHROMA_DIR = os.getenv("CHROMA_DIR", "/app/chroma_data")
 COLLECTION = os.getenv("CHROMA_COLLECTION", "learning_resources")
 
-def get_collection():
-    client = chromadb.PersistentClient(path=CHROMA_DIR)
-    return client.get_or_create_collection(COLLECTION, metadata={"hnsw:space": "cosine"})
+# HNSW build/search parameters. They only take effect when a collection is
+# created; use `python -m app.services.index_admin restore` to rebuild an
+# existing collection with new values (no re-embedding needed).
+HNSW_SPACE = "cosine"
+HNSW_M = int(os.getenv("CHROMA_HNSW_M", "16"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("CHROMA_HNSW_EF_CONSTRUCTION", "100"))
+HNSW_EF_SEARCH = int(os.getenv("CHROMA_HNSW_EF_SEARCH", "10"))
+
+def hnsw_metadata(m: int = HNSW_M, ef_construction: int = HNSW_EF_CONSTRUCTION, ef_search: int = HNSW_EF_SEARCH) -> dict:
+    return {
+        "hnsw:space": HNSW_SPACE,
+        "hnsw:M": m,
+        "hnsw:construction_ef": ef_construction,
+        "hnsw:search_ef": ef_search,
+    }
+
+def get_client(path: str = CHROMA_DIR):
+    return chromadb.PersistentClient(path=path)
+
+def get_collection(name: str = COLLECTION, client=None):
+    client = client or get_client()
+    # get_or_create_collection(metadata=...) would overwrite the HNSW params an
+    # existing collection was restored with, so they are only passed on create
+    try:
+        return client.get_collection(name)
+    except ValueError:
+        pass
+    try:
+        return client.create_collection(name, metadata=hnsw_metadata())
+    except UniqueConstraintError:  # another worker created it in between
+        return client.get_collection(name)
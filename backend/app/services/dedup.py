@@ -0,0 +1,126 @@
+# app/services/dedup.py
+"""
+Ingest-time deduplication for resources.
+
+Rows are keyed by their normalized URL (Resource.url_key, unique) and
+upserted: a known URL only updates the row when a field actually changed.
+Optionally, brand-new rows whose embedding is within a cosine threshold of
+an indexed resource (or of an earlier row in the same batch) are dropped as
+near-duplicates.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import literal_column, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from ..models import Resource, gen_uuid
+from .embeddings import embed_texts
+from .rag import _resource_doc, index_resources, nearest
+from .urls import normalize_url
+
+RESOURCE_FIELDS = ("title", "url", "source", "tags", "level", "lang", "duration_min")
+UPSERT_BATCH = 1000
+
+
+def _row(p: Dict[str, Any]) -> Dict[str, Any]:
+    row = {f: p.get(f) for f in RESOURCE_FIELDS}
+    row["url_key"] = normalize_url(row["url"])
+    return row
+
+
+def _near_duplicates(
+    rows: List[Dict[str, Any]], threshold: float
+) -> tuple[List[bool], np.ndarray]:
+    """Flag rows that are near-duplicates of the index or of an earlier kept row."""
+    docs = [_resource_doc(Resource(**{f: r[f] for f in RESOURCE_FIELDS})) for r in rows]
+    vecs = np.asarray(embed_texts(docs), dtype=np.float32)
+    dup = [bool(hits) and hits[0][1] >= threshold for hits in nearest(vecs.tolist(), k=1)]
+
+    # within the batch: greedy, first occurrence wins (vectors are normalized)
+    kept = np.zeros(len(rows), dtype=bool)
+    for start in range(0, len(rows), 1000):
+        block = vecs[start : start + 1000] @ vecs.T
+        for off, sims in enumerate(block):
+            i = start + off
+            if dup[i]:
+                continue
+            earlier = np.flatnonzero(sims[:i] >= threshold)
+            if earlier.size and kept[earlier].any():
+                dup[i] = True
+            else:
+                kept[i] = True
+    return dup, vecs
+
+
+def _upsert(db: Session, rows: List[Dict[str, Any]]) -> Dict[str, bool]:
+    """INSERT .. ON CONFLICT (url_key) DO UPDATE only when something changed. Returns {id: inserted}."""
+    touched: Dict[str, bool] = {}
+    table = Resource.__table__
+    for start in range(0, len(rows), UPSERT_BATCH):
+        stmt = pg_insert(Resource).values([{**r, "id": gen_uuid()} for r in rows[start : start + UPSERT_BATCH]])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Resource.url_key],
+            set_={f: stmt.excluded[f] for f in RESOURCE_FIELDS},
+            where=or_(*(table.c[f].is_distinct_from(stmt.excluded[f]) for f in RESOURCE_FIELDS)),
+        ).returning(Resource.id, literal_column("(xmax = 0)").label("inserted"))
+        for rid, inserted in db.execute(stmt):
+            touched[rid] = bool(inserted)
+    return touched
+
+
+def ingest_resources(
+    db: Session, payload: List[Dict[str, Any]], near_dup_threshold: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Upsert `payload` by normalized URL and index what changed.
+    Returns inserted / updated / skipped / near_duplicates / indexed counts and
+    the resource ids in payload order (None for near-duplicates).
+    """
+    by_key: Dict[str, Dict[str, Any]] = {}
+    for p in payload:
+        row = _row(p)
+        by_key[row["url_key"]] = row  # last occurrence in the batch wins
+    rows = list(by_key.values())
+
+    near_dups = 0
+    vecs_by_key: Dict[str, List[float]] = {}
+    if near_dup_threshold is not None and rows:
+        keys = [r["url_key"] for r in rows]
+        existing = set(db.execute(select(Resource.url_key).where(Resource.url_key.in_(keys))).scalars())
+        fresh = [r for r in rows if r["url_key"] not in existing]
+        if fresh:
+            dup, vecs = _near_duplicates(fresh, near_dup_threshold)
+            drop = {r["url_key"] for r, d in zip(fresh, dup) if d}
+            near_dups = len(drop)
+            vecs_by_key = {r["url_key"]: v.tolist() for r, v, d in zip(fresh, vecs, dup) if not d}
+            rows = [r for r in rows if r["url_key"] not in drop]
+
+    touched = _upsert(db, rows) if rows else {}
+    db.commit()
+
+    ids_by_key = dict(
+        db.execute(
+            select(Resource.url_key, Resource.id).where(Resource.url_key.in_([r["url_key"] for r in rows]))
+        ).all()
+    ) if rows else {}
+    changed = db.query(Resource).filter(Resource.id.in_(list(touched))).all() if touched else []
+    # reuse the vectors computed for the near-duplicate check, embed the rest
+    missing = [r for r in changed if r.url_key not in vecs_by_key]
+    if missing:
+        vecs_by_key.update(zip([r.url_key for r in missing], embed_texts([_resource_doc(r) for r in missing])))
+    indexed = index_resources(changed, embeddings=[vecs_by_key[r.url_key] for r in changed])
+
+    inserted = sum(1 for v in touched.values() if v)
+    return {
+        "received": len(payload),
+        "inserted": inserted,
+        "updated": len(touched) - inserted,
+        "skipped": len(payload) - len(touched) - near_dups,
+        "near_duplicates": near_dups,
+        "indexed": indexed,
+        "ids": [ids_by_key.get(normalize_url(p["url"])) for p in payload],
+    }
@@ -1,14 +1,22 @@
+from __future__ import annotations
+
 from functools import lru_cache
-from typing import List
-from sentence_transformers import SentenceTransformer
+from typing import TYPE_CHECKING, List
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
 
+EMBED_MODEL = "BAAI/bge-small-en-v1.5"
 INSTRUCTION = "Represent this sentence for retrieval: "  # bge works better with instruction
 
 @lru_cache(maxsize=1)
 def get_embedder() -> SentenceTransformer:
+    # imported here so modules that only pass embed_texts around load without torch
+    from sentence_transformers import SentenceTransformer
+
     # Free, good quality, small footprint
     # Model will be downloaded on first run (cached in container layer)
-    return SentenceTransformer("BAAI/bge-small-en-v1.5")
+    return SentenceTransformer(EMBED_MODEL)
 
 def embed_texts(texts: List[str]) -> List[List[float]]:
     model = get_embedder()
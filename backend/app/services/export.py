@@ -0,0 +1,159 @@
+# app/services/export.py
+"""
+Streaming plan export as CSV, NDJSON or an iCalendar (.ics) file.
+
+Rows come from a server-side cursor (app.streaming.iter_rows), so memory use
+does not depend on how many plans or items are exported. Week/day numbers are
+mapped to calendar dates starting at the plan's creation date in the user's
+timezone: week 1 day 1 is that date, week 2 day 1 is seven days later.
+"""
+from __future__ import annotations
+
+import csv
+import datetime as dt
+import io
+from typing import Any, Callable, Dict, Iterator, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import orjson
+from sqlalchemy import select
+
+from ..models import Plan, PlanItem
+from ..streaming import iter_rows
+
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "ics": "text/calendar; charset=utf-8",
+}
+CHUNK_ROWS = 200
+COLUMNS = [
+    "plan_id", "target_role", "item_id", "week_no", "day_no", "date",
+    "title", "url", "est_minutes", "type", "required_skill",
+]
+
+
+def _zone(name: Optional[str]) -> dt.tzinfo:
+    try:
+        return ZoneInfo(name or "UTC")
+    except (ZoneInfoNotFoundError, ValueError):
+        return dt.timezone.utc
+
+
+def _rows(user_id: Any, plan_id: Optional[Any], tz: dt.tzinfo) -> Iterator[Dict[str, Any]]:
+    stmt = (
+        select(
+            Plan.id.label("plan_id"), Plan.target_role, Plan.created_at,
+            PlanItem.id.label("item_id"), PlanItem.week_no, PlanItem.day_no, PlanItem.title,
+            PlanItem.url, PlanItem.est_minutes, PlanItem.type, PlanItem.required_skill,
+        )
+        .join(PlanItem, PlanItem.plan_id == Plan.id)
+        .where(Plan.user_id == user_id)
+        .order_by(Plan.created_at, Plan.id, PlanItem.week_no, PlanItem.day_no)
+    )
+    if plan_id is not None:
+        stmt = stmt.where(Plan.id == plan_id)
+    for r in iter_rows(stmt):
+        created = r["created_at"] or dt.datetime.now(dt.timezone.utc)
+        if created.tzinfo is None:
+            created = created.replace(tzinfo=dt.timezone.utc)
+        start = created.astimezone(tz).date()
+        offset = (max(r["week_no"], 1) - 1) * 7 + (max(r["day_no"], 1) - 1)
+        row = {c: r[c] for c in COLUMNS if c != "date"}
+        row["date"] = start + dt.timedelta(days=offset)
+        yield row
+
+
+def _csv(rows: Iterator[Dict[str, Any]]) -> Iterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(COLUMNS)
+    n = 0
+    for row in rows:
+        writer.writerow([row[c] for c in COLUMNS])
+        n += 1
+        if n % CHUNK_ROWS == 0:
+            yield buf.getvalue().encode("utf-8")
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue().encode("utf-8")
+
+
+def _ndjson(rows: Iterator[Dict[str, Any]]) -> Iterator[bytes]:
+    chunk = []
+    for row in rows:
+        chunk.append(orjson.dumps(row, option=orjson.OPT_APPEND_NEWLINE, default=str))
+        if len(chunk) >= CHUNK_ROWS:
+            yield b"".join(chunk)
+            chunk = []
+    if chunk:
+        yield b"".join(chunk)
+
+
+def _ics_text(value: Any) -> str:
+    return (
+        str(value or "")
+        .replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+    )
+
+
+def _fold(line: str) -> str:
+    """RFC 5545: lines longer than 75 octets continue on the next line after a space."""
+    raw = line.encode("utf-8")
+    if len(raw) <= 75:
+        return line + "\r\n"
+    parts, start, limit = [], 0, 75
+    while start < len(raw):
+        end = min(start + limit, len(raw))
+        while end < len(raw) and (raw[end] & 0xC0) == 0x80:  # don't split a UTF-8 sequence
+            end -= 1
+        parts.append(raw[start:end].decode("utf-8"))
+        start, limit = end, 74
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _ics(rows: Iterator[Dict[str, Any]], tz_name: str) -> Iterator[bytes]:
+    stamp = dt.datetime.now(dt.timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    head = [
+        "BEGIN:VCALENDAR", "VERSION:2.0", "PRODID:-//SkillSetu//Plan Export//EN",
+        "CALSCALE:GREGORIAN", "METHOD:PUBLISH", f"X-WR-TIMEZONE:{tz_name}",
+    ]
+    yield "".join(_fold(line) for line in head).encode("utf-8")
+    chunk = []
+    for row in rows:
+        day = row["date"]
+        desc = f"{row['target_role']} - week {row['week_no']}, day {row['day_no']}"
+        if row["est_minutes"]:
+            desc += f" ({row['est_minutes']} min)"
+        if row["required_skill"]:
+            desc += f"\nSkill: {row['required_skill']}"
+        lines = [
+            "BEGIN:VEVENT",
+            f"UID:{row['item_id']}@skillsetu",
+            f"DTSTAMP:{stamp}",
+            f"DTSTART;VALUE=DATE:{day:%Y%m%d}",
+            f"DTEND;VALUE=DATE:{day + dt.timedelta(days=1):%Y%m%d}",
+            f"SUMMARY:{_ics_text(row['title'])}",
+            f"DESCRIPTION:{_ics_text(desc)}",
+        ]
+        if row["url"]:
+            lines.append(f"URL:{row['url']}")
+        lines.append("END:VEVENT")
+        chunk.append("".join(_fold(line) for line in lines))
+        if len(chunk) >= CHUNK_ROWS:
+            yield "".join(chunk).encode("utf-8")
+            chunk = []
+    chunk.append(_fold("END:VCALENDAR"))
+    yield "".join(chunk).encode("utf-8")
+
+
+def export_plans(fmt: str, user_id: Any, timezone: Optional[str], plan_id: Optional[Any] = None) -> Iterator[bytes]:
+    """Byte chunks of the export of one plan (plan_id) or all of a user's plans."""
+    tz = _zone(timezone)
+    rows = _rows(user_id, plan_id, tz)
+    writers: Dict[str, Callable[[], Iterator[bytes]]] = {
+        "csv": lambda: _csv(rows),
+        "ndjson": lambda: _ndjson(rows),
+        "ics": lambda: _ics(rows, str(tz)),
+    }
+    return writers[fmt]()
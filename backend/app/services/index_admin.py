@@ -0,0 +1,331 @@
+# app/services/index_admin.py
+"""
+Vector index management commands.
+
+    python -m app.services.index_admin snapshot DIR [--collection NAME]
+    python -m app.services.index_admin restore DIR [--collection NAME] [--m 16 --ef-construction 100 --ef-search 10]
+    python -m app.services.index_admin restore DIR --backend numpy [--collection NAME]
+    python -m app.services.index_admin bench DIR [--m 8,16,32 --ef-construction 100,200 --ef-search 10,50,100]
+    python -m app.services.index_admin info [--collection NAME]
+
+A snapshot is a directory with
+    manifest.json    collection name, count, dim, space, HNSW params, embedding model
+    embeddings.npy   float32 matrix, one row per record (load with mmap_mode="r")
+    records.jsonl    {"id", "document", "metadata"} per row, same order as embeddings.npy
+
+Restoring rebuilds the collection from the stored vectors, so a lost or
+corrupted chroma_data volume (or an HNSW parameter change) never needs a full
+re-embed via /resources/reindex_all. The new collection is built under a
+temporary name and renamed over the live one only once it is complete. The numpy vector store
+(VECTOR_BACKEND=numpy) uses the same layout, so `restore --backend numpy`
+just installs the snapshot files as its index.
+"""
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .chroma_client import (
+    COLLECTION,
+    HNSW_EF_CONSTRUCTION,
+    HNSW_EF_SEARCH,
+    HNSW_M,
+    HNSW_SPACE,
+    get_client,
+    hnsw_metadata,
+)
+from .embeddings import EMBED_MODEL
+from .vector_store import (
+    EMBEDDINGS,
+    MANIFEST,
+    RECORDS,
+    SNAPSHOT_FORMAT,
+    VECTOR_BACKEND,
+    get_store,
+    read_index_dir,
+)
+
+BATCH = 1000
+
+
+# ---------- snapshot ----------
+def _iter_collection(col, batch: int = BATCH) -> Iterator[Dict[str, Any]]:
+    offset = 0
+    while True:
+        page = col.get(include=["embeddings", "metadatas", "documents"], limit=batch, offset=offset)
+        ids = page.get("ids") or []
+        if not ids:
+            return
+        yield page
+        offset += len(ids)
+
+
+def snapshot(out_dir: str, collection: str = COLLECTION) -> Dict[str, Any]:
+    """Write embeddings + metadata of `collection` to `out_dir`. Returns the manifest."""
+    col = get_client().get_collection(collection)
+    count = col.count()
+    os.makedirs(out_dir, exist_ok=True)
+
+    matrix = None
+    written = 0
+    with open(os.path.join(out_dir, RECORDS), "w", encoding="utf-8") as f:
+        for page in _iter_collection(col):
+            vecs = np.asarray(page["embeddings"], dtype=np.float32)
+            if matrix is None:
+                matrix = np.lib.format.open_memmap(
+                    os.path.join(out_dir, EMBEDDINGS), mode="w+", dtype=np.float32, shape=(count, vecs.shape[1])
+                )
+            n = min(len(vecs), count - written)
+            matrix[written : written + n] = vecs[:n]
+            for i in range(n):
+                f.write(json.dumps({
+                    "id": page["ids"][i],
+                    "document": (page.get("documents") or [None] * n)[i],
+                    "metadata": (page.get("metadatas") or [None] * n)[i],
+                }, ensure_ascii=False) + "\n")
+            written += n
+    dim = int(matrix.shape[1]) if matrix is not None else 0
+    if matrix is not None:
+        matrix.flush()
+        del matrix
+    else:
+        np.save(os.path.join(out_dir, EMBEDDINGS), np.zeros((0, 0), dtype=np.float32))
+
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "collection": collection,
+        "count": written,
+        "dim": dim,
+        "space": (col.metadata or {}).get("hnsw:space", HNSW_SPACE),
+        "hnsw": {k: v for k, v in (col.metadata or {}).items() if k.startswith("hnsw:")},
+        "embedding_model": EMBED_MODEL,
+        "created_at": dt.datetime.now(dt.timezone.utc).isoformat(),
+        "files": {"embeddings": EMBEDDINGS, "records": RECORDS},
+    }
+    with open(os.path.join(out_dir, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def load_snapshot(snap_dir: str) -> Tuple[Dict[str, Any], np.ndarray, List[Dict[str, Any]]]:
+    """(manifest, memory-mapped float32 embeddings, records) of a snapshot directory."""
+    return read_index_dir(snap_dir)
+
+
+# ---------- restore ----------
+def _fill(col, matrix: np.ndarray, records: List[Dict[str, Any]], batch: int = BATCH) -> None:
+    for start in range(0, len(records), batch):
+        chunk = records[start : start + batch]
+        col.add(
+            ids=[r["id"] for r in chunk],
+            embeddings=np.asarray(matrix[start : start + batch], dtype=np.float32).tolist(),
+            documents=[r.get("document") or "" for r in chunk],
+            # chroma rejects empty dicts but accepts None for records without metadata
+            metadatas=[r.get("metadata") or None for r in chunk],
+        )
+
+
+def restore(
+    snap_dir: str,
+    collection: Optional[str] = None,
+    m: int = HNSW_M,
+    ef_construction: int = HNSW_EF_CONSTRUCTION,
+    ef_search: int = HNSW_EF_SEARCH,
+    force: bool = False,
+    client=None,
+    backend: str = "chroma",
+) -> int:
+    """Recreate `collection` from a snapshot with the given HNSW params. Returns rows restored."""
+    manifest, matrix, records = load_snapshot(snap_dir)
+    if manifest.get("embedding_model") != EMBED_MODEL and not force:
+        raise ValueError(
+            f"snapshot was embedded with {manifest.get('embedding_model')!r}, "
+            f"current model is {EMBED_MODEL!r} (use --force to restore anyway)"
+        )
+    name = collection or manifest["collection"]
+    if backend == "numpy":
+        return _install_numpy(snap_dir, manifest, name)
+    client = client or get_client()
+    # build next to the live collection and only swap once it is complete, so
+    # a failed or interrupted restore leaves the current index untouched
+    suffix = dt.datetime.now(dt.timezone.utc).strftime("%Y%m%d%H%M%S")
+    staging, retired = f"{name}__restore_{suffix}", f"{name}__old_{suffix}"
+    col = client.create_collection(staging, metadata=hnsw_metadata(m, ef_construction, ef_search))
+    try:
+        _fill(col, matrix, records)
+        count = col.count()
+    except BaseException:
+        client.delete_collection(staging)
+        raise
+    _swap_collection(client, col, name, retired)
+    return count
+
+
+def _swap_collection(client, col, name: str, retired: str) -> None:
+    """Rename `col` to `name`, retiring and then dropping the current `name`."""
+    try:
+        live = client.get_collection(name)
+    except Exception:
+        live = None  # first restore
+    if live is not None:
+        live.modify(name=retired)
+    try:
+        col.modify(name=name)
+    except BaseException:
+        if live is not None:
+            live.modify(name=name)
+        raise
+    if live is not None:
+        client.delete_collection(retired)
+
+
+def _install_numpy(snap_dir: str, manifest: Dict[str, Any], name: str) -> int:
+    """
+    Copy the snapshot files into the numpy store's directory; the manifest goes
+    last. Holds the store's write lock so a concurrent upsert/delete can't
+    interleave with the copy.
+    """
+    store = get_store(name, backend="numpy")
+    with store._writing():
+        return _copy_index(snap_dir, manifest, name, store.path)
+
+
+def _copy_index(snap_dir: str, manifest: Dict[str, Any], name: str, target: str) -> int:
+    for key, dest in (("embeddings", EMBEDDINGS), ("records", RECORDS)):
+        shutil.copyfile(os.path.join(snap_dir, manifest["files"][key]), os.path.join(target, dest + ".tmp"))
+        os.replace(os.path.join(target, dest + ".tmp"), os.path.join(target, dest))
+    manifest = {**manifest, "collection": name, "files": {"embeddings": EMBEDDINGS, "records": RECORDS}}
+    manifest.pop("records_bytes", None)
+    with open(os.path.join(target, MANIFEST + ".tmp"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(os.path.join(target, MANIFEST + ".tmp"), os.path.join(target, MANIFEST))
+    return manifest["count"]
+
+
+# ---------- benchmark ----------
+def _exact_topk(matrix: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    data = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+    sims = queries @ data.T
+    top = np.argpartition(-sims, min(k, sims.shape[1] - 1), axis=1)[:, :k]
+    return top
+
+
+def bench(
+    snap_dir: str,
+    ms: List[int],
+    ef_constructions: List[int],
+    ef_searches: List[int],
+    n_queries: int = 200,
+    k: int = 10,
+    seed: int = 0,
+) -> List[Dict[str, Any]]:
+    """Recall@k and query latency for each HNSW parameter combination."""
+    _, mmap, records = load_snapshot(snap_dir)
+    matrix = np.asarray(mmap, dtype=np.float32)
+    if len(matrix) == 0:
+        raise ValueError("snapshot is empty")
+    k = min(k, len(matrix))
+    rng = np.random.default_rng(seed)
+    picks = rng.choice(len(matrix), size=min(n_queries, len(matrix)), replace=False)
+    queries = matrix[picks] + rng.normal(0, 0.02, size=(len(picks), matrix.shape[1])).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    truth = _exact_topk(matrix, queries, k)
+    ids = np.array([r["id"] for r in records])
+
+    results = []
+    tmp = tempfile.mkdtemp(prefix="hnsw-bench-")
+    try:
+        client = get_client(tmp)
+        # HNSW params are fixed at creation, so every combination gets its own build
+        for m in ms:
+            for ef_c in ef_constructions:
+                for ef_s in ef_searches:
+                    name = f"bench_m{m}_efc{ef_c}_efs{ef_s}"
+                    t0 = time.perf_counter()
+                    col = client.create_collection(name, metadata=hnsw_metadata(m, ef_c, ef_s))
+                    _fill(col, matrix, records)
+                    build_s = time.perf_counter() - t0
+                    lat, hits = [], 0
+                    for qi, q in enumerate(queries):
+                        t1 = time.perf_counter()
+                        out = col.query(query_embeddings=[q.tolist()], n_results=k)
+                        lat.append((time.perf_counter() - t1) * 1000)
+                        hits += len(set(out["ids"][0]) & set(ids[truth[qi]]))
+                    lat.sort()
+                    results.append({
+                        "M": m, "ef_construction": ef_c, "ef_search": ef_s,
+                        "recall_at_k": round(hits / (len(queries) * k), 4),
+                        "p50_ms": round(lat[len(lat) // 2], 3),
+                        "p95_ms": round(lat[min(len(lat) - 1, int(len(lat) * 0.95))], 3),
+                        "build_s": round(build_s, 2),
+                    })
+                    client.delete_collection(name)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return results
+
+
+# ---------- CLI ----------
+def _ints(s: str) -> List[int]:
+    return [int(x) for x in s.split(",") if x.strip()]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m app.services.index_admin", description="Vector index management")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("snapshot", help="write embeddings + metadata to a snapshot directory")
+    p.add_argument("out_dir")
+    p.add_argument("--collection", default=COLLECTION)
+
+    p = sub.add_parser("restore", help="rebuild a collection from a snapshot without re-embedding")
+    p.add_argument("snap_dir")
+    p.add_argument("--collection", default=None, help="defaults to the snapshot's collection")
+    p.add_argument("--m", type=int, default=HNSW_M)
+    p.add_argument("--ef-construction", type=int, default=HNSW_EF_CONSTRUCTION)
+    p.add_argument("--ef-search", type=int, default=HNSW_EF_SEARCH)
+    p.add_argument("--force", action="store_true", help="restore even if the embedding model differs")
+    p.add_argument("--backend", choices=["chroma", "numpy"], default=VECTOR_BACKEND)
+
+    p = sub.add_parser("bench", help="recall/latency of HNSW parameter combinations on a snapshot")
+    p.add_argument("snap_dir")
+    p.add_argument("--m", default="8,16,32")
+    p.add_argument("--ef-construction", default="100,200")
+    p.add_argument("--ef-search", default="10,50,100")
+    p.add_argument("--queries", type=int, default=200)
+    p.add_argument("--k", type=int, default=10)
+
+    p = sub.add_parser("info", help="show collection size and HNSW params")
+    p.add_argument("--collection", default=COLLECTION)
+
+    args = ap.parse_args(argv)
+    if args.cmd == "snapshot":
+        out = snapshot(args.out_dir, args.collection)
+    elif args.cmd == "restore":
+        n = restore(args.snap_dir, args.collection, args.m, args.ef_construction, args.ef_search, args.force,
+                    backend=args.backend)
+        out = {"restored": n}
+    elif args.cmd == "bench":
+        out = bench(args.snap_dir, _ints(args.m), _ints(args.ef_construction), _ints(args.ef_search),
+                    n_queries=args.queries, k=args.k)
+    elif VECTOR_BACKEND == "numpy":
+        out = {"backend": "numpy", "collection": args.collection, "count": get_store(args.collection).count()}
+    else:
+        col = get_client().get_collection(args.collection)
+        out = {"collection": col.name, "count": col.count(), "metadata": col.metadata}
+    json.dump(out, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+# app/services/json_repair.py
+"""
+Tolerant JSON parsing for LLM output.
+
+The parser walks the text once and keeps everything it could read when the
+output is cut off (e.g. by `num_predict`) or slightly malformed (code fences,
+leading prose, trailing/missing commas, single quotes, Python literals).
+A syntax error it cannot get past is treated like end of input: parsing
+stops there and everything read before it is kept. Objects and arrays that
+were closed that way instead of by their closing bracket are remembered, so
+callers can keep only the complete parts.
+"""
+from __future__ import annotations
+
+import re
+from typing import Any, Set
+
+_NUMBER = re.compile(r"-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?")
+_BARE_KEY = re.compile(r"[A-Za-z_][A-Za-z0-9_\-]*")
+_LITERALS = {
+    "true": True, "false": False, "null": None,
+    "True": True, "False": False, "None": None,
+}
+_ESCAPES = {'"': '"', "'": "'", "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+class JSONRepairError(ValueError):
+    pass
+
+
+class _EOF(Exception):
+    pass
+
+
+class PartialJSON:
+    """Result of parse_partial(): the recovered value plus completeness info."""
+
+    def __init__(self, value: Any, incomplete: Set[int]):
+        self.value = value
+        self._incomplete = incomplete
+
+    @property
+    def complete(self) -> bool:
+        return not self._incomplete
+
+    def is_complete(self, node: Any) -> bool:
+        """False if `node` (an object/array from .value) was cut off by end of input or a syntax error."""
+        return id(node) not in self._incomplete
+
+
+class _Parser:
+    def __init__(self, text: str):
+        self.s = text
+        self.i = 0
+        self.n = len(text)
+        self.eof = False
+        self.incomplete: Set[int] = set()
+
+    def _peek(self) -> str:
+        while self.i < self.n and self.s[self.i] in " \t\r\n":
+            self.i += 1
+        if self.i >= self.n:
+            raise _EOF
+        return self.s[self.i]
+
+    def value(self) -> Any:
+        c = self._peek()
+        if c == "{":
+            return self._container({}, "}")
+        if c == "[":
+            return self._container([], "]")
+        if c in "\"'":
+            return self._string(c)
+        if c == "-" or c.isdigit():
+            return self._number()
+        return self._literal()
+
+    def _container(self, out, close: str):
+        self.i += 1
+        try:
+            while True:
+                c = self._peek()
+                if c == close:
+                    self.i += 1
+                    return out
+                if c == ",":
+                    self.i += 1
+                    continue
+                if close == "}":
+                    key = self._key()
+                    if self._peek() != ":":
+                        raise JSONRepairError(f"expected ':' at offset {self.i}")
+                    self.i += 1
+                    val = self.value()
+                    out[key] = val
+                else:
+                    val = self.value()
+                    out.append(val)
+                # a nested container stopped early: unwind without reading further
+                if self.eof:
+                    break
+        except (_EOF, JSONRepairError):
+            pass  # cut off or malformed here: keep what was read so far
+        self.eof = True
+        self.incomplete.add(id(out))
+        return out
+
+    def _key(self) -> str:
+        c = self._peek()
+        if c in "\"'":
+            return self._string(c)
+        m = _BARE_KEY.match(self.s, self.i)
+        if not m:
+            raise JSONRepairError(f"unexpected {c!r} at offset {self.i}")
+        self.i = m.end()
+        return m.group(0)
+
+    def _string(self, quote: str) -> str:
+        self.i += 1
+        buf = []
+        while self.i < self.n:
+            c = self.s[self.i]
+            if c == quote:
+                self.i += 1
+                return "".join(buf)
+            if c == "\\":
+                if self.i + 1 >= self.n:
+                    break
+                esc = self.s[self.i + 1]
+                if esc == "u":
+                    hexdigits = self.s[self.i + 2 : self.i + 6]
+                    if len(hexdigits) < 4:
+                        break
+                    try:
+                        buf.append(chr(int(hexdigits, 16)))
+                    except ValueError:
+                        buf.append(hexdigits)
+                    self.i += 6
+                    continue
+                buf.append(_ESCAPES.get(esc, esc))
+                self.i += 2
+                continue
+            buf.append(c)
+            self.i += 1
+        raise _EOF
+
+    def _number(self) -> Any:
+        m = _NUMBER.match(self.s, self.i)
+        if not m:
+            raise JSONRepairError(f"bad number at offset {self.i}")
+        # a number running into end of input may have lost digits
+        if m.end() >= self.n:
+            raise _EOF
+        self.i = m.end()
+        text = m.group(0)
+        return float(text) if any(ch in text for ch in ".eE") else int(text)
+
+    def _literal(self) -> Any:
+        for word, val in _LITERALS.items():
+            if self.s.startswith(word, self.i):
+                self.i += len(word)
+                return val
+            rest = self.s[self.i :]
+            if rest and word.startswith(rest):
+                raise _EOF
+        raise JSONRepairError(f"unexpected {self.s[self.i]!r} at offset {self.i}")
+
+
+def parse_partial(text: str) -> PartialJSON:
+    """
+    Parse the first JSON object/array in `text`, recovering what is readable
+    up to the end of input or the first unrecoverable syntax error.
+    Raises JSONRepairError if no object or array can be found.
+    """
+    starts = [p for p in (text.find("{"), text.find("[")) if p != -1]
+    if not starts:
+        raise JSONRepairError("no JSON object or array found")
+    parser = _Parser(text)
+    parser.i = min(starts)
+    value = parser.value()
+    return PartialJSON(value, parser.incomplete)
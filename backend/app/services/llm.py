@@ -1,27 +1,33 @@
 # app/services/llm.py
 from __future__ import annotations
 
-import os, json
-from typing import Any, Dict
+import os
+from typing import Any, Dict, Optional
 import httpx
 from fastapi import HTTPException
 
 from .config import settings
+from .json_repair import PartialJSON, parse_partial
 
 OLLAMA_ENDPOINT = settings.OLLAMA_ENDPOINT.rstrip("/")
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3.2:3b")
 
 CLIENT_TIMEOUT = httpx.Timeout(connect=5.0, read=180.0, write=30.0, pool=5.0)
 
-def _post(path: str, payload: Dict[str, Any]) -> httpx.Response:
+def _post(path: str, payload: Dict[str, Any], read_timeout: Optional[float] = None) -> httpx.Response:
     url = f"{OLLAMA_ENDPOINT}{path}"
     # keep generations bounded
     payload.setdefault("options", {})
     payload["options"].setdefault("num_predict", 900)
+    timeout = CLIENT_TIMEOUT
+    if read_timeout is not None:
+        timeout = httpx.Timeout(connect=5.0, read=max(1.0, min(CLIENT_TIMEOUT.read, read_timeout)), write=30.0, pool=5.0)
     try:
-        r = httpx.post(url, json=payload, timeout=CLIENT_TIMEOUT)
+        r = httpx.post(url, json=payload, timeout=timeout)
         r.raise_for_status()
         return r
+    except httpx.TimeoutException as e:
+        raise HTTPException(status_code=504, detail=f"Ollama timed out at {url}: {e}") from e
     except httpx.RequestError as e:
         raise HTTPException(status_code=502, detail=f"Ollama unreachable at {url}: {e}") from e
     except httpx.HTTPStatusError as e:
@@ -44,30 +50,13 @@ def generate_text(prompt: str, temperature: float = 0.2) -> str:
         raise HTTPException(status_code=500, detail="Unexpected Ollama response format (no 'response').")
     return out.strip()
 
-def _extract_json(text: str) -> Dict[str, Any]:
-    """Try strict loads, then extract the first {...} block."""
-    try:
-        return json.loads(text)
-    except json.JSONDecodeError:
-        # remove common wrappers like ```json ... ```
-        cleaned = text.strip()
-        if cleaned.startswith("```"):
-            cleaned = cleaned.strip("`")
-            # possible 'json\n{...}'
-            if cleaned.startswith("json"):
-                cleaned = cleaned[4:].lstrip()
-        # take the first balanced JSON object
-        start = cleaned.find("{")
-        end = cleaned.rfind("}")
-        if start != -1 and end != -1 and end > start:
-            candidate = cleaned[start : end + 1]
-            try:
-                return json.loads(candidate)
-            except json.JSONDecodeError:
-                pass
-        raise
-
-def generate_json(prompt: str, temperature: float = 0.1) -> Dict[str, Any]:
+def _generate_json_text(
+    prompt: str,
+    temperature: float,
+    model: Optional[str] = None,
+    options: Optional[Dict[str, Any]] = None,
+    timeout: Optional[float] = None,
+) -> str:
     """
     Ask the model to return valid JSON. We also request structured output via
     Ollama's 'format': 'json' which enforces JSON-compatible tokens on models
@@ -76,18 +65,34 @@ def generate_json(prompt: str, temperature: float = 0.1) -> Dict[str, Any]:
     resp = _post(
         "/api/generate",
         {
-            "model": OLLAMA_MODEL,
+            "model": model or OLLAMA_MODEL,
             "prompt": prompt,
             "stream": False,
             "format": "json", # <— key change: constrain output to JSON
-            "options": {"temperature": temperature},
+            "options": {**(options or {}), "temperature": temperature},
         },
+        read_timeout=timeout,
     )
     data = resp.json()
-    text = data.get("response", "")
+    return data.get("response", "")
+
+def generate_json_partial(
+    prompt: str,
+    temperature: float = 0.1,
+    model: Optional[str] = None,
+    options: Optional[Dict[str, Any]] = None,
+    timeout: Optional[float] = None,
+) -> PartialJSON:
+    """
+    Generate JSON and keep whatever could be recovered from truncated or
+    slightly malformed output. Check `.complete` / `.is_complete(node)`.
+    `model` and `options` (num_predict, num_ctx, ...) override the defaults;
+    `timeout` caps how long to wait for the response, in seconds.
+    """
+    text = _generate_json_text(prompt, temperature, model, options, timeout)
     try:
-        return _extract_json(text)
-    except Exception as e:
+        return parse_partial(text)
+    except ValueError as e:
         snippet = text[:400]
         raise HTTPException(
             status_code=502,
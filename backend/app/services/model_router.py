@@ -0,0 +1,176 @@
+# app/services/model_router.py
+"""
+Generation budget sizing and small/large model routing for the planner.
+
+Plans are routed by expected item count: short plans go to the small, fast
+model and long ones to the larger model. Each call is recorded per model
+with its latency and item count, and the recent history reorders the
+choice:
+
+* a model whose success rate drops below MIN_SUCCESS_RATE is demoted
+  behind the other one;
+* with a deadline, a model whose median ms/item says it won't finish the
+  plan in the time left is demoted behind one that will.
+
+On timeout or unusable output the call is retried once on the other model,
+unless the deadline has passed.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, TypeVar
+
+from fastapi import HTTPException
+
+from .llm import OLLAMA_MODEL
+
+log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+OLLAMA_MODEL_SMALL = os.getenv("OLLAMA_MODEL_SMALL", OLLAMA_MODEL)
+# defaults to the small model, i.e. routing is a no-op until a large model is configured
+OLLAMA_MODEL_LARGE = os.getenv("OLLAMA_MODEL_LARGE", OLLAMA_MODEL_SMALL)
+LARGE_MODEL_MIN_ITEMS = int(os.getenv("LARGE_MODEL_MIN_ITEMS", "42"))
+
+# rough token costs of the plan JSON (an item with a URL is ~40-50 tokens)
+TOKENS_PER_ITEM = 48
+TOKENS_PER_WEEK = 12
+TOKENS_OVERHEAD = 128
+NUM_PREDICT_MIN = 256
+NUM_PREDICT_MAX = int(os.getenv("OLLAMA_NUM_PREDICT_MAX", "8192"))
+NUM_CTX_MIN = 2048
+NUM_CTX_MAX = int(os.getenv("OLLAMA_NUM_CTX_MAX", "16384"))
+
+STATS_WINDOW = 50
+MIN_SAMPLES = 5
+MIN_SUCCESS_RATE = 0.5
+# errors that justify trying the other model: unreachable/bad output (502), timeout (504)
+FALLBACK_STATUS = (502, 504)
+
+_lock = threading.Lock()
+# model -> recent (ok, latency_ms, items requested)
+_history: Dict[str, Deque[Tuple[bool, float, int]]] = {}
+
+
+def generation_budget(prompt: str, weeks: int, items_per_week: int = 7) -> Dict[str, int]:
+    """Ollama options sized for `weeks` weeks of `items_per_week` items."""
+    num_predict = TOKENS_OVERHEAD + weeks * (TOKENS_PER_WEEK + items_per_week * TOKENS_PER_ITEM)
+    num_predict = max(NUM_PREDICT_MIN, min(NUM_PREDICT_MAX, num_predict))
+    # ~4 characters per token is close enough for English prompts
+    needed = len(prompt) // 4 + num_predict
+    num_ctx = NUM_CTX_MIN
+    while num_ctx < needed and num_ctx < NUM_CTX_MAX:
+        num_ctx *= 2
+    return {"num_predict": num_predict, "num_ctx": num_ctx}
+
+
+def record(model: str, ok: bool, latency_ms: float, items: int = 0) -> None:
+    with _lock:
+        _history.setdefault(model, deque(maxlen=STATS_WINDOW)).append((ok, latency_ms, items))
+
+
+def _success_rate(model: str) -> Tuple[float, int]:
+    with _lock:
+        h = list(_history.get(model, ()))
+    if not h:
+        return 1.0, 0
+    return sum(1 for ok, _, _ in h if ok) / len(h), len(h)
+
+
+def _ms_per_item(model: str) -> Optional[float]:
+    """Median latency per requested item of recent successful calls, None until MIN_SAMPLES."""
+    with _lock:
+        rates = sorted(ms / items for ok, ms, items in _history.get(model, ()) if ok and items > 0)
+    if len(rates) < MIN_SAMPLES:
+        return None
+    return rates[len(rates) // 2]
+
+
+def estimate_ms(model: str, expected_items: int) -> Optional[float]:
+    rate = _ms_per_item(model)
+    return None if rate is None else rate * expected_items
+
+
+def route(expected_items: int, time_left: Optional[float] = None) -> List[str]:
+    """
+    Models to try, in order. Always at most two, never the same model twice.
+    `time_left` (seconds) lets recorded latency move a model that is expected
+    to miss the deadline behind one that is expected to make it.
+    """
+    if expected_items >= LARGE_MODEL_MIN_ITEMS:
+        order = [OLLAMA_MODEL_LARGE, OLLAMA_MODEL_SMALL]
+    else:
+        order = [OLLAMA_MODEL_SMALL, OLLAMA_MODEL_LARGE]
+    if order[0] == order[1]:
+        return order[:1]
+
+    rate, n = _success_rate(order[0])
+    other_rate, _ = _success_rate(order[1])
+    if n >= MIN_SAMPLES and rate < MIN_SUCCESS_RATE and other_rate > rate:
+        return order[::-1]
+
+    if time_left is not None:
+        first, second = (estimate_ms(m, expected_items) for m in order)
+        budget_ms = time_left * 1000
+        if first is not None and first > budget_ms and (second is None or second <= budget_ms):
+            order.reverse()
+    return order
+
+
+def call_with_fallback(
+    models: List[str],
+    fn: Callable[[str], T],
+    items: int = 0,
+    deadline: Optional[float] = None,
+) -> T:
+    """
+    Run fn(model) on the first model; on a 502/504 retry on the next one,
+    unless `deadline` (time.monotonic()) has passed. Every attempt is
+    recorded for routing, with the `items` it was asked for.
+    """
+    for i, model in enumerate(models):
+        started = time.perf_counter()
+        try:
+            out = fn(model)
+        except HTTPException as e:
+            record(model, False, (time.perf_counter() - started) * 1000, items)
+            if e.status_code not in FALLBACK_STATUS or i == len(models) - 1:
+                raise
+            if deadline is not None and time.monotonic() >= deadline:
+                log.warning("model %s failed (%s), no time left to fall back", model, e.status_code)
+                raise
+            log.warning("model %s failed (%s), falling back to %s", model, e.status_code, models[i + 1])
+            continue
+        record(model, True, (time.perf_counter() - started) * 1000, items)
+        return out
+    raise HTTPException(status_code=502, detail="No LLM model configured.")
+
+
+def model_stats() -> Dict[str, Any]:
+    """Per-model success rate and latency (what route() uses) over the last STATS_WINDOW calls."""
+    with _lock:
+        snapshot = {m: list(h) for m, h in _history.items()}
+    out: Dict[str, Any] = {}
+    for model, h in snapshot.items():
+        latencies = sorted(ms for _, ms, _ in h)
+        ok = [ms for good, ms, _ in h if good]
+        per_item = _ms_per_item(model)
+        out[model] = {
+            "calls": len(h),
+            "ms_per_item_p50": round(per_item, 1) if per_item is not None else None,
+            "success_rate": round(len(ok) / len(h), 4),
+            "avg_ms": round(sum(latencies) / len(latencies), 1),
+            "p50_ms": round(latencies[len(latencies) // 2], 1),
+            "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 1),
+        }
+    return {
+        "small_model": OLLAMA_MODEL_SMALL,
+        "large_model": OLLAMA_MODEL_LARGE,
+        "large_model_min_items": LARGE_MODEL_MIN_ITEMS,
+        "models": out,
+    }
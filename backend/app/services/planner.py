@@ -1,11 +1,31 @@
 # app/services/planner.py
 from __future__ import annotations
 
-from typing import Any, Dict, List
+import logging
+import os
+import time
+from typing import Any, Dict, List, Tuple
+from fastapi import HTTPException
 from sqlalchemy.orm import Session
 
 from .. import models
-from .llm import generate_json
+from .json_repair import PartialJSON
+from .llm import generate_json_partial
+from .model_router import call_with_fallback, generation_budget, route
+
+log = logging.getLogger(__name__)
+
+# extra generations allowed to fill in weeks lost to truncation
+MAX_CONTINUATIONS = 2
+# upper bound of the "5–7 items" rule, used to size generation budgets
+ITEMS_PER_WEEK = 7
+# how many already-planned titles to show the model when continuing
+CONTINUATION_CONTEXT_TITLES = 40
+# total time for one plan, fallbacks and continuations included; stays under
+# the frontend's 120s request timeout so nobody gets a plan they never see
+PLAN_TIME_BUDGET_SECONDS = float(os.getenv("PLAN_TIME_BUDGET_SECONDS", "100"))
+# don't start a continuation with less time than this left
+MIN_CONTINUATION_SECONDS = 15.0
 
 
 STRICT_JSON_INSTR = """You are a planner bot.
@@ -32,6 +52,29 @@ Rules:
 - Output must be compact JSON (no comments or trailing text)
 """
 
+CONTINUE_JSON_INSTR = """You are a planner bot continuing a learning plan that is partly written.
+Return ONLY a single valid JSON object. No prose, no markdown, no backticks, no code fences.
+
+Schema:
+{
+  "weeks": [
+    {
+      "week": 1,
+      "items": [
+        { "day": 1, "title": "string", "url": "string", "minutes": 60, "skill": "string" }
+      ]
+    }
+  ]
+}
+Rules:
+- weeks contains ONLY these week numbers: {missing_weeks}
+- Each week must have 5–7 items
+- minutes is an integer
+- Provide realistic free URLs
+- Do not repeat topics that are already planned
+- Output must be compact JSON (no comments or trailing text)
+"""
+
 def _prompt(goal: str, current_skills: List[str], duration_weeks: int) -> str:
     return (
         STRICT_JSON_INSTR
@@ -42,17 +85,133 @@ def _prompt(goal: str, current_skills: List[str], duration_weeks: int) -> str:
     )
 
 
+def _continuation_prompt(
+    goal: str,
+    current_skills: List[str],
+    duration_weeks: int,
+    have: Dict[int, Dict[str, Any]],
+    missing: List[int],
+) -> str:
+    titles = [str(it.get("title")) for n in sorted(have) for it in have[n]["items"]]
+    return (
+        CONTINUE_JSON_INSTR.replace("{missing_weeks}", ", ".join(str(n) for n in missing))
+        + "\n\n"
+        + f'Goal: "{goal}"\n'
+        + f"Current skills: {', '.join(current_skills) if current_skills else 'none'}\n"
+        + f"Duration weeks: {duration_weeks}\n"
+        + f"Already planned: {'; '.join(titles[:CONTINUATION_CONTEXT_TITLES]) or 'nothing'}\n"
+    )
+
+
+def _salvage_weeks(result: PartialJSON, duration_weeks: int) -> Dict[int, Dict[str, Any]]:
+    """Keep every fully generated week (and its items) from possibly truncated output."""
+    root = result.value if isinstance(result.value, dict) else {}
+    weeks = root.get("weeks")
+    out: Dict[int, Dict[str, Any]] = {}
+    if not isinstance(weeks, list):
+        return out
+    for w in weeks:
+        if not isinstance(w, dict) or not result.is_complete(w):
+            continue
+        try:
+            week_no = int(w.get("week") or 0)
+        except (TypeError, ValueError):
+            continue
+        if not 1 <= week_no <= duration_weeks or week_no in out:
+            continue
+        items = [
+            it for it in (w.get("items") or [])
+            if isinstance(it, dict) and result.is_complete(it) and it.get("title")
+        ]
+        if items:
+            out[week_no] = {"week": week_no, "items": items}
+    return out
+
+
+def _generate_weeks(
+    prompt: str, duration_weeks: int, n_weeks: int, deadline: float
+) -> Tuple[PartialJSON, Dict[int, Dict[str, Any]]]:
+    """
+    One routed generation sized for `n_weeks` weeks. Output without a single
+    usable week counts as a failure, so the other model gets a chance if
+    there is time left before `deadline` (time.monotonic()).
+    """
+    budget = generation_budget(prompt, n_weeks, ITEMS_PER_WEEK)
+    items = n_weeks * ITEMS_PER_WEEK
+
+    def attempt(model: str) -> Tuple[PartialJSON, Dict[int, Dict[str, Any]]]:
+        time_left = deadline - time.monotonic()
+        if time_left <= 0:
+            raise HTTPException(status_code=504, detail="Plan generation ran out of time.")
+        result = generate_json_partial(prompt, temperature=0.2, model=model, options=budget, timeout=time_left)
+        weeks = _salvage_weeks(result, duration_weeks)
+        if not weeks:
+            raise HTTPException(status_code=502, detail="Model output did not contain a complete week.")
+        return result, weeks
+
+    models = route(items, time_left=deadline - time.monotonic())
+    return call_with_fallback(models, attempt, items=items, deadline=deadline)
+
+
 def plan_with_ollama(goal: str, current_skills: List[str], duration_weeks: int) -> Dict[str, Any]:
     prompt = _prompt(goal, current_skills, duration_weeks).replace(
         "{duration_weeks}", str(duration_weeks)
     )
-    # Expecting STRICT JSON back
-    return generate_json(prompt, temperature=0.2)
+    deadline = time.monotonic() + PLAN_TIME_BUDGET_SECONDS
+    result, have = _generate_weeks(prompt, duration_weeks, duration_weeks, deadline)
+    root = result.value if isinstance(result.value, dict) else {}
+    missing = [n for n in range(1, duration_weeks + 1) if n not in have]
+
+    # Truncated or short output: ask only for the weeks we don't have yet.
+    for _ in range(MAX_CONTINUATIONS):
+        if not missing:
+            break
+        if deadline - time.monotonic() < MIN_CONTINUATION_SECONDS:
+            log.info("plan continuation skipped: time budget spent")
+            break
+        log.info("plan continuation: %d/%d weeks missing", len(missing), duration_weeks)
+        prompt = _continuation_prompt(goal, current_skills, duration_weeks, have, missing)
+        try:
+            _, more = _generate_weeks(prompt, duration_weeks, len(missing), deadline)
+        except HTTPException:
+            break
+        got = {n: w for n, w in more.items() if n in missing}
+        if not got:
+            break
+        have.update(got)
+        missing = [n for n in missing if n not in got]
+
+    if missing:
+        log.warning("plan incomplete after continuations, missing weeks %s", missing)
+    # complete or not, only the salvaged weeks (in range, deduplicated, titled) are returned
+    return {
+        "summary": str(root.get("summary") or ""),
+        "weeks": [have[n] for n in sorted(have)],
+    }
+
+
+def build_plan(
+    goal: str, current_skills: List[str], duration_weeks: int, use_templates: bool = True
+) -> Dict[str, Any]:
+    """
+    Single entry point the router calls. Tries the template library first and
+    only falls back to the LLM on a miss; fresh LLM plans are stored as templates.
+    The returned dict carries "source": "template" | "llm".
+    """
+    from . import templates  # the template library needs chroma + the embedder
 
+    started = time.perf_counter()
+    if use_templates:
+        reused = templates.lookup(goal, current_skills, duration_weeks)
+        if reused is not None:
+            templates.record_reuse((time.perf_counter() - started) * 1000)
+            return {**reused, "source": "template"}
 
-def build_plan(goal: str, current_skills: List[str], duration_weeks: int) -> Dict[str, Any]:
-    # Keep a single entry point the router can call
-    return plan_with_ollama(goal, current_skills, duration_weeks)
+    plan_json = plan_with_ollama(goal, current_skills, duration_weeks)
+    templates.record_generation((time.perf_counter() - started) * 1000)
+    if use_templates:
+        templates.remember(goal, current_skills, duration_weeks, plan_json)
+    return {**plan_json, "source": "llm"}
 
 
 def persist_plan(db: Session, user: models.User, plan_json: Dict[str, Any]) -> models.Plan:
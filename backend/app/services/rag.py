@@ -1,7 +1,7 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Optional, Tuple
 from ..models import Resource
-from .chroma_client import get_collection
 from .embeddings import embed_texts
+from .vector_store import get_store
 
 def _resource_doc(r: Resource) -> str:
     parts = [
@@ -12,14 +12,15 @@ def _resource_doc(r: Resource) -> str:
     ]
     return " | ".join([p for p in parts if p])
 
-def index_resources(resources: List[Resource]) -> int:
+def index_resources(resources: List[Resource], embeddings: Optional[List[List[float]]] = None) -> int:
+    """Upsert resources into the index; pass `embeddings` to skip re-embedding."""
     if not resources:
         return 0
     docs = [_resource_doc(r) for r in resources]
-    embeds = embed_texts(docs)
-    ids = [r.id for r in resources]
+    embeds = embeddings if embeddings is not None else embed_texts(docs)
+    ids = [str(r.id) for r in resources]  # the index keys on the text form
     metadatas = [{
-        "resource_id": r.id,
+        "resource_id": str(r.id),
         "url": r.url,
         "source": r.source,
         "tags": r.tags,
@@ -28,22 +29,17 @@ def index_resources(resources: List[Resource]) -> int:
         "duration_min": r.duration_min,
         "title": r.title,
     } for r in resources]
-    col = get_collection()
-    col.upsert(documents=docs, embeddings=embeds, ids=ids, metadatas=metadatas)
+    get_store().upsert(ids, embeds, docs, metadatas)
     return len(resources)
 
-def query_by_skills(skills: List[str], k: int = 5) -> List[Dict[str, Any]]:
+def query_by_skills(skills: List[str], k: int = 5, where: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """Top-k resources for the skills; `where` filters on metadata equality, e.g. {"level": "beginner"}."""
     if not skills:
         return []
     queries = [", ".join(skills)]
     embeds = embed_texts(queries)
-    col = get_collection()
-    out = col.query(query_embeddings=embeds, n_results=k)
     results = []
-    for i in range(len(out.get("ids", [[]])[0])):
-        rid = out["ids"][0][i]
-        meta = out["metadatas"][0][i]
-        dist = out["distances"][0][i] if "distances" in out else None
+    for rid, score, meta in get_store().query(embeds, k, where=where)[0]:
         results.append({
             "id": rid,
             "title": meta.get("title"),
@@ -52,6 +48,20 @@ def query_by_skills(skills: List[str], k: int = 5) -> List[Dict[str, Any]]:
             "tags": meta.get("tags"),
             "level": meta.get("level"),
             "duration_min": meta.get("duration_min"),
-            "score": 1 - dist if dist is not None else None  # cosine sim approx
+            "score": score  # cosine similarity (approximate with chroma)
         })
     return results
+
+def nearest(embeddings: List[List[float]], k: int = 1) -> List[List[Tuple[str, float]]]:
+    """(resource id, cosine similarity) of the k nearest indexed resources per embedding."""
+    if not embeddings:
+        return []
+    return [[(rid, score) for rid, score, _ in hits] for hits in get_store().query(embeddings, k)]
+
+def prune_index(keep_ids: Iterable[Any]) -> int:
+    """Delete indexed entries whose id is not in `keep_ids`. Returns how many were removed."""
+    store = get_store()
+    keep = {str(i) for i in keep_ids}
+    stale = [rid for rid in store.ids() if rid not in keep]
+    store.delete(stale)
+    return len(stale)
@@ -0,0 +1,148 @@
+# app/services/recommendations.py
+"""
+Precomputed resource recommendations per plan item.
+
+For a set of plans, every distinct required_skill (the item title when the
+skill is empty) is embedded once and queried against the vector store in a
+single batched call. The top-k resource ids per item are stored in
+plan_recommendations, replacing the plan's previous rows, and the plan's
+recommendations_computed_at is set. Refreshes run as background tasks after
+a plan is created, after /resources/reindex_all, and on the first read of a
+plan that was never computed. Embedding holds an "embed" admission slot.
+A per-plan refresh only takes a free one: when all are busy it gives up and
+the plan stays pending, to be retried on its next read. The refresh after a
+reindex waits up to REFRESH_ADMISSION_WAIT seconds for each batch.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import uuid
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+from fastapi import HTTPException
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from ..db import SessionLocal
+from ..models import Plan, PlanItem, PlanRecommendation, Resource
+from ..ratelimit import admission
+from .embeddings import embed_texts
+from .vector_store import get_store
+
+RECOMMENDATIONS_K = int(os.getenv("PLAN_RECOMMENDATIONS_K", "5"))
+PLANS_PER_BATCH = 200
+# the reindex refresh queues behind request traffic instead of failing fast
+REFRESH_ADMISSION_WAIT = 300.0
+
+log = logging.getLogger(__name__)
+
+# plans with a refresh_plan_job running in this process
+_refreshing: Set[str] = set()
+_refreshing_lock = threading.Lock()
+
+
+def _as_uuid(rid: str) -> Optional[uuid.UUID]:
+    try:
+        return uuid.UUID(rid)
+    except ValueError:
+        return None
+
+
+def _query_text(item) -> str:
+    return (item.required_skill or "").strip().lower() or (item.title or "").strip()
+
+
+def refresh_plans(
+    db: Session, plan_ids: Sequence[Any], k: int = RECOMMENDATIONS_K, wait: float = REFRESH_ADMISSION_WAIT
+) -> int:
+    """
+    Recompute recommendations for `plan_ids`. Returns the number of rows written.
+    Raises the admission 503 if no embed slot frees up within `wait` seconds.
+    """
+    items = db.execute(
+        select(PlanItem.id, PlanItem.plan_id, PlanItem.required_skill, PlanItem.title)
+        .where(PlanItem.plan_id.in_(plan_ids))
+    ).all()
+    by_text: Dict[str, List[Any]] = {}
+    for it in items:
+        text = _query_text(it)
+        if text:
+            by_text.setdefault(text, []).append(it)
+
+    rows: List[Dict[str, Any]] = []
+    if by_text:
+        texts = list(by_text)
+        with admission("embed", wait=wait):
+            hits = get_store().query(embed_texts(texts), k)
+        candidates = {_as_uuid(rid) for per_text in hits for rid, _, _ in per_text} - {None}
+        # the index can briefly lag behind deletes; only keep ids that still exist
+        known = set(db.execute(
+            select(Resource.id).where(Resource.id.in_(candidates))
+        ).scalars()) if candidates else set()
+        for text, per_text in zip(texts, hits):
+            ranked = [(_as_uuid(rid), score) for rid, score, _ in per_text if _as_uuid(rid) in known]
+            for it in by_text[text]:
+                rows.extend(
+                    {"plan_id": it.plan_id, "item_id": it.id, "rank": rank,
+                     "resource_id": rid, "score": float(score)}
+                    for rank, (rid, score) in enumerate(ranked, start=1)
+                )
+
+    db.execute(delete(PlanRecommendation).where(PlanRecommendation.plan_id.in_(plan_ids)))
+    if rows:
+        db.execute(insert(PlanRecommendation), rows)
+    db.execute(
+        update(Plan).where(Plan.id.in_(plan_ids))
+        .values(recommendations_computed_at=func.now())
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return len(rows)
+
+
+def refresh_plan_job(plan_id: Any) -> None:
+    """
+    Background task: recommendations for one plan (skipped if one is already
+    running). It runs on a threadpool thread, so it never waits for an embed
+    slot; a busy server leaves the plan pending until its next read.
+    """
+    key = str(plan_id)
+    with _refreshing_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+    db = SessionLocal()
+    try:
+        refresh_plans(db, [plan_id], wait=0)
+    except HTTPException as e:
+        if e.status_code != 503:
+            log.exception("recommendation refresh failed for plan %s", plan_id)
+        else:
+            log.info("recommendation refresh for plan %s deferred: embed slots busy", plan_id)
+    except Exception:
+        log.exception("recommendation refresh failed for plan %s", plan_id)
+    finally:
+        db.close()
+        with _refreshing_lock:
+            _refreshing.discard(key)
+
+
+def refresh_all_job() -> None:
+    """Background task after a reindex: every active plan, PLANS_PER_BATCH at a time."""
+    db = SessionLocal()
+    try:
+        plan_ids = db.execute(select(Plan.id).where(Plan.status == "active")).scalars().all()
+        written = 0
+        for start in range(0, len(plan_ids), PLANS_PER_BATCH):
+            try:
+                written += refresh_plans(db, plan_ids[start : start + PLANS_PER_BATCH])
+            except Exception:  # e.g. a plan deleted mid-refresh; keep going with the rest
+                db.rollback()
+                log.exception("recommendation refresh failed for plans %d..%d", start, start + PLANS_PER_BATCH)
+        log.info("recommendations refreshed for %d plans (%d rows)", len(plan_ids), written)
+    except Exception:
+        log.exception("recommendation refresh after reindex failed")
+    finally:
+        db.close()
@@ -0,0 +1,79 @@
+# app/services/singleflight.py
+"""
+Single-flight call deduplication.
+
+Concurrent callers using the same key share one execution of the function:
+the first caller runs it, the others block until it finishes and get the same
+result (or exception). With `ttl` > 0 successful results are also replayed to
+callers arriving within `ttl` seconds after completion (idempotency keys).
+
+State is per process; identical requests hitting different workers are not
+coalesced.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Dict, Generic, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call(Generic[T]):
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[T] = None
+        self.error: Optional[BaseException] = None
+        self.finished_at: Optional[float] = None
+
+
+class SingleFlight(Generic[T]):
+    def __init__(self, ttl: float = 0.0):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call[T]] = {}
+
+    def _evict_expired(self, now: float) -> None:
+        expired = [
+            k for k, c in self._calls.items()
+            if c.finished_at is not None and now - c.finished_at > self.ttl
+        ]
+        for k in expired:
+            del self._calls[k]
+
+    def do(self, key: str, fn: Callable[[], T]) -> Tuple[T, bool]:
+        """Run fn() once per key. Returns (result, shared) where shared means another call produced it."""
+        with self._lock:
+            self._evict_expired(time.monotonic())
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            call.finished_at = time.monotonic()
+            with self._lock:
+                if self.ttl <= 0 or call.error is not None:
+                    self._calls.pop(key, None)
+            call.done.set()
+        return call.result, False
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return sum(1 for c in self._calls.values() if c.finished_at is None)
+
+
+def request_key(*parts: Any) -> str:
+    return "|".join(str(p) for p in parts)
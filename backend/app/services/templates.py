@@ -0,0 +1,196 @@
+# app/services/templates.py
+"""
+Plan template library.
+
+Successful LLM plans are embedded by (goal, skills, duration) into their own
+Chroma collection. A new request that lands close enough to a stored template
+is served by adapting that template instead of calling Ollama.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from .chroma_client import get_collection
+from .embeddings import embed_texts
+
+log = logging.getLogger(__name__)
+
+TEMPLATE_COLLECTION = os.getenv("TEMPLATE_COLLECTION", "plan_templates")
+TEMPLATE_MIN_SIMILARITY = float(os.getenv("TEMPLATE_MIN_SIMILARITY", "0.92"))
+TEMPLATE_MIN_ITEMS_PER_WEEK = 3
+TEMPLATE_MAX_ITEMS_PER_WEEK = 7  # one item per day, as the planner prompt asks
+# only rescale templates whose length is within [weeks / 2, weeks * 2]
+TEMPLATE_MAX_STRETCH = 2.0
+
+# counters are per worker process; stats carry the pid so they aren't read as totals
+_started_at = time.time()
+_lock = threading.Lock()
+_stats: Dict[str, float] = {
+    "lookups": 0,
+    "hits": 0,
+    "llm_calls": 0,
+    "llm_ms_total": 0.0,
+    "reuse_ms_total": 0.0,
+    "saved": 0,
+}
+
+
+def _norm_skills(skills: List[str]) -> List[str]:
+    return sorted({s.strip().lower() for s in skills if s and s.strip()})
+
+
+def _template_text(goal: str, skills: List[str], weeks: int) -> str:
+    return f"goal: {goal.strip()} | skills: {', '.join(skills) or 'none'} | weeks: {weeks}"
+
+
+def _template_id(goal: str, skills: List[str], weeks: int) -> str:
+    key = f"{goal.strip().lower()}|{','.join(skills)}|{weeks}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def _flat_items(plan_json: Dict[str, Any]) -> List[Dict[str, Any]]:
+    weeks = sorted(plan_json.get("weeks") or [], key=lambda w: int(w.get("week") or 0))
+    out: List[Dict[str, Any]] = []
+    for w in weeks:
+        items = sorted(w.get("items") or [], key=lambda it: int(it.get("day") or 0))
+        out.extend(it for it in items if isinstance(it, dict))
+    return out
+
+
+def is_complete_plan(plan_json: Dict[str, Any], duration_weeks: int) -> bool:
+    """A plan is worth keeping as a template only if every week has items."""
+    weeks = plan_json.get("weeks") or []
+    if len(weeks) != duration_weeks:
+        return False
+    return all(isinstance(w, dict) and w.get("items") for w in weeks)
+
+
+def adapt_template(
+    plan_json: Dict[str, Any], current_skills: List[str], duration_weeks: int
+) -> Optional[Dict[str, Any]]:
+    """
+    Drop items for skills the user already has and spread the remaining items
+    evenly over `duration_weeks`. When a longer template is compressed, the
+    items are sampled evenly along the curriculum so no week gets more than
+    TEMPLATE_MAX_ITEMS_PER_WEEK (days stay within 1..7). Returns None when too
+    little is left to fill the requested duration.
+    """
+    known = set(_norm_skills(current_skills))
+    items = _flat_items(plan_json)
+    kept = [it for it in items if str(it.get("skill") or "").strip().lower() not in known]
+    if len(kept) < duration_weeks * TEMPLATE_MIN_ITEMS_PER_WEEK:
+        return None
+    limit = duration_weeks * TEMPLATE_MAX_ITEMS_PER_WEEK
+    if len(kept) > limit:
+        kept = [kept[j * len(kept) // limit] for j in range(limit)]
+
+    weeks: List[Dict[str, Any]] = [{"week": w + 1, "items": []} for w in range(duration_weeks)]
+    n = len(kept)
+    for i, it in enumerate(kept):
+        bucket = weeks[i * duration_weeks // n]["items"]
+        bucket.append({**it, "day": len(bucket) + 1})
+    return {"summary": plan_json.get("summary") or "", "weeks": weeks}
+
+
+def find_template(
+    goal: str, current_skills: List[str], duration_weeks: int
+) -> Optional[Dict[str, Any]]:
+    """Return the adapted best-matching template, or None on a miss."""
+    skills = _norm_skills(current_skills)
+    lo = max(1, int(duration_weeks / TEMPLATE_MAX_STRETCH))
+    hi = int(duration_weeks * TEMPLATE_MAX_STRETCH)
+    col = get_collection(TEMPLATE_COLLECTION)
+    if col.count() == 0:
+        return None
+    out = col.query(
+        query_embeddings=embed_texts([_template_text(goal, skills, duration_weeks)]),
+        n_results=3,
+        where={"$and": [{"weeks": {"$gte": lo}}, {"weeks": {"$lte": hi}}]},
+    )
+    ids = out.get("ids", [[]])[0]
+    for i in range(len(ids)):
+        similarity = 1 - out["distances"][0][i]
+        if similarity < TEMPLATE_MIN_SIMILARITY:
+            break
+        template = json.loads(out["documents"][0][i])
+        adapted = adapt_template(template, skills, duration_weeks)
+        if adapted is not None:
+            return adapted
+    return None
+
+
+def save_template(
+    goal: str, current_skills: List[str], duration_weeks: int, plan_json: Dict[str, Any]
+) -> None:
+    skills = _norm_skills(current_skills)
+    template = {"summary": plan_json.get("summary") or "", "weeks": plan_json.get("weeks") or []}
+    col = get_collection(TEMPLATE_COLLECTION)
+    col.upsert(
+        ids=[_template_id(goal, skills, duration_weeks)],
+        embeddings=embed_texts([_template_text(goal, skills, duration_weeks)]),
+        documents=[json.dumps(template, separators=(",", ":"))],
+        metadatas=[{"goal": goal.strip(), "skills": ",".join(skills), "weeks": duration_weeks}],
+    )
+    with _lock:
+        _stats["saved"] += 1
+
+
+def lookup(goal: str, current_skills: List[str], duration_weeks: int) -> Optional[Dict[str, Any]]:
+    """find_template() that never fails the request: errors count as a miss."""
+    with _lock:
+        _stats["lookups"] += 1
+    try:
+        return find_template(goal, current_skills, duration_weeks)
+    except Exception:
+        log.exception("plan template lookup failed")
+        return None
+
+
+def remember(goal: str, current_skills: List[str], duration_weeks: int, plan_json: Dict[str, Any]) -> None:
+    if not is_complete_plan(plan_json, duration_weeks):
+        return
+    try:
+        save_template(goal, current_skills, duration_weeks, plan_json)
+    except Exception:
+        log.exception("saving plan template failed")
+
+
+def record_reuse(elapsed_ms: float) -> None:
+    with _lock:
+        _stats["hits"] += 1
+        _stats["reuse_ms_total"] += elapsed_ms
+
+
+def record_generation(elapsed_ms: float) -> None:
+    with _lock:
+        _stats["llm_calls"] += 1
+        _stats["llm_ms_total"] += elapsed_ms
+
+
+def template_stats() -> Dict[str, Any]:
+    """Reuse rate and an estimate of LLM latency saved by this worker since it started."""
+    with _lock:
+        s = dict(_stats)
+    avg_llm = s["llm_ms_total"] / s["llm_calls"] if s["llm_calls"] else None
+    avg_reuse = s["reuse_ms_total"] / s["hits"] if s["hits"] else None
+    saved_ms = None
+    if avg_llm is not None:
+        saved_ms = round(s["hits"] * (avg_llm - (avg_reuse or 0.0)), 1)
+    return {
+        "lookups": int(s["lookups"]),
+        "hits": int(s["hits"]),
+        "reuse_rate": round(s["hits"] / s["lookups"], 4) if s["lookups"] else 0.0,
+        "llm_calls": int(s["llm_calls"]),
+        "templates_saved": int(s["saved"]),
+        "avg_llm_ms": round(avg_llm, 1) if avg_llm is not None else None,
+        "avg_reuse_ms": round(avg_reuse, 1) if avg_reuse is not None else None,
+        "est_latency_saved_ms": saved_ms,
+        "worker_pid": os.getpid(),
+        "since": round(_started_at),
+    }
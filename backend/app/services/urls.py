@@ -0,0 +1,44 @@
+# app/services/urls.py
+from __future__ import annotations
+
+import re
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+# query parameters that never change what a URL points to
+TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "ref", "ref_src", "si", "feature"}
+DEFAULT_PORTS = {80, 443}
+
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical key for a resource URL: scheme-less, lower-case host without
+    "www.", default ports and fragment dropped, tracking parameters removed,
+    remaining query parameters sorted, no trailing slash.
+
+    >>> normalize_url("HTTPS://www.YouTube.com/watch?v=abc&utm_source=x#t=10")
+    'youtube.com/watch?v=abc'
+    """
+    raw = url.strip()
+    if "://" not in raw:
+        raw = "https://" + raw
+    parts = urlsplit(raw)
+
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    if port and port not in DEFAULT_PORTS:
+        host = f"{host}:{port}"
+
+    path = re.sub(r"/{2,}", "/", parts.path).rstrip("/")
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in TRACKING_PARAMS and not k.lower().startswith("utm_")
+    )
+    key = host + path
+    if query:
+        key += "?" + urlencode(query)
+    return key
@@ -0,0 +1,373 @@
+# app/services/vector_store.py
+"""
+Vector store backends behind services/rag.py.
+
+    VECTOR_BACKEND=chroma   Chroma persistent collection, HNSW (default)
+    VECTOR_BACKEND=numpy    exact search over a memory-mapped float32 matrix
+
+The numpy backend keeps one normalized row per resource, so a query is a
+single matmul plus argpartition: exact top-k, no index to build. Metadata
+filters become boolean row masks, cached per (field, value). It is meant for
+catalogs up to a few hundred thousand rows.
+
+Its directory uses the index_admin snapshot layout (manifest.json,
+embeddings.npy, records.jsonl). A snapshot can be served directly by
+copying it to NUMPY_INDEX_DIR/<collection>, and a numpy index can be
+restored into Chroma with `index_admin restore`. embeddings.npy is
+allocated with spare rows. Only the first manifest["count"] rows and
+records are live.
+"""
+from __future__ import annotations
+
+import abc
+import datetime as dt
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process writes only
+    fcntl = None
+
+from .chroma_client import CHROMA_DIR, COLLECTION, get_collection
+
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma").lower()
+NUMPY_INDEX_DIR = os.getenv("NUMPY_INDEX_DIR", os.path.join(CHROMA_DIR, "numpy"))
+QUERY_BATCH = 256  # queries per matmul; bounds the (queries x rows) score matrix
+SUBSET_FRACTION = 0.1  # filters matching fewer rows than this are scored on a copy of just those rows
+
+SNAPSHOT_FORMAT = 1
+MANIFEST = "manifest.json"
+EMBEDDINGS = "embeddings.npy"
+RECORDS = "records.jsonl"
+
+# (id, cosine similarity, metadata)
+Hit = Tuple[str, float, Dict[str, Any]]
+
+
+def read_index_dir(path: str) -> Tuple[Dict[str, Any], np.ndarray, List[Dict[str, Any]]]:
+    """(manifest, memory-mapped live rows, records) of a snapshot / numpy index directory."""
+    with open(os.path.join(path, MANIFEST), encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != SNAPSHOT_FORMAT:
+        raise ValueError(f"unsupported snapshot format {manifest.get('format')!r}")
+    count = manifest["count"]
+    matrix = np.load(os.path.join(path, manifest["files"]["embeddings"]), mmap_mode="r")
+    records = []
+    with open(os.path.join(path, manifest["files"]["records"]), encoding="utf-8") as f:
+        for line in f:
+            if len(records) == count:
+                break  # appended by a writer that hasn't committed its manifest yet
+            if line.strip():
+                records.append(json.loads(line))
+    if len(records) != count or matrix.shape[0] < count:
+        raise ValueError(f"snapshot is inconsistent: {len(records)} records, {matrix.shape[0]} vectors, count {count}")
+    return manifest, matrix[:count], records
+
+
+def _normalize(vecs: Any) -> np.ndarray:
+    arr = np.atleast_2d(np.asarray(vecs, dtype=np.float32))
+    return arr / np.maximum(np.linalg.norm(arr, axis=1, keepdims=True), 1e-12)
+
+
+class VectorStore(abc.ABC):
+    """Minimal interface used by services/rag.py."""
+
+    @abc.abstractmethod
+    def upsert(self, ids: Sequence[str], embeddings: Any, documents: Sequence[str], metadatas: Sequence[Dict[str, Any]]) -> None:
+        ...
+
+    @abc.abstractmethod
+    def query(self, embeddings: Any, k: int, where: Optional[Dict[str, Any]] = None) -> List[List[Hit]]:
+        """Top-k hits per query embedding, best first. `where` is {field: value} equality, ANDed."""
+
+    @abc.abstractmethod
+    def ids(self) -> List[str]:
+        ...
+
+    @abc.abstractmethod
+    def delete(self, ids: Sequence[str]) -> None:
+        ...
+
+    @abc.abstractmethod
+    def count(self) -> int:
+        ...
+
+
+class ChromaStore(VectorStore):
+    def __init__(self, name: str = COLLECTION, client=None):
+        self.name = name
+        self.client = client
+
+    @property
+    def col(self):
+        # looked up per call so an index_admin restore is picked up
+        return get_collection(self.name, self.client)
+
+    def upsert(self, ids, embeddings, documents, metadatas) -> None:
+        emb = embeddings.tolist() if isinstance(embeddings, np.ndarray) else embeddings
+        self.col.upsert(ids=list(ids), embeddings=emb, documents=list(documents), metadatas=list(metadatas))
+
+    def query(self, embeddings, k, where=None) -> List[List[Hit]]:
+        col = self.col
+        emb = embeddings.tolist() if isinstance(embeddings, np.ndarray) else embeddings
+        if not len(emb) or col.count() == 0:
+            return [[] for _ in emb]
+        if where and len(where) > 1:
+            where = {"$and": [{f: v} for f, v in where.items()]}
+        out = col.query(query_embeddings=emb, n_results=k, where=where or None, include=["metadatas", "distances"])
+        return [
+            [(rid, 1 - dist, meta or {}) for rid, dist, meta in zip(ids, dists, metas)]
+            for ids, dists, metas in zip(out["ids"], out["distances"], out["metadatas"])
+        ]
+
+    def ids(self) -> List[str]:
+        return self.col.get(include=[])["ids"]
+
+    def delete(self, ids) -> None:
+        ids = list(ids)
+        col = self.col
+        for start in range(0, len(ids), 1000):
+            col.delete(ids=ids[start : start + 1000])
+
+    def count(self) -> int:
+        return self.col.count()
+
+
+class NumpyStore(VectorStore):
+    def __init__(self, path: str, name: str = COLLECTION, embedding_model: Optional[str] = None):
+        self.path = path
+        self.name = name
+        self.embedding_model = embedding_model
+        self._lock = threading.RLock()
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._manifest: Dict[str, Any] = {}
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._records: List[Dict[str, Any]] = []
+        self._rows: Dict[str, int] = {}
+        self._masks: Dict[Tuple[str, Any], np.ndarray] = {}
+
+    # ---- state ----
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _refresh(self) -> None:
+        """Reload if another process (or restore) committed a new manifest."""
+        try:
+            st = os.stat(self._file(MANIFEST))
+        except FileNotFoundError:
+            return
+        stamp = (st.st_ino, st.st_mtime_ns)  # the manifest is always replaced, never rewritten
+        if stamp == self._stamp:
+            return
+        try:
+            manifest, matrix, records = read_index_dir(self.path)
+        except ValueError:
+            return  # caught a writer mid-commit; keep the previous state
+        self._stamp, self._manifest, self._matrix, self._records = stamp, manifest, matrix, records
+        self._rows = {r["id"]: i for i, r in enumerate(records)}
+        self._masks = {}
+
+    @contextmanager
+    def _writing(self) -> Iterator[None]:
+        os.makedirs(self.path, exist_ok=True)
+        with self._lock, open(self._file(".lock"), "w") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            self._refresh()
+            yield
+
+    def _commit(self, records: List[Dict[str, Any]], dim: int, capacity: int) -> None:
+        """Publish a write: the manifest is replaced last, so readers never see a partial one."""
+        manifest = {
+            "format": SNAPSHOT_FORMAT,
+            "collection": self.name,
+            "count": len(records),
+            "capacity": capacity,
+            "dim": dim,
+            "space": "cosine",
+            "hnsw": {},
+            "embedding_model": self.embedding_model or self._manifest.get("embedding_model"),
+            "created_at": dt.datetime.now(dt.timezone.utc).isoformat(),
+            "files": {"embeddings": EMBEDDINGS, "records": RECORDS},
+            "records_bytes": os.path.getsize(self._file(RECORDS)),
+        }
+        tmp = self._file(MANIFEST + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp, self._file(MANIFEST))
+        # adopt the new state directly instead of re-reading records.jsonl
+        st = os.stat(self._file(MANIFEST))
+        self._stamp = (st.st_ino, st.st_mtime_ns)
+        self._manifest = manifest
+        self._matrix = np.load(self._file(EMBEDDINGS), mmap_mode="r")[: len(records)]
+        self._records = records
+        self._rows = {r["id"]: i for i, r in enumerate(records)}
+        self._masks = {}
+
+    def _write_matrix(self, rows: np.ndarray, capacity: int, dim: int) -> None:
+        tmp = self._file(EMBEDDINGS + ".tmp")
+        out = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.float32, shape=(capacity, dim))
+        for start in range(0, len(rows), 65536):
+            chunk = rows[start : start + 65536]
+            out[start : start + len(chunk)] = chunk
+        out.flush()
+        del out
+        os.replace(tmp, self._file(EMBEDDINGS))
+
+    def _write_records(self, records: List[Dict[str, Any]], append: bool = False) -> None:
+        lines = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+        if append:
+            with open(self._file(RECORDS), "a", encoding="utf-8") as f:
+                f.write(lines)
+            return
+        tmp = self._file(RECORDS + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(lines)
+        os.replace(tmp, self._file(RECORDS))
+
+    def _mask(self, field: str, value: Any) -> np.ndarray:
+        """Boolean row mask for metadata[field] == value, cached until the next write."""
+        mask = self._masks.get((field, value))
+        if mask is None:
+            mask = np.fromiter(
+                ((r.get("metadata") or {}).get(field) == value for r in self._records),
+                dtype=bool, count=len(self._records),
+            )
+            self._masks[(field, value)] = mask
+        return mask
+
+    # ---- VectorStore ----
+    def upsert(self, ids, embeddings, documents, metadatas) -> None:
+        vecs = _normalize(embeddings)
+        batch = {rid: i for i, rid in enumerate(ids)}  # last occurrence wins
+        with self._writing():
+            count = len(self._records)
+            dim = vecs.shape[1]
+            if count and self._matrix.shape[1] != dim:
+                raise ValueError(f"embedding dim {dim} does not match the index ({self._matrix.shape[1]})")
+            updates = [(self._rows[rid], i) for rid, i in batch.items() if rid in self._rows]
+            appends = [i for rid, i in batch.items() if rid not in self._rows]
+            new_count = count + len(appends)
+
+            # grow by doubling; otherwise rows are written in place
+            capacity = self._manifest.get("capacity", count) if count else 0
+            if new_count > capacity:
+                capacity = max(new_count, 2 * capacity, 1024)
+                self._write_matrix(self._matrix[:count], capacity, dim)
+            matrix = np.load(self._file(EMBEDDINGS), mmap_mode="r+")
+            for row, i in updates:
+                matrix[row] = vecs[i]
+            if appends:
+                matrix[count:new_count] = vecs[appends]
+            matrix.flush()
+            del matrix
+
+            def record(i: int) -> Dict[str, Any]:
+                return {"id": ids[i], "document": documents[i], "metadata": metadatas[i]}
+
+            records = list(self._records)
+            for row, i in updates:
+                records[row] = record(i)
+            added = [record(i) for i in appends]
+            clean_tail = (
+                count
+                and os.path.exists(self._file(RECORDS))
+                and os.path.getsize(self._file(RECORDS)) == self._manifest.get("records_bytes")
+            )
+            if updates or not clean_tail:
+                self._write_records(records + added)
+            else:
+                self._write_records(added, append=True)
+            self._commit(records + added, dim, capacity)
+
+    def query(self, embeddings, k, where=None) -> List[List[Hit]]:
+        with self._lock:
+            self._refresh()
+            matrix, records = self._matrix, self._records
+            mask = None
+            if where:
+                mask = np.ones(len(records), dtype=bool)
+                for field, value in where.items():
+                    mask &= self._mask(field, value)
+        queries = _normalize(embeddings) if len(embeddings) else np.zeros((0, 0), dtype=np.float32)
+        if not len(queries) or not len(records):
+            return [[] for _ in range(len(queries))]
+
+        # a selective filter scores only the matching rows (the fancy index copies
+        # them); a broad one scores everything and masks the rest out
+        rows = None
+        if mask is not None and mask.sum() <= SUBSET_FRACTION * len(mask):
+            rows, mask = np.flatnonzero(mask), None
+        data = matrix[rows] if rows is not None else matrix
+        k = min(k, data.shape[0] if mask is None else int(mask.sum()))
+        if k == 0:
+            return [[] for _ in range(len(queries))]
+
+        results: List[List[Hit]] = []
+        for start in range(0, len(queries), QUERY_BATCH):
+            sims = queries[start : start + QUERY_BATCH] @ data.T
+            if mask is not None:
+                sims[:, ~mask] = -np.inf
+            top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+            top_sims = np.take_along_axis(sims, top, axis=1)
+            order = np.argsort(-top_sims, axis=1)
+            top, top_sims = np.take_along_axis(top, order, axis=1), np.take_along_axis(top_sims, order, axis=1)
+            if rows is not None:
+                top = rows[top]
+            for idx, scores in zip(top, top_sims):
+                results.append([
+                    (records[i]["id"], float(s), records[i].get("metadata") or {}) for i, s in zip(idx, scores)
+                ])
+        return results
+
+    def ids(self) -> List[str]:
+        with self._lock:
+            self._refresh()
+            return [r["id"] for r in self._records]
+
+    def delete(self, ids) -> None:
+        drop = set(ids)
+        with self._writing():
+            keep = [i for i, r in enumerate(self._records) if r["id"] not in drop]
+            if len(keep) == len(self._records):
+                return
+            dim = int(self._matrix.shape[1])
+            capacity = max(len(keep), 1024)
+            self._write_matrix(self._matrix[keep], capacity, dim)
+            records = [self._records[i] for i in keep]
+            self._write_records(records)
+            self._commit(records, dim, capacity)
+
+    def count(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._records)
+
+
+_stores: Dict[str, VectorStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(name: str = COLLECTION, backend: Optional[str] = None) -> VectorStore:
+    """The configured store for collection `name` (one instance per process)."""
+    backend = (backend or VECTOR_BACKEND).lower()
+    key = f"{backend}:{name}"
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            if backend == "numpy":
+                from .embeddings import EMBED_MODEL
+
+                store = NumpyStore(os.path.join(NUMPY_INDEX_DIR, name), name, EMBED_MODEL)
+            elif backend == "chroma":
+                store = ChromaStore(name)
+            else:
+                raise ValueError(f"unknown VECTOR_BACKEND {backend!r} (chroma | numpy)")
+            _stores[key] = store
+    return store
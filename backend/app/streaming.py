@@ -0,0 +1,69 @@
+# app/streaming.py
+"""
+Streaming helpers for large responses.
+
+Rows are read through a server-side cursor in their own session (the request's
+session is closed before a StreamingResponse body runs) and encoded with
+orjson in batches, so memory stays flat regardless of result size.
+
+Streamed rows bypass response_model. json_array() therefore checks the first
+row against the endpoint's schema (same fields, valid values) before writing
+anything, so a query that drifts from the schema aborts the response and
+logs the error instead of silently changing the payload.
+"""
+from __future__ import annotations
+
+import itertools
+from typing import Any, Iterable, Iterator, Mapping, Optional, Type
+
+import orjson
+from pydantic import BaseModel
+from sqlalchemy.sql import Select
+
+from .db import SessionLocal
+
+YIELD_PER = 500
+
+
+def iter_rows(stmt: Select, yield_per: int = YIELD_PER) -> Iterator[Mapping[str, Any]]:
+    """Yield result rows as mappings using a server-side cursor."""
+    db = SessionLocal()
+    try:
+        result = db.execute(stmt.execution_options(yield_per=yield_per))
+        for row in result.mappings():
+            yield row
+    finally:
+        db.close()
+
+
+def check_row(row: Mapping[str, Any], model: Type[BaseModel]) -> None:
+    """Raise ValueError unless `row` has exactly `model`'s fields and validates against it."""
+    fields, keys = set(model.model_fields), set(row.keys())
+    if keys != fields:
+        raise ValueError(
+            f"streamed row does not match {model.__name__}: "
+            f"missing {sorted(fields - keys)}, unexpected {sorted(keys - fields)}"
+        )
+    model.model_validate(dict(row))
+
+
+def json_array(
+    rows: Iterable[Mapping[str, Any]], batch: int = YIELD_PER, model: Optional[Type[BaseModel]] = None
+) -> Iterator[bytes]:
+    """Encode rows as one JSON array, emitted in chunks of `batch` rows."""
+    rows = iter(rows)
+    head = next(rows, None)
+    if head is not None and model is not None:
+        check_row(head, model)
+    yield b"["
+    buf = []
+    first = True
+    for row in (rows if head is None else itertools.chain([head], rows)):
+        buf.append(orjson.dumps(dict(row)))
+        if len(buf) >= batch:
+            yield (b"" if first else b",") + b",".join(buf)
+            first = False
+            buf = []
+    if buf:
+        yield (b"" if first else b",") + b",".join(buf)
+    yield b"]"
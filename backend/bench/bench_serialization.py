@@ -0,0 +1,141 @@
+"""
+Serialization cost of the plan/resource responses.
+
+Compares the previous path (hand-built dicts, response_model=List[Dict[str, Any]],
+stdlib JSONResponse) with the typed from_attributes models rendered by
+ORJSONResponse, and the streamed resource page.
+
+    cd backend && python -m bench.bench_serialization [--repeat 20]
+"""
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import json
+import os
+import statistics
+import time
+import uuid
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List
+
+import orjson
+from pydantic import TypeAdapter
+
+os.environ.setdefault("SECRET_KEY", "bench")  # app.db loads settings; nothing connects
+
+from app.schemas import PlanOut, ResourceOut
+from app.streaming import json_array
+
+WEEKS = 52
+ITEMS_PER_WEEK = 7
+RESOURCE_ROWS = 10_000
+
+
+def _plan() -> SimpleNamespace:
+    items = [
+        SimpleNamespace(
+            id=str(uuid.uuid4()), week_no=w, day_no=d, title=f"Week {w} day {d}: some topic",
+            url=f"https://example.com/w{w}/d{d}", est_minutes=60, type="video", required_skill="python",
+        )
+        for w in range(1, WEEKS + 1)
+        for d in range(1, ITEMS_PER_WEEK + 1)
+    ]
+    return SimpleNamespace(
+        id=str(uuid.uuid4()), target_role="auto", duration_weeks=WEEKS, status="active",
+        summary="A long plan", created_at=dt.datetime.now(dt.timezone.utc), items=items,
+    )
+
+
+def _resources() -> List[SimpleNamespace]:
+    return [
+        SimpleNamespace(
+            id=str(uuid.uuid4()), title=f"Resource {i}", url=f"https://example.com/r/{i}",
+            source="youtube", tags="python,pandas", level="beginner", lang="en", duration_min=30,
+        )
+        for i in range(RESOURCE_ROWS)
+    ]
+
+
+_generic = TypeAdapter(List[Dict[str, Any]])
+_generic_one = TypeAdapter(Dict[str, Any])
+_plan_out = TypeAdapter(PlanOut)
+_resource_list = TypeAdapter(List[ResourceOut])
+
+
+def _json_response(content: Any) -> bytes:
+    # what starlette.responses.JSONResponse.render does
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode()
+
+
+def old_plan(plan) -> bytes:
+    body = {
+        "id": plan.id, "target_role": plan.target_role, "duration_weeks": plan.duration_weeks,
+        "status": plan.status, "summary": plan.summary,
+        "items": [
+            {"id": it.id, "week_no": it.week_no, "day_no": it.day_no, "title": it.title, "url": it.url,
+             "est_minutes": it.est_minutes, "type": it.type, "required_skill": it.required_skill}
+            for it in plan.items
+        ],
+    }
+    return _json_response(_generic_one.dump_python(_generic_one.validate_python(body), mode="json"))
+
+
+def new_plan(plan) -> bytes:
+    value = _plan_out.validate_python(plan, from_attributes=True)
+    return orjson.dumps(_plan_out.dump_python(value, mode="json"))
+
+
+def old_resources(rows) -> bytes:
+    body = [{
+        "id": r.id, "title": r.title, "url": r.url, "source": r.source,
+        "tags": r.tags, "level": r.level, "lang": r.lang, "duration_min": r.duration_min,
+    } for r in rows]
+    return _json_response(_generic.dump_python(_generic.validate_python(body), mode="json"))
+
+
+def typed_resources(rows) -> bytes:
+    value = _resource_list.validate_python(rows, from_attributes=True)
+    return orjson.dumps(_resource_list.dump_python(value, mode="json"))
+
+
+def streamed_resources(rows) -> bytes:
+    # iter_rows() yields mappings straight from the cursor
+    fields = list(ResourceOut.model_fields)
+    mappings = ({f: getattr(r, f) for f in fields} for r in rows)
+    return b"".join(json_array(mappings))
+
+
+def _time(fn: Callable[[Any], bytes], arg: Any, repeat: int) -> Dict[str, float]:
+    fn(arg)  # warm-up
+    samples = []
+    size = 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        size = len(fn(arg))
+        samples.append((time.perf_counter() - t0) * 1000)
+    return {"median_ms": round(statistics.median(samples), 2), "min_ms": round(min(samples), 2), "bytes": size}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    plan = _plan()
+    rows = _resources()
+    cases = [
+        (f"plan {WEEKS}w x {ITEMS_PER_WEEK} items: dict + json", old_plan, plan),
+        (f"plan {WEEKS}w x {ITEMS_PER_WEEK} items: PlanOut + orjson", new_plan, plan),
+        (f"resources {RESOURCE_ROWS}: dict + json", old_resources, rows),
+        (f"resources {RESOURCE_ROWS}: ResourceOut + orjson", typed_resources, rows),
+        (f"resources {RESOURCE_ROWS}: streamed orjson", streamed_resources, rows),
+    ]
+    results = {name: _time(fn, arg, args.repeat) for name, fn, arg in cases}
+    width = max(len(n) for n in results)
+    for name, r in results.items():
+        print(f"{name:<{width}}  {r['median_ms']:>9.2f} ms  (min {r['min_ms']:.2f})  {r['bytes']} bytes")
+
+
+if __name__ == "__main__":
+    main()
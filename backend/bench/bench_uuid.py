@@ -0,0 +1,187 @@
+"""
+Text vs native UUID keys: index size, insert rate and lookup latency.
+
+Builds the plans / plan_items / progress layout three times in scratch
+schemas of the configured Postgres database - varchar ids (the old layout),
+uuid v4 and uuid v7 - loads the same number of rows into each and reports:
+
+* insert throughput,
+* size of every primary-key and foreign-key index,
+* p50/p95 of the get_plan query (plan + items ordered by week/day) and of the
+  progress lookup (a user's progress on a plan joined to its items).
+
+    cd backend && python -m bench.bench_uuid --plans 20000 --items-per-plan 40 [--keep]
+
+The scratch schemas (bench_ids_*) are dropped afterwards unless --keep.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import time
+import uuid
+from typing import Any, Callable, Dict, List
+
+import sqlalchemy as sa
+
+from app.db import engine
+from app.models import uuid7
+
+VARIANTS: Dict[str, tuple] = {
+    "text": (sa.String, lambda: str(uuid.uuid4())),
+    "uuid4": (sa.Uuid, uuid.uuid4),
+    "uuid7": (sa.Uuid, uuid7),
+}
+BATCH = 5000
+
+GET_PLAN = """
+SELECT p.id, p.target_role, i.id, i.week_no, i.day_no, i.title
+FROM {s}.plans p JOIN {s}.plan_items i ON i.plan_id = p.id
+WHERE p.id = :plan_id AND p.user_id = :user_id
+ORDER BY i.week_no, i.day_no
+"""
+PROGRESS = """
+SELECT pr.status, i.title, i.week_no
+FROM {s}.progress pr JOIN {s}.plan_items i ON i.id = pr.item_id
+WHERE pr.user_id = :user_id AND pr.plan_id = :plan_id
+"""
+
+
+def _tables(schema: str, id_type: Any) -> sa.MetaData:
+    md = sa.MetaData(schema=schema)
+    sa.Table(
+        "plans", md,
+        sa.Column("id", id_type, primary_key=True),
+        sa.Column("user_id", id_type, nullable=False, index=True),
+        sa.Column("target_role", sa.String(255)),
+    )
+    sa.Table(
+        "plan_items", md,
+        sa.Column("id", id_type, primary_key=True),
+        sa.Column("plan_id", id_type, sa.ForeignKey(f"{schema}.plans.id", ondelete="CASCADE"), nullable=False, index=True),
+        sa.Column("week_no", sa.Integer), sa.Column("day_no", sa.Integer), sa.Column("title", sa.String(500)),
+    )
+    sa.Table(
+        "progress", md,
+        sa.Column("id", id_type, primary_key=True),
+        sa.Column("user_id", id_type, nullable=False, index=True),
+        sa.Column("plan_id", id_type, sa.ForeignKey(f"{schema}.plans.id", ondelete="CASCADE"), nullable=False, index=True),
+        sa.Column("item_id", id_type, sa.ForeignKey(f"{schema}.plan_items.id", ondelete="CASCADE"), nullable=False, index=True),
+        sa.Column("status", sa.String(16)),
+    )
+    return md
+
+
+def _load(md: sa.MetaData, new_id: Callable[[], Any], args: argparse.Namespace) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+    users = [new_id() for _ in range(args.users)]
+    plans_t, items_t, progress_t = (md.tables[f"{md.schema}.{n}"] for n in ("plans", "plan_items", "progress"))
+    sample: List[tuple] = []
+    rows = 0
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        plans, items, progress = [], [], []
+
+        def flush() -> None:
+            nonlocal rows
+            for table, batch in ((plans_t, plans), (items_t, items), (progress_t, progress)):  # parents first
+                if batch:
+                    conn.execute(sa.insert(table), batch)
+                    rows += len(batch)
+                    batch.clear()
+
+        for _ in range(args.plans):
+            user_id = rng.choice(users)
+            plan_id = new_id()
+            plans.append({"id": plan_id, "user_id": user_id, "target_role": "bench"})
+            if len(sample) < args.lookups or rng.random() < 0.01:
+                sample.append((plan_id, user_id))
+            for k in range(args.items_per_plan):
+                item_id = new_id()
+                items.append({"id": item_id, "plan_id": plan_id, "week_no": k // 7 + 1, "day_no": k % 7 + 1, "title": f"item {k}"})
+                if rng.random() < args.progress_ratio:
+                    progress.append({"id": new_id(), "user_id": user_id, "plan_id": plan_id, "item_id": item_id, "status": "done"})
+            if len(items) >= BATCH:
+                flush()
+        flush()
+    elapsed = time.perf_counter() - started
+    return {"rows": rows, "insert_rows_per_s": round(rows / elapsed), "sample": sample}
+
+
+def _index_sizes(conn, schema: str) -> Dict[str, int]:
+    out = conn.execute(sa.text(
+        "SELECT c.relname, pg_relation_size(c.oid) FROM pg_index x "
+        "JOIN pg_class c ON c.oid = x.indexrelid JOIN pg_namespace n ON n.oid = c.relnamespace "
+        "WHERE n.nspname = :schema ORDER BY c.relname"
+    ), {"schema": schema}).all()
+    return {name: size for name, size in out}
+
+
+def _latency(conn, sql: str, params: List[Dict[str, Any]]) -> Dict[str, float]:
+    stmt = sa.text(sql)
+    samples = []
+    for p in params:
+        t0 = time.perf_counter()
+        conn.execute(stmt, p).all()
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    return {
+        "p50_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(samples[int(len(samples) * 0.95) - 1], 3),
+    }
+
+
+def run_variant(name: str, args: argparse.Namespace) -> Dict[str, Any]:
+    id_type, new_id = VARIANTS[name]
+    schema = f"bench_ids_{name}"
+    with engine.begin() as conn:
+        conn.execute(sa.text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+        conn.execute(sa.text(f"CREATE SCHEMA {schema}"))
+    md = _tables(schema, id_type)
+    md.create_all(engine)
+
+    loaded = _load(md, new_id, args)
+    rng = random.Random(args.seed + 1)
+    picks = [dict(zip(("plan_id", "user_id"), rng.choice(loaded["sample"]))) for _ in range(args.lookups)]
+    with engine.connect() as conn:
+        conn.execute(sa.text(f"ANALYZE {schema}.plans, {schema}.plan_items, {schema}.progress"))
+        sizes = _index_sizes(conn, schema)
+        result = {
+            "rows": loaded["rows"],
+            "insert_rows_per_s": loaded["insert_rows_per_s"],
+            "index_bytes": sizes,
+            "index_bytes_total": sum(sizes.values()),
+            "get_plan": _latency(conn, GET_PLAN.format(s=schema), picks),
+            "progress": _latency(conn, PROGRESS.format(s=schema), picks),
+        }
+    if not args.keep:
+        with engine.begin() as conn:
+            conn.execute(sa.text(f"DROP SCHEMA {schema} CASCADE"))
+    return result
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--plans", type=int, default=20_000)
+    ap.add_argument("--items-per-plan", type=int, default=40)
+    ap.add_argument("--users", type=int, default=2_000)
+    ap.add_argument("--progress-ratio", type=float, default=0.3)
+    ap.add_argument("--lookups", type=int, default=2_000)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--variants", default=",".join(VARIANTS))
+    ap.add_argument("--keep", action="store_true", help="leave the bench_ids_* schemas in place")
+    ap.add_argument("--out", help="also write the JSON report here")
+    args = ap.parse_args()
+
+    report = {name: run_variant(name, args) for name in args.variants.split(",")}
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Chroma (HNSW) vs the numpy exact-search vector store.
+
+Loads the same vectors into both backends in a temp directory and reports,
+per backend: build time, cold open (new store + first query), single-query
+p50/p95, batched multi-query throughput, filtered-query p50 and recall@k
+against exact search.
+
+    cd backend && python -m bench.bench_vector_store --n 100000 [--dim 384] [--queries 200] [--batch 64]
+    python -m bench.bench_vector_store --snapshot /path/to/snapshot   # real embeddings (index_admin snapshot)
+
+Synthetic vectors are clustered so that nearest neighbours are meaningful.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import shutil
+import tempfile
+import time
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from app.services.chroma_client import get_client
+from app.services.vector_store import ChromaStore, NumpyStore, VectorStore, read_index_dir
+
+LEVELS = ["beginner", "intermediate", "advanced"]
+SOURCES = ["youtube", "github", "coursera", "blog", "docs"]
+LOAD_BATCH = 5000
+
+
+def synthetic(n: int, dim: int, seed: int) -> Tuple[np.ndarray, List[str], List[Dict[str, Any]]]:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(8, n // 500), dim)).astype(np.float32)
+    vecs = centers[rng.integers(0, len(centers), size=n)] + 0.3 * rng.normal(size=(n, dim)).astype(np.float32)
+    vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+    ids = [f"r{i}" for i in range(n)]
+    metas = [{"level": LEVELS[i % 3], "source": SOURCES[i % 5], "title": f"resource {i}"} for i in range(n)]
+    return vecs, ids, metas
+
+
+def from_snapshot(path: str) -> Tuple[np.ndarray, List[str], List[Dict[str, Any]]]:
+    _, matrix, records = read_index_dir(path)
+    return np.asarray(matrix, dtype=np.float32), [r["id"] for r in records], [r.get("metadata") or {} for r in records]
+
+
+def _load(store: VectorStore, vecs: np.ndarray, ids: List[str], metas: List[Dict[str, Any]]) -> float:
+    t0 = time.perf_counter()
+    for start in range(0, len(ids), LOAD_BATCH):
+        end = start + LOAD_BATCH
+        store.upsert(ids[start:end], vecs[start:end], [""] * len(ids[start:end]), metas[start:end])
+    return time.perf_counter() - t0
+
+
+def _pct(samples: List[float], p: float) -> float:
+    samples = sorted(samples)
+    return round(samples[min(len(samples) - 1, int(len(samples) * p))], 3)
+
+
+def measure(open_store, vecs, ids, metas, queries, truth, args) -> Dict[str, Any]:
+    build_s = _load(open_store(), vecs, ids, metas)
+
+    t0 = time.perf_counter()
+    store = open_store()
+    store.query(queries[:1], args.k)
+    cold_ms = (time.perf_counter() - t0) * 1000
+
+    lat, hits = [], 0
+    for qi, q in enumerate(queries):
+        t1 = time.perf_counter()
+        out = store.query(q[None, :], args.k)[0]
+        lat.append((time.perf_counter() - t1) * 1000)
+        hits += len({rid for rid, _, _ in out} & truth[qi])
+
+    t1 = time.perf_counter()
+    for start in range(0, len(queries), args.batch):
+        store.query(queries[start : start + args.batch], args.k)
+    batched_qps = len(queries) / (time.perf_counter() - t1)
+
+    where = {"level": "beginner"}
+    flat = []
+    for q in queries[: max(1, len(queries) // 4)]:
+        t1 = time.perf_counter()
+        store.query(q[None, :], args.k, where=where)
+        flat.append((time.perf_counter() - t1) * 1000)
+
+    return {
+        "build_s": round(build_s, 2),
+        "cold_open_first_query_ms": round(cold_ms, 2),
+        "p50_ms": _pct(lat, 0.5),
+        "p95_ms": _pct(lat, 0.95),
+        f"batched_qps(batch={args.batch})": round(batched_qps, 1),
+        "filtered_p50_ms": _pct(flat, 0.5),
+        f"recall_at_{args.k}": round(hits / (len(queries) * args.k), 4),
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--snapshot", help="index_admin snapshot directory with real embeddings")
+    ap.add_argument("--n", type=int, default=100_000)
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--batch", type=int, default=64)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--backends", default="numpy,chroma")
+    args = ap.parse_args()
+
+    vecs, ids, metas = from_snapshot(args.snapshot) if args.snapshot else synthetic(args.n, args.dim, args.seed)
+    rng = np.random.default_rng(args.seed + 1)
+    picks = rng.choice(len(vecs), size=min(args.queries, len(vecs)), replace=False)
+    queries = vecs[picks] + rng.normal(0, 0.02, size=(len(picks), vecs.shape[1])).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    k = args.k = min(args.k, len(vecs))
+    top = np.argpartition(-(queries @ vecs.T), k - 1, axis=1)[:, :k]
+    truth = [{ids[i] for i in row} for row in top]
+
+    tmp = tempfile.mkdtemp(prefix="vector-bench-")
+    report: Dict[str, Any] = {"rows": len(ids), "dim": int(vecs.shape[1]), "queries": len(queries), "k": k}
+    try:
+        openers = {
+            "numpy": lambda: NumpyStore(f"{tmp}/numpy", "bench"),
+            "chroma": lambda: ChromaStore("bench", client=get_client(f"{tmp}/chroma")),
+        }
+        for name in args.backends.split(","):
+            report[name] = measure(openers[name], vecs, ids, metas, queries, truth, args)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+Concurrent load test against a running API.
+
+Virtual users log in with the accounts created by bench/seed.py and run a
+weighted mix of scenarios: login, resource search, plan list, plan detail,
+progress update and plan generation (point the API at bench/stub_ollama.py).
+Reports count, errors, throughput and p50/p95/p99 latency per endpoint as
+JSON, and can compare against a stored baseline.
+
+    cd backend && python -m bench.loadtest --base http://localhost:8000 \\
+        --users 20 --duration 60 --out bench/baseline.json
+    python -m bench.loadtest ... --baseline bench/baseline.json --tolerance 0.2
+
+With --baseline the exit code is 1 if any endpoint's p95 grew by more than
+--tolerance or its error rate went up. For plan generation runs, raise
+RATE_LIMIT_LLM_PER_MIN / RATE_LIMIT_LLM_BURST on the API so the limiter
+doesn't dominate the numbers.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+SEED_FILE = os.path.join(os.path.dirname(__file__), ".seed.json")  # written by bench/seed.py
+
+SCENARIOS: Dict[str, float] = {
+    "login": 0.05,
+    "search": 0.25,
+    "plans_list": 0.15,
+    "plan_detail": 0.30,
+    "progress_update": 0.20,
+    "plan_generate": 0.05,
+}
+SEARCH_TERMS = ["python", "sql,statistics", "docker", "react,typescript", "machine learning", "spark,airflow"]
+
+
+def percentile(sorted_ms: List[float], p: float) -> float:
+    if not sorted_ms:
+        return 0.0
+    idx = min(len(sorted_ms) - 1, max(0, int(round(p / 100 * len(sorted_ms))) - 1))
+    return sorted_ms[idx]
+
+
+class Recorder:
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+
+    async def call(self, name: str, client: httpx.AsyncClient, method: str, url: str, **kw) -> Optional[httpx.Response]:
+        t0 = time.perf_counter()
+        try:
+            resp = await client.request(method, url, **kw)
+        except httpx.HTTPError:
+            self.samples[name].append((time.perf_counter() - t0) * 1000)
+            self.errors[name] += 1
+            self.statuses[name][0] += 1
+            return None
+        self.samples[name].append((time.perf_counter() - t0) * 1000)
+        self.statuses[name][resp.status_code] += 1
+        if resp.status_code >= 400:
+            self.errors[name] += 1
+        return resp
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        out = {}
+        for name, ms in sorted(self.samples.items()):
+            ms = sorted(ms)
+            out[name] = {
+                "count": len(ms),
+                "errors": self.errors[name],
+                "error_rate": round(self.errors[name] / len(ms), 4),
+                "rps": round(len(ms) / elapsed, 2),
+                "mean_ms": round(sum(ms) / len(ms), 2),
+                "p50_ms": round(percentile(ms, 50), 2),
+                "p95_ms": round(percentile(ms, 95), 2),
+                "p99_ms": round(percentile(ms, 99), 2),
+                "statuses": {str(k): v for k, v in sorted(self.statuses[name].items())},
+            }
+        return out
+
+
+class VirtualUser:
+    def __init__(self, email: str, password: str, rec: Recorder, rng: random.Random, use_templates: bool):
+        self.email = email
+        self.password = password
+        self.rec = rec
+        self.rng = rng
+        self.use_templates = use_templates
+        self.token: Optional[str] = None
+        self.plan_ids: List[str] = []
+        self.item_ids: List[str] = []
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.token}"}
+
+    async def login(self, client: httpx.AsyncClient) -> None:
+        resp = await self.rec.call("login", client, "POST", "/auth/auth/login",
+                                   json={"email": self.email, "password": self.password})
+        if resp is not None and resp.status_code == 200:
+            self.token = resp.json()["access_token"]
+
+    async def plans_list(self, client: httpx.AsyncClient) -> None:
+        resp = await self.rec.call("plans_list", client, "GET", "/plans/", headers=self.headers)
+        if resp is not None and resp.status_code == 200:
+            self.plan_ids = [p["id"] for p in resp.json()]
+
+    async def plan_detail(self, client: httpx.AsyncClient) -> None:
+        if not self.plan_ids:
+            return await self.plans_list(client)
+        pid = self.rng.choice(self.plan_ids)
+        resp = await self.rec.call("plan_detail", client, "GET", f"/plans/{pid}", headers=self.headers)
+        if resp is not None and resp.status_code == 200:
+            self.item_ids = [it["id"] for it in resp.json().get("items", [])]
+
+    async def progress_update(self, client: httpx.AsyncClient) -> None:
+        if not self.item_ids:
+            return await self.plan_detail(client)
+        await self.rec.call("progress_update", client, "POST", "/progress/", headers=self.headers,
+                            json={"item_id": self.rng.choice(self.item_ids), "status": self.rng.choice(["doing", "done"])})
+
+    async def search(self, client: httpx.AsyncClient) -> None:
+        await self.rec.call("search", client, "GET", "/resources/search", headers=self.headers,
+                            params={"skills": self.rng.choice(SEARCH_TERMS), "k": 5})
+
+    async def plan_generate(self, client: httpx.AsyncClient) -> None:
+        body = {
+            "goal": f"Become a {self.rng.choice(['Data Scientist', 'Backend Developer', 'ML Engineer'])}",
+            "current_skills": self.rng.sample(["python", "sql", "git", "docker", "statistics"], k=2),
+            "duration_weeks": self.rng.choice([2, 4, 8, 12]),
+            "use_templates": self.use_templates,
+        }
+        await self.rec.call("plan_generate", client, "POST", "/plans/auto", headers=self.headers, json=body)
+
+    async def run(self, client: httpx.AsyncClient, deadline: float) -> None:
+        await self.login(client)
+        if not self.token:
+            return
+        await self.plans_list(client)
+        names, weights = zip(*SCENARIOS.items())
+        while time.perf_counter() < deadline:
+            await getattr(self, self.rng.choices(names, weights)[0])(client)
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    problems = []
+    for name, base in baseline.get("endpoints", {}).items():
+        cur = current["endpoints"].get(name)
+        if cur is None:
+            continue
+        if base["p95_ms"] > 0 and cur["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            problems.append(f"{name}: p95 {cur['p95_ms']}ms > baseline {base['p95_ms']}ms (+{tolerance:.0%})")
+        if cur["error_rate"] > base["error_rate"] + 0.01:
+            problems.append(f"{name}: error rate {cur['error_rate']} > baseline {base['error_rate']}")
+    return problems
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    with open(args.seed_file, encoding="utf-8") as f:
+        seeded = json.load(f)
+    rng = random.Random(args.seed)
+    rec = Recorder()
+    emails = seeded["emails"]
+    users = [
+        VirtualUser(emails[i % len(emails)], seeded["password"], rec, random.Random(rng.random()), args.use_templates)
+        for i in range(args.users)
+    ]
+    limits = httpx.Limits(max_connections=args.users * 2)
+    timeout = httpx.Timeout(args.timeout)
+    async with httpx.AsyncClient(base_url=args.base, limits=limits, timeout=timeout) as client:
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*(u.run(client, deadline) for u in users))
+        elapsed = time.perf_counter() - started
+    return {
+        "meta": {
+            "base": args.base, "users": args.users, "duration_s": round(elapsed, 1), "seed": args.seed,
+            "scale": seeded.get("scale"), "scenarios": SCENARIOS, "python": platform.python_version(),
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        },
+        "endpoints": rec.report(elapsed),
+    }
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Load test the SkillSetu API")
+    ap.add_argument("--base", default=os.getenv("API_BASE", "http://localhost:8000"))
+    ap.add_argument("--users", type=int, default=20, help="concurrent virtual users")
+    ap.add_argument("--duration", type=float, default=60.0, help="seconds")
+    ap.add_argument("--timeout", type=float, default=180.0)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--seed-file", default=SEED_FILE)
+    ap.add_argument("--no-templates", dest="use_templates", action="store_false",
+                    help="force every plan_generate through the LLM")
+    ap.add_argument("--out", help="write the report here (use as a baseline later)")
+    ap.add_argument("--baseline", help="compare against this report")
+    ap.add_argument("--tolerance", type=float, default=0.2)
+    args = ap.parse_args()
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            problems = compare(report, json.load(f), args.tolerance)
+        for p in problems:
+            print("REGRESSION", p, file=sys.stderr)
+        return 1 if problems else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
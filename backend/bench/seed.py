@@ -0,0 +1,158 @@
+"""
+Seeded data generator for benchmarks.
+
+Creates users (all with the same password), plans with items, progress rows
+and a resource catalog directly in the configured database.
+
+    cd backend && python -m bench.seed --scale 10k [--users 100] [--seed 42] [--index]
+
+--scale sets the resource catalog size (10k / 100k / 1m). --index also embeds
+the catalog into the vector index, which is slow at the larger scales.
+Users are bench-user-<n>@example.com with password BENCH_PASSWORD; the list
+is written to bench/.seed.json for bench/loadtest.py.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import time
+from typing import Any, Dict, Iterator, List
+
+from sqlalchemy import insert
+
+from app.db import engine, init_db
+from app.deps import hash_password
+from app.models import Plan, PlanItem, Progress, Resource, User, gen_uuid
+from app.services.urls import normalize_url
+
+BENCH_PASSWORD = "bench-password"
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+BATCH = 5_000
+SEED_FILE = os.path.join(os.path.dirname(__file__), ".seed.json")
+
+SKILLS = [
+    "python", "sql", "statistics", "pandas", "numpy", "machine learning", "deep learning",
+    "docker", "kubernetes", "react", "typescript", "fastapi", "postgres", "git", "linux",
+    "spark", "airflow", "nlp", "computer vision", "mlops", "aws", "system design",
+]
+SOURCES = ["youtube", "github", "coursera", "blog", "docs"]
+LEVELS = ["beginner", "intermediate", "advanced"]
+
+
+def _batched(rows: Iterator[Dict[str, Any]], size: int = BATCH) -> Iterator[List[Dict[str, Any]]]:
+    batch: List[Dict[str, Any]] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _resources(rng: random.Random, n: int) -> Iterator[Dict[str, Any]]:
+    for i in range(n):
+        tags = rng.sample(SKILLS, k=3)
+        url = f"https://{rng.choice(SOURCES)}.example.com/r/{i}"
+        yield {
+            "id": gen_uuid(),
+            "title": f"{tags[0].title()} {rng.choice(['crash course', 'deep dive', 'tutorial', 'handbook'])} #{i}",
+            "url": url,
+            "url_key": normalize_url(url),
+            "source": rng.choice(SOURCES),
+            "tags": ",".join(tags),
+            "level": rng.choice(LEVELS),
+            "lang": "en",
+            "duration_min": rng.randint(10, 600),
+        }
+
+
+def seed(scale: str, n_users: int, plans_per_user: int, progress_ratio: float, seed_value: int) -> Dict[str, Any]:
+    rng = random.Random(seed_value)
+    init_db()
+    hashed = hash_password(BENCH_PASSWORD)  # bcrypt once, shared by every user
+    counts = {"users": 0, "plans": 0, "plan_items": 0, "progress": 0, "resources": 0}
+    emails: List[str] = []
+
+    with engine.begin() as conn:
+        users = []
+        for i in range(n_users):
+            email = f"bench-user-{i}@example.com"
+            emails.append(email)
+            users.append({"id": gen_uuid(), "email": email, "name": f"Bench {i}", "hashed_password": hashed, "timezone": "Asia/Kolkata"})
+        conn.execute(insert(User), users)
+        counts["users"] = len(users)
+
+        plans, items, progress = [], [], []
+        for u in users:
+            for _ in range(plans_per_user):
+                weeks = rng.randint(4, 16)
+                plan_id = gen_uuid()
+                plans.append({"id": plan_id, "user_id": u["id"], "target_role": rng.choice(SKILLS).title(),
+                              "duration_weeks": weeks, "status": "active", "summary": "seeded plan"})
+                for w in range(1, weeks + 1):
+                    for d in range(1, 6):
+                        item_id = gen_uuid()
+                        skill = rng.choice(SKILLS)
+                        items.append({"id": item_id, "plan_id": plan_id, "week_no": w, "day_no": d,
+                                      "title": f"{skill} week {w} day {d}", "url": "https://example.com",
+                                      "est_minutes": 60, "type": "video", "required_skill": skill})
+                        if rng.random() < progress_ratio:
+                            progress.append({"id": gen_uuid(), "user_id": u["id"], "plan_id": plan_id, "item_id": item_id,
+                                             "status": rng.choice(["doing", "done"])})
+        for table, rows, key in ((Plan, plans, "plans"), (PlanItem, items, "plan_items"), (Progress, progress, "progress")):
+            for batch in _batched(iter(rows)):
+                conn.execute(insert(table), batch)
+            counts[key] = len(rows)
+
+    for batch in _batched(_resources(rng, SCALES[scale])):
+        with engine.begin() as conn:
+            conn.execute(insert(Resource), batch)
+        counts["resources"] += len(batch)
+
+    with open(SEED_FILE, "w", encoding="utf-8") as f:
+        json.dump({"password": BENCH_PASSWORD, "emails": emails, "scale": scale, "seed": seed_value}, f)
+    return counts
+
+
+def index_catalog() -> int:
+    from app.db import SessionLocal
+    from app.services.rag import index_resources
+
+    db = SessionLocal()
+    total = 0
+    try:
+        batch: List[Resource] = []
+        for r in db.query(Resource).yield_per(1000):
+            batch.append(r)
+            if len(batch) >= 1000:
+                total += index_resources(batch)
+                batch = []
+        total += index_resources(batch)
+    finally:
+        db.close()
+    return total
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Seed the database for benchmarks")
+    ap.add_argument("--scale", choices=sorted(SCALES), default="10k")
+    ap.add_argument("--users", type=int, default=100)
+    ap.add_argument("--plans-per-user", type=int, default=3)
+    ap.add_argument("--progress-ratio", type=float, default=0.3)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--index", action="store_true", help="embed the catalog into the vector index")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    counts = seed(args.scale, args.users, args.plans_per_user, args.progress_ratio, args.seed)
+    if args.index:
+        counts["indexed"] = index_catalog()
+    counts["seconds"] = round(time.perf_counter() - t0, 1)
+    print(json.dumps(counts))
+
+
+if __name__ == "__main__":
+    main()
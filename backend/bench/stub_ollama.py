@@ -0,0 +1,146 @@
+"""
+Local stand-in for Ollama's /api/generate, for benchmarks.
+
+Answers planner prompts with a well-formed plan JSON for the requested weeks,
+"generated" at a configurable per-token latency and cut off at the request's
+num_predict like the real server. --truncate-rate additionally truncates a
+share of responses at a random point; --fail-rate answers some with HTTP 500.
+
+    cd backend && python -m bench.stub_ollama --port 11435 --token-ms 2 --truncate-rate 0.1
+    OLLAMA_ENDPOINT=http://localhost:11435 uvicorn app.main:app
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+
+CHARS_PER_TOKEN = 4
+DEFAULT_NUM_PREDICT = 900
+
+_ONLY_WEEKS = re.compile(r"ONLY these week numbers:\s*([\d,\s]+)")
+_DURATION = re.compile(r"Duration weeks:\s*(\d+)")
+
+
+def _weeks_requested(prompt: str) -> List[int]:
+    m = _ONLY_WEEKS.search(prompt)
+    if m:
+        return [int(x) for x in m.group(1).replace(" ", "").split(",") if x]
+    m = _DURATION.search(prompt)
+    return list(range(1, int(m.group(1)) + 1)) if m else [1]
+
+
+def _plan_text(weeks: List[int], rng: random.Random, with_summary: bool) -> str:
+    skills = ["python", "sql", "statistics", "pandas", "docker", "react", "ml"]
+    plan: Dict[str, Any] = {}
+    if with_summary:
+        plan["summary"] = "Stub plan generated for benchmarking."
+    plan["weeks"] = [
+        {
+            "week": w,
+            "items": [
+                {"day": d, "title": f"Week {w} topic {d}", "url": f"https://example.com/w{w}/d{d}",
+                 "minutes": rng.choice([30, 45, 60, 90]), "skill": rng.choice(skills)}
+                for d in range(1, rng.randint(5, 7) + 1)
+            ],
+        }
+        for w in weeks
+    ]
+    return json.dumps(plan, separators=(",", ":"))
+
+
+class StubState:
+    def __init__(self, token_ms: float, first_token_ms: float, truncate_rate: float, fail_rate: float, seed: int):
+        self.token_ms = token_ms
+        self.first_token_ms = first_token_ms
+        self.truncate_rate = truncate_rate
+        self.fail_rate = fail_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+
+
+def make_handler(state: StubState):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, fmt, *args):  # keep benchmark output clean
+            pass
+
+        def _send(self, status: int, body: Dict[str, Any]) -> None:
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/api/tags":
+                self._send(200, {"models": [{"name": "stub"}]})
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/api/generate":
+                self._send(404, {"error": "not found"})
+                return
+            payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+            with state.lock:
+                state.requests += 1
+                fail = state.rng.random() < state.fail_rate
+                truncate = state.rng.random() < state.truncate_rate
+                seed = state.rng.random()
+            if fail:
+                self._send(500, {"error": "stub failure"})
+                return
+
+            prompt = payload.get("prompt", "")
+            text = _plan_text(_weeks_requested(prompt), random.Random(seed), "summary" in prompt)
+            num_predict = int((payload.get("options") or {}).get("num_predict") or DEFAULT_NUM_PREDICT)
+            limit = num_predict * CHARS_PER_TOKEN
+            done_reason = "stop"
+            if truncate:
+                limit = min(limit, int(len(text) * (0.2 + 0.7 * seed)))
+            if len(text) > limit:
+                text = text[:limit]
+                done_reason = "length"
+
+            tokens = max(1, len(text) // CHARS_PER_TOKEN)
+            time.sleep((state.first_token_ms + tokens * state.token_ms) / 1000)
+            self._send(200, {
+                "model": payload.get("model", "stub"),
+                "response": text,
+                "done": True,
+                "done_reason": done_reason,
+                "eval_count": tokens,
+            })
+
+    return Handler
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Stub Ollama server")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=11435)
+    ap.add_argument("--token-ms", type=float, default=2.0, help="latency per generated token")
+    ap.add_argument("--first-token-ms", type=float, default=50.0)
+    ap.add_argument("--truncate-rate", type=float, default=0.0, help="share of responses cut off at random")
+    ap.add_argument("--fail-rate", type=float, default=0.0, help="share of responses answered with HTTP 500")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    state = StubState(args.token_ms, args.first_token_ms, args.truncate_rate, args.fail_rate, args.seed)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(state))
+    print(f"stub ollama on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import os
+
+import pytest
+
+# app.config requires SECRET_KEY; tests never touch a real database or Ollama
+os.environ.setdefault("SECRET_KEY", "test")
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """The app's tables in a throwaway sqlite file, with foreign keys enforced."""
+    from sqlalchemy import create_engine, event
+
+    from app import models  # noqa: F401
+    from app.db import Base
+
+    eng = create_engine(f"sqlite:///{tmp_path}/app.db", future=True)
+    event.listen(eng, "connect", lambda conn, _: conn.execute("PRAGMA foreign_keys=ON"))
+    Base.metadata.create_all(eng)
+    yield eng
+    eng.dispose()
+
+
+@pytest.fixture
+def session_factory(engine, monkeypatch):
+    from sqlalchemy.orm import sessionmaker
+
+    from app import db as app_db
+
+    factory = sessionmaker(bind=engine, autoflush=False, future=True)
+    monkeypatch.setattr(app_db, "SessionLocal", factory)
+    return factory
+
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def user(db):
+    from app import models
+
+    u = models.User(email="learner@example.com", hashed_password="x", timezone="Asia/Kolkata")
+    db.add(u)
+    db.commit()
+    return u
+
+
+@pytest.fixture
+def client(session_factory, user, monkeypatch):
+    """TestClient on the real app with the sqlite session and `user` logged in."""
+    pytest.importorskip("chromadb")  # routers import the vector store
+    from fastapi.testclient import TestClient
+
+    from app import deps, streaming
+    from app.main import app
+    from app.routers import resources
+
+    def get_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    monkeypatch.setattr(streaming, "SessionLocal", session_factory)
+    app.dependency_overrides[deps.get_db] = get_db
+    app.dependency_overrides[resources.get_db] = get_db
+    app.dependency_overrides[deps.get_current_user] = lambda: user
+    yield TestClient(app)  # no `with`: startup (init_db on Postgres) is not run
+    app.dependency_overrides.clear()
@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+from sqlalchemy.dialects import postgresql
+
+pytest.importorskip("chromadb")
+
+from app.services import dedup  # noqa: E402
+
+FIELDS = dict.fromkeys(dedup.RESOURCE_FIELDS)
+
+
+def _rows(*titles):
+    return [dedup._row({**FIELDS, "title": t, "url": f"https://ex.com/{i}"}) for i, t in enumerate(titles)]
+
+
+@pytest.fixture
+def vectors(monkeypatch):
+    """Embeddings looked up by title (the resource doc starts with it); the index holds `indexed`."""
+    table = {}
+    indexed = []
+
+    def embed(docs):
+        return [table[d.split(" | ")[0]] for d in docs]
+
+    def nearest(vecs, k=1):
+        out = []
+        for v in vecs:
+            sims = sorted(((rid, float(np.dot(v, iv))) for rid, iv in indexed), key=lambda h: -h[1])
+            out.append(sims[:k])
+        return out
+
+    monkeypatch.setattr(dedup, "embed_texts", embed)
+    monkeypatch.setattr(dedup, "nearest", nearest)
+    return table, indexed
+
+
+def _unit(*xs):
+    v = np.asarray(xs, dtype=np.float32)
+    return (v / np.linalg.norm(v)).tolist()
+
+
+def test_row_adds_url_key():
+    row = dedup._row({"title": "t", "url": "https://www.ex.com/a/?utm_source=x", "extra": 1})
+    assert row["url_key"] == "ex.com/a"
+    assert set(row) == set(dedup.RESOURCE_FIELDS) | {"url_key"}
+
+
+def test_near_duplicate_of_indexed_resource(vectors):
+    table, indexed = vectors
+    table.update(a=_unit(1, 0), b=_unit(0, 1))
+    indexed.append(("existing", _unit(1, 0.01)))
+    dup, vecs = dedup._near_duplicates(_rows("a", "b"), threshold=0.95)
+    assert dup == [True, False]
+    assert vecs.shape == (2, 2)
+
+
+def test_near_duplicates_within_batch_first_wins(vectors):
+    table, _ = vectors
+    table.update(a=_unit(1, 0), a2=_unit(1, 0.02), b=_unit(0, 1), a3=_unit(1, 0.01))
+    dup, _ = dedup._near_duplicates(_rows("a", "a2", "b", "a3"), threshold=0.95)
+    assert dup == [False, True, False, True]
+
+
+def test_dropped_row_does_not_shadow_later_rows(vectors):
+    # "a" is a duplicate of the index, so "a2" (close to "a") has no kept earlier match
+    table, indexed = vectors
+    table.update(a=_unit(1, 0), a2=_unit(1, 0.1))
+    indexed.append(("existing", _unit(1, -0.3)))
+    dup, _ = dedup._near_duplicates(_rows("a", "a2"), threshold=0.95)
+    assert dup == [True, False]
+
+
+class _CaptureDb:
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, stmt):
+        self.statements.append(stmt)
+        return []
+
+
+def test_upsert_statement_updates_only_changed_rows(monkeypatch):
+    monkeypatch.setattr(dedup, "UPSERT_BATCH", 2)
+    db = _CaptureDb()
+    assert dedup._upsert(db, _rows("a", "b", "c")) == {}
+    assert len(db.statements) == 2  # batched
+
+    sql = str(db.statements[0].compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (url_key) DO UPDATE SET" in sql
+    assert "resources.title IS DISTINCT FROM excluded.title" in sql
+    assert "RETURNING resources.id, (xmax = 0) AS inserted" in sql
+    assert "url_key = excluded.url_key" not in sql  # the key itself is never rewritten
@@ -0,0 +1,131 @@
+import csv
+import datetime as dt
+import io
+import json
+
+import pytest
+
+from app import models
+from app.services import export
+
+
+def _row(**kw):
+    row = {
+        "plan_id": "p1", "target_role": "Data Scientist", "item_id": "i1", "week_no": 1, "day_no": 1,
+        "date": dt.date(2026, 10, 20), "title": "Intro", "url": "https://ex.com/a", "est_minutes": 30,
+        "type": "video", "required_skill": "python",
+    }
+    row.update(kw)
+    return row
+
+
+def _ics_lines(rows, tz="UTC"):
+    body = b"".join(export._ics(iter(rows), tz)).decode("utf-8")
+    assert body.endswith("\r\n")
+    return body.replace("\r\n ", "").split("\r\n")[:-1]  # unfold
+
+
+def test_zone_falls_back_to_utc():
+    assert str(export._zone("Asia/Kolkata")) == "Asia/Kolkata"
+    assert str(export._zone(None)) == "UTC"
+    assert export._zone("Not/AZone") is dt.timezone.utc
+    assert export._zone("../etc") is dt.timezone.utc
+
+
+def test_csv_header_and_chunks(monkeypatch):
+    monkeypatch.setattr(export, "CHUNK_ROWS", 2)
+    rows = [_row(item_id=f"i{n}", title=f'say "hi", {n}') for n in range(5)]
+    chunks = list(export._csv(iter(rows)))
+    assert len(chunks) == 3
+    parsed = list(csv.reader(io.StringIO(b"".join(chunks).decode("utf-8"))))
+    assert parsed[0] == export.COLUMNS
+    assert [r[export.COLUMNS.index("title")] for r in parsed[1:]] == [f'say "hi", {n}' for n in range(5)]
+    assert parsed[1][export.COLUMNS.index("date")] == "2026-10-20"
+
+
+def test_csv_without_rows_is_just_the_header():
+    assert b"".join(export._csv(iter([]))).decode("utf-8").splitlines() == [",".join(export.COLUMNS)]
+
+
+def test_ndjson_one_object_per_line():
+    out = b"".join(export._ndjson(iter([_row(), _row(item_id="i2", url=None)]))).decode("utf-8")
+    lines = out.splitlines()
+    assert len(lines) == 2 and out.endswith("\n")
+    assert json.loads(lines[0])["date"] == "2026-10-20"
+    assert json.loads(lines[1])["url"] is None
+    assert list(export._ndjson(iter([]))) == []
+
+
+def test_ics_text_escaping():
+    assert export._ics_text("a,b;c\\d\ne") == "a\\,b\\;c\\\\d\\ne"
+    assert export._ics_text(None) == ""
+
+
+def test_fold_limits_octets_and_keeps_utf8_whole():
+    line = "SUMMARY:" + "é" * 80
+    folded = export._fold(line)
+    parts = folded[:-2].split("\r\n ")
+    assert all(len(p.encode("utf-8")) <= 75 for p in parts[:1])
+    assert all(len(p.encode("utf-8")) <= 74 for p in parts[1:])
+    assert "".join(parts) == line
+    assert export._fold("SHORT") == "SHORT\r\n"
+
+
+def test_ics_event():
+    lines = _ics_lines([_row(title="SQL, joins; and more", required_skill="sql", est_minutes=45)], "Asia/Kolkata")
+    assert lines[0] == "BEGIN:VCALENDAR" and lines[-1] == "END:VCALENDAR"
+    assert "X-WR-TIMEZONE:Asia/Kolkata" in lines
+    event = lines[lines.index("BEGIN:VEVENT") : lines.index("END:VEVENT") + 1]
+    assert "UID:i1@skillsetu" in event
+    assert "DTSTART;VALUE=DATE:20261020" in event
+    assert "DTEND;VALUE=DATE:20261021" in event
+    assert "SUMMARY:SQL\\, joins\\; and more" in event
+    assert "DESCRIPTION:Data Scientist - week 1\\, day 1 (45 min)\\nSkill: sql" in event
+    assert "URL:https://ex.com/a" in event
+
+
+def test_ics_omits_empty_url_and_minutes():
+    lines = _ics_lines([_row(url="", est_minutes=0, required_skill=None)])
+    assert not any(line.startswith("URL:") for line in lines)
+    assert "DESCRIPTION:Data Scientist - week 1\\, day 1" in lines
+
+
+@pytest.fixture
+def plan(db, user):
+    # 20:00 UTC is already the next day in Asia/Kolkata (the user's timezone)
+    plan = models.Plan(user_id=user.id, target_role="Data Scientist", duration_weeks=2,
+                       created_at=dt.datetime(2026, 10, 19, 20, 0, tzinfo=dt.timezone.utc))
+    db.add(plan)
+    db.flush()
+    db.add_all([
+        models.PlanItem(plan_id=plan.id, week_no=2, day_no=3, title="later", est_minutes=30),
+        models.PlanItem(plan_id=plan.id, week_no=1, day_no=1, title="first", est_minutes=30),
+    ])
+    db.commit()
+    return plan
+
+
+def test_rows_are_dated_in_the_users_timezone(plan, user, session_factory, monkeypatch):
+    from app import streaming
+
+    monkeypatch.setattr(streaming, "SessionLocal", session_factory)
+    rows = list(export._rows(user.id, plan.id, export._zone(user.timezone)))
+    assert [(r["title"], r["date"]) for r in rows] == [
+        ("first", dt.date(2026, 10, 20)),
+        ("later", dt.date(2026, 10, 29)),
+    ]
+    utc = list(export._rows(user.id, None, dt.timezone.utc))
+    assert utc[0]["date"] == dt.date(2026, 10, 19)
+
+
+def test_export_endpoint(client, plan):
+    res = client.get(f"/plans/{plan.id}/export", params={"format": "ics"})
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/calendar")
+    assert 'filename="' in res.headers["content-disposition"]
+    assert "DTSTART;VALUE=DATE:20261020" in res.text
+
+    rows = [json.loads(line) for line in client.get("/plans/export", params={"format": "ndjson"}).text.splitlines()]
+    assert [r["title"] for r in rows] == ["first", "later"]
+    assert client.get("/plans/export", params={"format": "xml"}).status_code == 422
+    assert client.get("/plans/0192f0c8-0000-7000-8000-000000000000/export").status_code == 404
@@ -0,0 +1,133 @@
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app import ratelimit as rl
+from app.idempotency import MemoryIdempotency, SqlIdempotency, idempotency_keys
+from app.services.singleflight import SingleFlight
+
+
+@pytest.fixture(params=["memory", "sql"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemoryIdempotency(ttl=0.3)
+    return SqlIdempotency(rl.SqlBackend(f"sqlite:///{tmp_path}/idem.db").engine, ttl=0.3)
+
+
+def _counter():
+    calls = []
+
+    def fn():
+        calls.append(1)
+        return {"plan_id": f"p{len(calls)}"}
+    return calls, fn
+
+
+def test_repeat_replays_first_result(store):
+    calls, fn = _counter()
+    assert store.run("u|k", "h1", fn) == ({"plan_id": "p1"}, False)
+    assert store.run("u|k", "h1", fn) == ({"plan_id": "p1"}, True)
+    assert store.run("u|other", "h1", fn) == ({"plan_id": "p2"}, False)
+    assert len(calls) == 2
+
+
+def test_different_body_is_422(store):
+    calls, fn = _counter()
+    store.run("u|k", "h1", fn)
+    with pytest.raises(HTTPException) as e:
+        store.run("u|k", "h2", fn)
+    assert e.value.status_code == 422
+    assert len(calls) == 1
+
+
+def test_key_expires_after_ttl(store):
+    calls, fn = _counter()
+    store.run("u|k", "h1", fn)
+    time.sleep(0.35)
+    assert store.run("u|k", "h2", fn) == ({"plan_id": "p2"}, False)
+
+
+def test_failure_is_not_remembered(store):
+    def boom():
+        raise HTTPException(status_code=502, detail="model down")
+
+    with pytest.raises(HTTPException):
+        store.run("u|k", "h1", boom)
+    calls, fn = _counter()
+    assert store.run("u|k", "h1", fn) == ({"plan_id": "p1"}, False)
+
+
+def test_concurrent_repeats_wait_for_the_first(store):
+    gate = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        gate.wait(2)
+        return {"plan_id": "p1"}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(store.run("u|k", "h1", slow))) for _ in range(3)]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    gate.set()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True]
+
+
+def test_sql_keys_are_shared_between_workers(tmp_path):
+    url = f"sqlite:///{tmp_path}/shared.db"
+    a = SqlIdempotency(rl.SqlBackend(url).engine)
+    b = SqlIdempotency(rl.SqlBackend(url).engine)
+    calls, fn = _counter()
+    a.run("u|k", "h1", fn)
+    assert b.run("u|k", "h1", fn) == ({"plan_id": "p1"}, True)
+    with pytest.raises(HTTPException):
+        b.run("u|k", "h2", fn)
+    assert len(calls) == 1
+
+
+def test_sql_abandoned_pending_key_is_taken_over(tmp_path):
+    engine = rl.SqlBackend(f"sqlite:///{tmp_path}/stale.db").engine
+    dead = SqlIdempotency(engine, pending=0.2)
+    with engine.begin() as conn:  # a worker that claimed the key and died
+        conn.execute(idempotency_keys.insert().values(key="u|k", body_hash="h1", created_at=time.time()))
+    time.sleep(0.25)
+    calls, fn = _counter()
+    assert dead.run("u|k", "h1", fn) == ({"plan_id": "p1"}, False)
+
+
+def test_singleflight_coalesces_and_expires():
+    flights = SingleFlight(ttl=0.2)
+    gate = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        gate.wait(2)
+        return len(calls)
+
+    out = []
+    threads = [threading.Thread(target=lambda: out.append(flights.do("k", slow))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    assert flights.in_flight() == 1
+    gate.set()
+    for t in threads:
+        t.join()
+    assert sorted(out) == [(1, False), (1, True), (1, True), (1, True)]
+    assert flights.do("k", slow) == (1, True)  # replayed within ttl
+    time.sleep(0.25)
+    assert flights.do("k", slow) == (2, False)
+
+
+def test_singleflight_without_ttl_forgets_on_completion():
+    flights = SingleFlight()
+    assert flights.do("k", lambda: 1) == (1, False)
+    assert flights.do("k", lambda: 2) == (2, False)
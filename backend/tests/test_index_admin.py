@@ -0,0 +1,108 @@
+import json
+
+import numpy as np
+import pytest
+
+pytest.importorskip("chromadb")
+
+from app.services import chroma_client, index_admin, vector_store  # noqa: E402
+from app.services.embeddings import EMBED_MODEL  # noqa: E402
+from app.services.vector_store import NumpyStore  # noqa: E402
+
+NAME = "resources_test"
+
+
+@pytest.fixture
+def source(tmp_path):
+    """A numpy index directory, which is also a valid snapshot."""
+    store = NumpyStore(str(tmp_path / "src"), NAME, EMBED_MODEL)
+    rng = np.random.default_rng(0)
+    store.upsert(
+        ids=["a", "b", "c"],
+        embeddings=rng.normal(size=(3, 8)),
+        documents=["alpha", "beta", ""],
+        metadatas=[{"level": "beginner"}, {"level": "advanced"}, {}],  # "c" has no metadata
+    )
+    return store.path
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    client = chroma_client.get_client(str(tmp_path / "chroma"))
+    monkeypatch.setattr(index_admin, "get_client", lambda path=None: client)
+    return client
+
+
+def _info(capsys, name=NAME):
+    capsys.readouterr()
+    assert index_admin.main(["info", "--collection", name]) == 0
+    return json.loads(capsys.readouterr().out)
+
+
+def test_restore_keeps_non_default_hnsw_params(source, client, capsys):
+    assert index_admin.main(["restore", source, "--backend", "chroma", "--m", "8", "--ef-search", "40"]) == 0
+    assert json.loads(capsys.readouterr().out) == {"restored": 3}
+    assert _info(capsys)["metadata"]["hnsw:M"] == 8
+
+    # the app opening the collection must not reset it to the env defaults
+    col = chroma_client.get_collection(NAME, client=client)
+    assert col.count() == 3
+    assert _info(capsys)["metadata"]["hnsw:M"] == 8
+    assert _info(capsys)["metadata"]["hnsw:search_ef"] == 40
+
+
+def test_get_collection_creates_with_defaults(client):
+    col = chroma_client.get_collection("fresh_collection", client=client)
+    assert col.metadata == chroma_client.hnsw_metadata()
+    assert chroma_client.get_collection("fresh_collection", client=client).id == col.id
+
+
+def test_restore_records_without_metadata(source, client):
+    index_admin.restore(source, client=client)
+    got = client.get_collection(NAME).get(ids=["a", "c"], include=["metadatas", "documents"])
+    by_id = dict(zip(got["ids"], got["metadatas"]))
+    assert by_id["a"] == {"level": "beginner"}
+    assert not by_id["c"]
+
+
+def test_restore_swaps_over_live_collection(source, client):
+    index_admin.restore(source, client=client, m=8)
+    index_admin.restore(source, client=client, m=32)
+    names = sorted(c.name for c in client.list_collections())
+    assert names == [NAME]
+    assert client.get_collection(NAME).metadata["hnsw:M"] == 32
+
+
+def test_snapshot_roundtrip(source, client, tmp_path):
+    index_admin.restore(source, client=client)
+    manifest = index_admin.snapshot(str(tmp_path / "snap"), NAME)
+    assert manifest["count"] == 3 and manifest["dim"] == 8
+    _, matrix, records = index_admin.load_snapshot(str(tmp_path / "snap"))
+    assert matrix.shape == (3, 8)
+    assert {r["id"] for r in records} == {"a", "b", "c"}
+
+
+def test_restore_numpy_is_seen_by_open_store(source, tmp_path, monkeypatch):
+    monkeypatch.setattr(vector_store, "NUMPY_INDEX_DIR", str(tmp_path / "numpy"))
+    monkeypatch.setattr(vector_store, "_stores", {})
+    live = vector_store.get_store(NAME, backend="numpy")
+    assert live.count() == 0
+
+    assert index_admin.restore(source, backend="numpy") == 3
+    assert sorted(live.ids()) == ["a", "b", "c"]
+    # the install went through the store's lock file
+    assert (tmp_path / "numpy" / NAME / ".lock").exists()
+    live.upsert(["d"], np.ones((1, 8)), ["delta"], [{"level": "beginner"}])
+    assert live.count() == 4
+
+
+def test_restore_refuses_other_embedding_model(source, client):
+    manifest_path = f"{source}/manifest.json"
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    manifest["embedding_model"] = "other/model"
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f)
+    with pytest.raises(ValueError, match="--force"):
+        index_admin.restore(source, client=client)
+    assert index_admin.restore(source, client=client, force=True) == 3
@@ -0,0 +1,61 @@
+import pytest
+
+from app.services.json_repair import JSONRepairError, parse_partial
+
+WEEK_1 = '{"week":1,"items":[{"day":1,"title":"a"},{"day":2,"title":"b"}]}'
+
+
+def test_complete_object():
+    r = parse_partial('{"a": 1, "b": [1, 2.5, -3e2], "c": {"d": null}}')
+    assert r.value == {"a": 1, "b": [1, 2.5, -300.0], "c": {"d": None}}
+    assert r.complete
+
+
+def test_truncated_keeps_closed_containers():
+    r = parse_partial('{"weeks":[' + WEEK_1 + ',{"week":2,"items":[{"day":1,"title":"c"},{"day":2,"ti')
+    w1, w2 = r.value["weeks"]
+    assert not r.complete
+    assert r.is_complete(w1) and not r.is_complete(w2)
+    assert r.is_complete(w2["items"][0]) and not r.is_complete(w2["items"][1])
+    assert w2["items"][0] == {"day": 1, "title": "c"}
+
+
+def test_truncated_value_is_dropped():
+    r = parse_partial('{"goal": "x", "summary": "half a sent')
+    assert r.value == {"goal": "x"}
+    assert not r.complete
+
+
+def test_malformed_token_keeps_what_was_read():
+    r = parse_partial('{"weeks":[' + WEEK_1 + ',{"week":2,"items":[{"day":1,"title" "b"}]}]}')
+    w1, w2 = r.value["weeks"]
+    assert r.is_complete(w1) and w1["items"][1]["title"] == "b"
+    assert not r.is_complete(w2) and not r.is_complete(r.value)
+
+
+@pytest.mark.parametrize("bad", ['[1, 2, @]', '{"a": 1, "b": 1.2.3', '{"a": tru}', '{"a": 1, 5: 2}'])
+def test_malformed_does_not_raise(bad):
+    r = parse_partial(bad)
+    assert not r.complete
+
+
+def test_code_fence_and_prose():
+    r = parse_partial('Here is the plan:\n```json\n{"a": [1, 2]}\n```\nHope it helps!')
+    assert r.value == {"a": [1, 2]}
+    assert r.complete
+
+
+def test_python_literals_single_quotes_and_commas():
+    r = parse_partial("{'a': True, 'b': None, 'c': False, d: 'it\\'s', 'e': [1, 2,],}")
+    assert r.value == {"a": True, "b": None, "c": False, "d": "it's", "e": [1, 2]}
+    assert r.complete
+
+
+def test_missing_commas():
+    r = parse_partial('{"a": 1 "b": [1 2]}')
+    assert r.value == {"a": 1, "b": [1, 2]}
+
+
+def test_no_json_raises():
+    with pytest.raises(JSONRepairError):
+        parse_partial("sorry, I can't help with that")
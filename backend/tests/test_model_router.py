@@ -0,0 +1,82 @@
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app.services import model_router as mr
+
+
+@pytest.fixture(autouse=True)
+def two_models(monkeypatch):
+    monkeypatch.setattr(mr, "OLLAMA_MODEL_SMALL", "small")
+    monkeypatch.setattr(mr, "OLLAMA_MODEL_LARGE", "large")
+    monkeypatch.setattr(mr, "_history", {})
+
+
+def _feed(model: str, n: int, ok: bool = True, ms: float = 1000.0, items: int = 10) -> None:
+    for _ in range(n):
+        mr.record(model, ok, ms, items)
+
+
+def test_route_by_size():
+    assert mr.route(7) == ["small", "large"]
+    assert mr.route(mr.LARGE_MODEL_MIN_ITEMS) == ["large", "small"]
+
+
+def test_route_demotes_failing_model():
+    _feed("small", mr.MIN_SAMPLES, ok=False)
+    assert mr.route(7) == ["large", "small"]
+
+
+def test_route_demotes_model_too_slow_for_deadline():
+    _feed("large", mr.MIN_SAMPLES, ms=3000.0, items=1)  # 3s/item
+    _feed("small", mr.MIN_SAMPLES, ms=500.0, items=1)
+    items = mr.LARGE_MODEL_MIN_ITEMS
+    assert mr.route(items) == ["large", "small"]  # no deadline: size decides
+    assert mr.route(items, time_left=items * 3 + 10) == ["large", "small"]  # large still fits
+    assert mr.route(items, time_left=items * 1) == ["small", "large"]
+
+
+def test_route_keeps_order_without_latency_history():
+    _feed("large", mr.MIN_SAMPLES - 1, ms=99999.0, items=1)
+    assert mr.route(mr.LARGE_MODEL_MIN_ITEMS, time_left=1) == ["large", "small"]
+
+
+def test_fallback_and_recording():
+    def fn(model):
+        if model == "small":
+            raise HTTPException(status_code=502, detail="bad json")
+        return model
+
+    assert mr.call_with_fallback(["small", "large"], fn, items=7) == "large"
+    assert [(ok, items) for ok, _, items in mr._history["small"]] == [(False, 7)]
+    assert [(ok, items) for ok, _, items in mr._history["large"]] == [(True, 7)]
+
+
+def test_no_fallback_on_other_errors():
+    def fn(model):
+        raise HTTPException(status_code=500, detail="boom")
+
+    with pytest.raises(HTTPException) as e:
+        mr.call_with_fallback(["small", "large"], fn)
+    assert e.value.status_code == 500
+    assert "large" not in mr._history
+
+
+def test_no_fallback_past_deadline():
+    calls = []
+
+    def fn(model):
+        calls.append(model)
+        raise HTTPException(status_code=504, detail="timeout")
+
+    with pytest.raises(HTTPException):
+        mr.call_with_fallback(["small", "large"], fn, deadline=time.monotonic() - 1)
+    assert calls == ["small"]
+
+
+def test_stats_report_latency_per_item():
+    _feed("small", mr.MIN_SAMPLES, ms=700.0, items=7)
+    stats = mr.model_stats()["models"]["small"]
+    assert stats["ms_per_item_p50"] == 100.0
+    assert stats["success_rate"] == 1.0
@@ -0,0 +1,80 @@
+import uuid
+
+import pytest
+
+from app import models
+
+
+@pytest.fixture
+def plans(db, user):
+    """Two plans of `user`, each with two items, progress on one item and a recommendation."""
+    resource = models.Resource(title="r", url="https://ex.com/r", url_key="ex.com/r")
+    db.add(resource)
+    out = []
+    for n in range(2):
+        plan = models.Plan(user_id=user.id, target_role=f"role {n}", duration_weeks=1)
+        db.add(plan)
+        db.flush()
+        items = [models.PlanItem(plan_id=plan.id, week_no=1, day_no=d, title=f"d{d}") for d in (1, 2)]
+        db.add_all(items)
+        db.flush()
+        db.add(models.Progress(user_id=user.id, plan_id=plan.id, item_id=items[0].id, status="done"))
+        db.add(models.PlanRecommendation(plan_id=plan.id, item_id=items[0].id, rank=1,
+                                         resource_id=resource.id, score=0.9))
+        out.append(plan)
+    db.commit()
+    return [p.id for p in out]
+
+
+def _counts(session_factory):
+    with session_factory() as s:
+        return {
+            m.__tablename__: s.query(m).count()
+            for m in (models.Plan, models.PlanItem, models.Progress, models.PlanRecommendation)
+        }
+
+
+def test_delete_plan_cascades_in_the_database(client, plans, session_factory):
+    assert client.delete(f"/plans/{plans[0]}").json() == {"deleted": True, "plan_id": str(plans[0])}
+    assert _counts(session_factory) == {"plans": 1, "plan_items": 2, "progress": 1, "plan_recommendations": 1}
+    assert client.delete(f"/plans/{plans[0]}").status_code == 404
+
+
+def test_orm_delete_leaves_children_to_the_database(db, plans, session_factory):
+    db.delete(db.get(models.Plan, plans[1]))
+    db.commit()
+    assert _counts(session_factory)["plan_items"] == 2
+
+
+def test_bulk_delete_returns_only_owned_ids(client, db, plans, session_factory):
+    other = models.User(email="other@example.com", hashed_password="x")
+    db.add(other)
+    db.flush()
+    foreign = models.Plan(user_id=other.id, target_role="x", duration_weeks=1)
+    db.add(foreign)
+    db.commit()
+
+    body = client.post("/plans/bulk", json={
+        "plan_ids": [str(plans[0]), str(foreign.id), str(uuid.uuid4())], "action": "delete",
+    }).json()
+    assert body == {"action": "delete", "affected": 1, "plan_ids": [str(plans[0])]}
+    assert _counts(session_factory) == {"plans": 2, "plan_items": 2, "progress": 1, "plan_recommendations": 1}
+
+
+def test_bulk_archive(client, plans, session_factory):
+    body = client.post("/plans/bulk", json={"plan_ids": [str(p) for p in plans], "action": "archive"}).json()
+    assert body["affected"] == 2
+    assert sorted(body["plan_ids"]) == sorted(str(p) for p in plans)
+    with session_factory() as s:
+        assert {p.status for p in s.query(models.Plan)} == {"archived"}
+    assert _counts(session_factory)["plan_items"] == 4
+
+
+@pytest.mark.parametrize("payload", [
+    {"plan_ids": [], "action": "delete"},
+    {"plan_ids": ["not-a-uuid"], "action": "delete"},
+    {"plan_ids": [str(uuid.uuid4())], "action": "purge"},
+])
+def test_bulk_rejects_bad_payloads(client, payload):
+    assert client.post("/plans/bulk", json=payload).status_code == 422
+
@@ -0,0 +1,120 @@
+from typing import List
+
+import pytest
+
+from app.services import planner
+from app.services.json_repair import parse_partial
+from app.services.planner import _continuation_prompt, _salvage_weeks
+
+
+def _week(n: int, *titles: str) -> str:
+    items = ",".join(f'{{"day":{d},"title":"{t}"}}' for d, t in enumerate(titles, start=1))
+    return f'{{"week":{n},"items":[{items}]}}'
+
+
+def test_salvage_truncated_output():
+    text = '{"weeks":[' + _week(1, "a", "b") + ',' + _week(2, "c") + ',{"week":3,"items":[{"day":1,"title":"d"'
+    weeks = _salvage_weeks(parse_partial(text), 4)
+    assert sorted(weeks) == [1, 2]
+    assert [it["title"] for it in weeks[1]["items"]] == ["a", "b"]
+
+
+def test_salvage_malformed_output_keeps_earlier_weeks():
+    text = '{"weeks":[' + _week(1, "a") + ',{"week":2,"items":[{"day":1,"title" "b"}]}]}'
+    weeks = _salvage_weeks(parse_partial(text), 2)
+    assert list(weeks) == [1]
+
+
+def test_salvage_fenced_python_literals():
+    text = "```json\n{'weeks': [{'week': 1, 'items': [{'day': 1, 'title': 'a', 'done': False}]}]}\n```"
+    weeks = _salvage_weeks(parse_partial(text), 1)
+    assert weeks[1]["items"] == [{"day": 1, "title": "a", "done": False}]
+
+
+def test_salvage_drops_out_of_range_duplicate_and_untitled():
+    text = '{"weeks":[' + ",".join([
+        _week(1, "a"), _week(1, "dup"), _week(9, "x"), '{"week":"two","items":[]}',
+        '{"week":2,"items":[{"day":1,"title":""},{"day":2}]}', _week(3, "c"),
+    ]) + ']}'
+    weeks = _salvage_weeks(parse_partial(text), 3)
+    assert sorted(weeks) == [1, 3]
+    assert weeks[1]["items"][0]["title"] == "a"
+
+
+def test_salvage_without_weeks():
+    assert _salvage_weeks(parse_partial('["not", "a", "plan"]'), 4) == {}
+    assert _salvage_weeks(parse_partial('{"summary": "no weeks"}'), 4) == {}
+
+
+def _complete_weeks(*numbers: int) -> dict:
+    return {n: {"week": n, "items": [{"day": 1, "title": f"t{n}"}]} for n in numbers}
+
+
+def test_continuation_prompt_asks_only_for_missing_weeks():
+    prompt = _continuation_prompt("Data Scientist", ["python"], 4, _complete_weeks(1, 3), [2, 4])
+    assert "weeks contains ONLY these week numbers: 2, 4" in prompt
+    assert "Already planned: t1; t3" in prompt
+    assert "Current skills: python" in prompt and "Duration weeks: 4" in prompt
+
+
+def test_continuation_prompt_caps_context_titles():
+    have = {1: {"week": 1, "items": [{"title": f"x{i}"} for i in range(100)]}}
+    prompt = _continuation_prompt("g", [], 2, have, [2])
+    assert f"; x{planner.CONTINUATION_CONTEXT_TITLES - 1}\n" in prompt
+    assert f"x{planner.CONTINUATION_CONTEXT_TITLES}" not in prompt
+
+
+@pytest.fixture
+def replies(monkeypatch):
+    """Queue model outputs for plan_with_ollama; records the prompts it sent."""
+    queue: List[str] = []
+    prompts: List[str] = []
+
+    def fake_generate(prompt, temperature=0.1, model=None, options=None, timeout=None):
+        prompts.append(prompt)
+        return parse_partial(queue.pop(0))
+
+    monkeypatch.setattr(planner, "generate_json_partial", fake_generate)
+    return queue, prompts
+
+
+def test_complete_output_is_normalized(replies):
+    queue, prompts = replies
+    queue.append('{"summary": "s", "weeks":[' + ",".join([_week(2, "b"), _week(1, "a"), _week(1, "dup"), _week(7, "x")]) + "]}")
+    plan = planner.plan_with_ollama("g", [], 2)
+    assert len(prompts) == 1
+    assert plan == {"summary": "s", "weeks": [
+        {"week": 1, "items": [{"day": 1, "title": "a"}]},
+        {"week": 2, "items": [{"day": 1, "title": "b"}]},
+    ]}
+
+
+def test_truncated_output_is_continued(replies):
+    queue, prompts = replies
+    queue.append('{"summary": "s", "weeks":[' + _week(1, "a") + ',{"week":2,"items":[{"day":1,')
+    queue.append('{"weeks":[' + _week(2, "b") + "," + _week(1, "again") + "]}")
+    plan = planner.plan_with_ollama("g", [], 2)
+    assert "ONLY these week numbers: 2" in prompts[1]
+    assert [w["week"] for w in plan["weeks"]] == [1, 2]
+    assert plan["weeks"][0]["items"][0]["title"] == "a"  # continuation can't overwrite a week
+
+
+def test_continuations_stop_when_time_budget_is_spent(replies, monkeypatch):
+    queue, prompts = replies
+    monkeypatch.setattr(planner, "PLAN_TIME_BUDGET_SECONDS", planner.MIN_CONTINUATION_SECONDS - 1)
+    queue.append('{"summary": "s", "weeks":[' + _week(1, "a") + "]}")
+    plan = planner.plan_with_ollama("g", [], 3)
+    assert len(prompts) == 1
+    assert [w["week"] for w in plan["weeks"]] == [1]
+
+
+def test_generation_gets_remaining_time(monkeypatch):
+    seen = []
+
+    def fake_generate(prompt, temperature=0.1, model=None, options=None, timeout=None):
+        seen.append(timeout)
+        return parse_partial('{"weeks":[' + _week(1, "a") + "]}")
+
+    monkeypatch.setattr(planner, "generate_json_partial", fake_generate)
+    planner.plan_with_ollama("g", [], 1)
+    assert 0 < seen[0] <= planner.PLAN_TIME_BUDGET_SECONDS
@@ -0,0 +1,137 @@
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app import ratelimit as rl
+
+LLM_SLOTS = rl.CONCURRENCY["llm"]
+
+
+@pytest.fixture(params=["memory", "sql"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return rl.MemoryBackend()
+    return rl.SqlBackend(f"sqlite:///{tmp_path}/ratelimit.db")
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(rl.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def use_backend(monkeypatch):
+    def install(b):
+        monkeypatch.setattr(rl, "_backend", b)
+        return b
+    return install
+
+
+def test_refill_and_take():
+    assert rl._refill(0.0, 0.0, 10.0, capacity=3, rate=0.1) == 1.0
+    assert rl._refill(2.5, 0.0, 100.0, capacity=3, rate=0.1) == 3.0  # capped
+    assert rl._take(1.5, rate=0.5) == (0.5, 0.0)
+    assert rl._take(0.5, rate=0.5) == (0.5, 1.0)
+
+
+def test_bucket_burst_then_refill(backend, clock):
+    for _ in range(3):
+        assert backend.take("u:llm", 3, 0.1) == 0.0
+    assert backend.take("u:llm", 3, 0.1) == pytest.approx(10.0)
+    assert backend.take("other:llm", 3, 0.1) == 0.0  # buckets are per key
+    clock[0] += 10.0
+    assert backend.take("u:llm", 3, 0.1) == 0.0
+    assert backend.take("u:llm", 3, 0.1) > 0
+
+
+def test_sql_buckets_are_shared(tmp_path, clock):
+    a = rl.SqlBackend(f"sqlite:///{tmp_path}/shared.db")
+    b = rl.SqlBackend(f"sqlite:///{tmp_path}/shared.db")
+    assert a.take("u:llm", 1, 0.01) == 0.0
+    assert b.take("u:llm", 1, 0.01) > 0
+
+
+def test_slots_acquire_release(backend):
+    leases = [backend.acquire("llm", 0.0) for _ in range(LLM_SLOTS)]
+    assert all(leases)
+    assert backend.acquire("llm", 0.05) is None
+    backend.release("llm", leases[0])
+    lease = backend.acquire("llm", 0.5)
+    assert lease is not None
+    for held in [lease, *leases[1:]]:
+        backend.release("llm", held)
+
+
+def test_sql_slots_are_shared(tmp_path):
+    url = f"sqlite:///{tmp_path}/slots.db"
+    a, b = rl.SqlBackend(url), rl.SqlBackend(url)
+    leases = [a.acquire("llm", 0.0) for _ in range(LLM_SLOTS)]
+    assert b.acquire("llm", 0.05) is None
+    a.release("llm", leases[0])
+    assert b.acquire("llm", 0.5) is not None
+
+
+def test_sql_waiter_gets_released_slot(tmp_path):
+    b = rl.SqlBackend(f"sqlite:///{tmp_path}/wait.db")
+    leases = [b.acquire("llm", 0.0) for _ in range(LLM_SLOTS)]
+    threading.Timer(0.1, b.release, args=("llm", leases[0])).start()
+    assert b.acquire("llm", 2.0) is not None
+
+
+def test_sql_dead_holder_lease_expires(tmp_path):
+    b = rl.SqlBackend(f"sqlite:///{tmp_path}/expire.db", lease_seconds=0.3)
+    for _ in range(LLM_SLOTS):
+        assert b._claim("llm", uuid.uuid4().hex)  # claimed by a worker that never renews
+    assert b.acquire("llm", 0.05) is None
+    time.sleep(0.35)
+    assert b.acquire("llm", 0.0) is not None
+
+
+def test_sql_held_lease_is_renewed(tmp_path):
+    url = f"sqlite:///{tmp_path}/renew.db"
+    a = rl.SqlBackend(url, lease_seconds=0.3)
+    b = rl.SqlBackend(url, lease_seconds=0.3)
+    leases = [a.acquire("llm", 0.0) for _ in range(LLM_SLOTS)]
+    time.sleep(0.8)  # well past the original expiry
+    assert b.acquire("llm", 0.0) is None
+    for lease in leases:
+        a.release("llm", lease)
+    assert b.acquire("llm", 0.0) is not None
+
+
+def test_charge_raises_429_with_retry_after(use_backend, clock):
+    use_backend(rl.MemoryBackend())
+    user = SimpleNamespace(id=uuid.uuid4())
+    capacity, rate = rl.LIMITS["llm"]
+    for _ in range(capacity):
+        rl.charge(user, "llm")
+    with pytest.raises(HTTPException) as e:
+        rl.charge(user, "llm")
+    assert e.value.status_code == 429
+    assert int(e.value.headers["Retry-After"]) >= 1
+
+
+def test_admission_raises_503_when_saturated(use_backend):
+    use_backend(rl.MemoryBackend())
+    with rl.admission("embed", wait=0):
+        with pytest.raises(HTTPException) as e:
+            with rl.admission("embed", wait=0):
+                pass
+    assert e.value.status_code == 503
+    assert e.value.headers["Retry-After"] == str(rl.settings.ADMISSION_RETRY_AFTER)
+    with rl.admission("embed", wait=0):  # released on exit
+        pass
+
+
+def test_admission_releases_on_error(use_backend, tmp_path):
+    b = use_backend(rl.SqlBackend(f"sqlite:///{tmp_path}/err.db"))
+    with pytest.raises(RuntimeError):
+        with rl.admission("embed", wait=0):
+            raise RuntimeError("work failed")
+    assert b.acquire("embed", 0.0) is not None
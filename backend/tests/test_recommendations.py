@@ -0,0 +1,124 @@
+from contextlib import contextmanager
+
+import pytest
+from fastapi import HTTPException
+
+from app import models
+from app.services import recommendations as rec
+
+
+class FakeStore:
+    """Vector store that answers every query with the same ranked resource ids."""
+
+    def __init__(self, ids=()):
+        self.ids = list(ids)
+        self.queries = []
+
+    def query(self, embeddings, k, where=None):
+        self.queries.append(len(embeddings))
+        return [[(rid, 1.0 - i / 10, {}) for i, rid in enumerate(self.ids[:k])] for _ in embeddings]
+
+
+@pytest.fixture
+def plan(db, user):
+    plan = models.Plan(user_id=user.id, target_role="Backend Developer", duration_weeks=1)
+    db.add(plan)
+    db.flush()
+    for day, skill in enumerate(["SQL", "sql", "Docker"], start=1):
+        db.add(models.PlanItem(plan_id=plan.id, week_no=1, day_no=day, title=f"day {day}", required_skill=skill))
+    db.commit()
+    return plan
+
+
+@pytest.fixture
+def resources(db):
+    rows = [models.Resource(title=f"r{i}", url=f"https://example.com/{i}") for i in range(3)]
+    db.add_all(rows)
+    db.commit()
+    return rows
+
+
+@pytest.fixture
+def store(monkeypatch, session_factory):
+    fake = FakeStore()
+    monkeypatch.setattr(rec, "get_store", lambda: fake)
+    monkeypatch.setattr(rec, "embed_texts", lambda texts: [[1.0, 0.0]] * len(texts))
+    monkeypatch.setattr(rec, "SessionLocal", session_factory)
+    return fake
+
+
+def _computed_at(session_factory, plan):
+    with session_factory() as s:
+        return s.get(models.Plan, plan.id).recommendations_computed_at
+
+
+def test_first_read_is_pending_then_served(client, plan, resources, store, session_factory):
+    store.ids = [str(r.id) for r in resources[:2]]
+    first = client.get(f"/plans/{plan.id}/recommendations").json()
+    assert first == {"plan_id": str(plan.id), "pending": True, "items": []}
+    # TestClient runs the background refresh before returning; "SQL" and "sql" embed once
+    assert store.queries == [2]
+
+    body = client.get(f"/plans/{plan.id}/recommendations").json()
+    assert body["pending"] is False
+    assert len(body["items"]) == 3
+    for item in body["items"]:
+        assert [r["id"] for r in item["resources"]] == store.ids
+        assert [r["rank"] for r in item["resources"]] == [1, 2]
+    assert store.queries == [2]
+
+
+def test_busy_refresh_leaves_plan_pending(client, plan, resources, store, session_factory, monkeypatch):
+    waits = []
+
+    @contextmanager
+    def busy(work_class, wait=None):
+        waits.append(wait)
+        raise HTTPException(status_code=503, detail="busy")
+        yield
+
+    monkeypatch.setattr(rec, "admission", busy)
+    assert client.get(f"/plans/{plan.id}/recommendations").json()["pending"] is True
+    assert waits == [0]  # never blocks a threadpool thread waiting for a slot
+    assert _computed_at(session_factory, plan) is None
+    assert client.get(f"/plans/{plan.id}/recommendations").json()["pending"] is True
+    assert waits == [0, 0]
+
+
+def test_computed_but_empty_is_not_pending(client, plan, store, session_factory):
+    store.ids = ["0192f0c8-0000-7000-8000-000000000000"]  # not in the resources table
+    client.get(f"/plans/{plan.id}/recommendations")
+    assert _computed_at(session_factory, plan) is not None
+
+    body = client.get(f"/plans/{plan.id}/recommendations").json()
+    assert body == {"plan_id": str(plan.id), "pending": False, "items": []}
+    assert store.queries == [2]  # no second refresh scheduled
+
+
+def test_item_id_filter(client, db, plan, resources, store):
+    store.ids = [str(resources[0].id)]
+    rec.refresh_plans(db, [plan.id])
+    item = db.query(models.PlanItem).filter_by(plan_id=plan.id, day_no=3).one()
+
+    body = client.get(f"/plans/{plan.id}/recommendations", params={"item_id": str(item.id)}).json()
+    assert [i["item_id"] for i in body["items"]] == [str(item.id)]
+    assert body["items"][0]["resources"][0]["id"] == str(resources[0].id)
+
+
+def test_other_users_plan_is_not_found(client, db, store):
+    other = models.User(email="other@example.com", hashed_password="x")
+    db.add(other)
+    db.flush()
+    plan = models.Plan(user_id=other.id, target_role="x", duration_weeks=1)
+    db.add(plan)
+    db.commit()
+    assert client.get(f"/plans/{plan.id}/recommendations").status_code == 404
+    assert store.queries == []
+
+
+def test_refresh_replaces_previous_rows(db, plan, resources, store):
+    store.ids = [str(r.id) for r in resources]
+    assert rec.refresh_plans(db, [plan.id]) == 9
+    store.ids = [str(resources[2].id)]
+    assert rec.refresh_plans(db, [plan.id]) == 3
+    assert {r.resource_id for r in db.query(models.PlanRecommendation)} == {resources[2].id}
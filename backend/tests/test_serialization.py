@@ -0,0 +1,75 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from app import models, schemas
+from app.streaming import check_row, json_array
+
+
+def _resources(db, n):
+    rows = [
+        models.Resource(title=f"r{i}", url=f"https://example.com/{i}", source="docs" if i % 2 else None,
+                        tags="a,b", level="beginner", lang="en", duration_min=i or None)
+        for i in range(n)
+    ]
+    db.add_all(rows)
+    db.commit()
+    return rows
+
+
+def _plan(db, user, weeks=2):
+    plan = models.Plan(user_id=user.id, target_role="Data Scientist", duration_weeks=weeks, summary="s",
+                       created_at=datetime(2026, 10, 19, 8, 30, tzinfo=timezone.utc))
+    db.add(plan)
+    db.flush()
+    for w in range(weeks, 0, -1):
+        for d in (2, 1):
+            db.add(models.PlanItem(plan_id=plan.id, week_no=w, day_no=d, title=f"w{w}d{d}",
+                                   url="", est_minutes=30, type="video", required_skill="python"))
+    db.commit()
+    db.refresh(plan)
+    return plan
+
+
+def test_streamed_resources_match_response_model(client, db):
+    rows = _resources(db, 7)
+    streamed = client.get("/resources/", params={"limit": 100}).json()
+    expected = [schemas.ResourceOut.model_validate(r).model_dump(mode="json") for r in sorted(rows, key=lambda r: r.id)]
+    assert streamed == expected
+
+
+def test_streamed_resources_paging(client, db):
+    rows = sorted(_resources(db, 5), key=lambda r: r.id)
+    page = client.get("/resources/", params={"limit": 2, "offset": 2}).json()
+    assert [r["id"] for r in page] == [str(r.id) for r in rows[2:4]]
+    assert client.get("/resources/", params={"offset": 10}).json() == []
+
+
+def test_plan_list_and_detail_match_pydantic(client, db, user):
+    plan = _plan(db, user)
+    listed = client.get("/plans/").json()
+    assert listed == [schemas.PlanSummaryOut.model_validate(plan).model_dump(mode="json")]
+    detail = client.get(f"/plans/{plan.id}").json()
+    assert detail == json.loads(schemas.PlanOut.model_validate(plan).model_dump_json())
+    assert [(i["week_no"], i["day_no"]) for i in detail["items"]] == [(1, 1), (1, 2), (2, 1), (2, 2)]
+
+
+def test_json_array_batches():
+    rows = [{"a": i} for i in range(5)]
+    chunks = list(json_array(rows, batch=2))
+    assert json.loads(b"".join(chunks)) == rows
+    assert len(chunks) == 5  # "[", 3 batches, "]"
+    assert b"".join(json_array([])) == b"[]"
+
+
+def test_json_array_rejects_rows_that_drift_from_the_schema():
+    good = {f: None for f in schemas.ResourceOut.model_fields} | {
+        "id": "0192f0c8-0000-7000-8000-000000000000", "title": "t", "url": "u"}
+    assert json.loads(b"".join(json_array([good], model=schemas.ResourceOut))) == [good]
+    with pytest.raises(ValueError, match="unexpected \\['url_key'\\]"):
+        list(json_array([{**good, "url_key": "u"}], model=schemas.ResourceOut))
+    with pytest.raises(ValueError, match="missing \\['title'\\]"):
+        check_row({k: v for k, v in good.items() if k != "title"}, schemas.ResourceOut)
+    with pytest.raises(ValueError):
+        check_row({**good, "duration_min": "long"}, schemas.ResourceOut)
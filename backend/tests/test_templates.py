@@ -0,0 +1,120 @@
+import json
+
+import pytest
+
+from app.services import templates
+
+
+def _plan(weeks: int, per_week: int, skill=lambda w, d: f"s{w}") -> dict:
+    return {
+        "summary": "template",
+        "weeks": [
+            {"week": w, "items": [{"day": d, "title": f"w{w}d{d}", "skill": skill(w, d)} for d in range(1, per_week + 1)]}
+            for w in range(1, weeks + 1)
+        ],
+    }
+
+
+def _titles(plan: dict) -> list:
+    return [it["title"] for w in plan["weeks"] for it in w["items"]]
+
+
+def _check_shape(plan: dict, weeks: int) -> None:
+    assert [w["week"] for w in plan["weeks"]] == list(range(1, weeks + 1))
+    for w in plan["weeks"]:
+        assert templates.TEMPLATE_MIN_ITEMS_PER_WEEK <= len(w["items"]) <= templates.TEMPLATE_MAX_ITEMS_PER_WEEK
+        assert [it["day"] for it in w["items"]] == list(range(1, len(w["items"]) + 1))
+
+
+def test_adapt_compresses_without_overfilling_weeks():
+    out = templates.adapt_template(_plan(24, 7), [], 12)
+    _check_shape(out, 12)
+    titles = _titles(out)
+    assert len(titles) == 12 * 7
+    assert titles[0] == "w1d1"
+    assert titles == sorted(titles, key=_titles(_plan(24, 7)).index)  # curriculum order kept
+
+
+def test_adapt_expands_over_more_weeks():
+    out = templates.adapt_template(_plan(4, 6), [], 8)
+    _check_shape(out, 8)
+    assert _titles(out) == _titles(_plan(4, 6))
+
+
+def test_adapt_drops_known_skills():
+    out = templates.adapt_template(_plan(4, 5), ["S1", " s2 "], 2)
+    _check_shape(out, 2)
+    assert all(it["skill"] not in ("s1", "s2") for w in out["weeks"] for it in w["items"])
+    assert len(_titles(out)) == 10
+
+
+def test_adapt_rejects_too_little_left():
+    assert templates.adapt_template(_plan(2, 5), [], 4) is None  # 10 items < 4 * 3
+    assert templates.adapt_template(_plan(4, 5), ["s1", "s2", "s3"], 2) is None
+
+
+class FakeCollection:
+    """Stored templates with a fixed cosine distance to every query."""
+
+    def __init__(self, entries):
+        self.entries = entries  # (distance, weeks, template)
+        self.where = None
+
+    def count(self):
+        return len(self.entries)
+
+    def query(self, query_embeddings, n_results, where):
+        self.where = where
+        lo, hi = where["$and"][0]["weeks"]["$gte"], where["$and"][1]["weeks"]["$lte"]
+        hits = sorted(e for e in self.entries if lo <= e[1] <= hi)[:n_results]
+        return {
+            "ids": [[str(i) for i in range(len(hits))]],
+            "distances": [[d for d, _, _ in hits]],
+            "documents": [[json.dumps(t) for _, _, t in hits]],
+        }
+
+
+@pytest.fixture
+def store(monkeypatch):
+    def install(entries):
+        col = FakeCollection(entries)
+        monkeypatch.setattr(templates, "get_collection", lambda name: col)
+        monkeypatch.setattr(templates, "embed_texts", lambda texts: [[0.0] for _ in texts])
+        return col
+    return install
+
+
+def test_match_above_similarity_threshold(store):
+    store([(0.05, 8, _plan(8, 5))])
+    out = templates.find_template("Data Scientist", [], 8)
+    _check_shape(out, 8)
+
+
+def test_match_below_similarity_threshold_misses(store):
+    store([(1 - templates.TEMPLATE_MIN_SIMILARITY + 0.01, 8, _plan(8, 5))])
+    assert templates.find_template("Data Scientist", [], 8) is None
+
+
+def test_match_duration_window(store):
+    col = store([(0.01, 3, _plan(3, 7)), (0.02, 17, _plan(17, 7)), (0.03, 16, _plan(16, 7))])
+    out = templates.find_template("Data Scientist", [], 8)
+    assert col.where == {"$and": [{"weeks": {"$gte": 4}}, {"weeks": {"$lte": 16}}]}
+    _check_shape(out, 8)
+    assert len(_titles(out)) == 8 * 7  # the 16-week template, compressed
+
+
+def test_match_skips_unadaptable_candidates(store):
+    store([(0.01, 8, _plan(8, 2)), (0.02, 8, _plan(8, 4))])
+    out = templates.find_template("Data Scientist", [], 8)
+    assert len(_titles(out)) == 32
+
+
+def test_empty_library_misses(store):
+    store([])
+    assert templates.find_template("Data Scientist", [], 8) is None
+
+
+def test_stats_are_labelled_per_worker():
+    stats = templates.template_stats()
+    assert stats["worker_pid"] > 0 and stats["since"] > 0
+    assert 0.0 <= stats["reuse_rate"] <= 1.0
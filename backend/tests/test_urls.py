@@ -0,0 +1,31 @@
+import pytest
+
+from app.services.urls import normalize_url
+
+
+@pytest.mark.parametrize(
+    "url, key",
+    [
+        ("HTTPS://www.YouTube.com/watch?v=abc&utm_source=x#t=10", "youtube.com/watch?v=abc"),
+        ("https://youtube.com/watch?v=abc", "youtube.com/watch?v=abc"),
+        ("example.com/a//b/", "example.com/a/b"),
+        ("  http://Example.com/  ", "example.com"),
+        ("http://ex.com:8080/x?b=2&a=1&fbclid=z", "ex.com:8080/x?a=1&b=2"),
+        ("http://ex.com:443/x", "ex.com/x"),
+        ("http://ex.com:80/x", "ex.com/x"),
+        ("http://ex.com:notaport/x", "ex.com/x"),
+        ("https://ex.com/?q=", "ex.com?q="),
+        ("https://ex.com/p?UTM_Campaign=a&Ref=b&si=c&feature=d&gclid=e", "ex.com/p"),
+    ],
+)
+def test_normalize_url(url, key):
+    assert normalize_url(url) == key
+
+
+def test_normalize_url_keeps_path_case_and_meaningful_params():
+    assert normalize_url("https://ex.com/Docs?page=2") != normalize_url("https://ex.com/docs?page=2")
+    assert normalize_url("https://ex.com/docs?page=2") != normalize_url("https://ex.com/docs?page=3")
+
+
+def test_scheme_does_not_matter():
+    assert normalize_url("http://ex.com/a") == normalize_url("https://ex.com/a") == normalize_url("ex.com/a")
@@ -0,0 +1,76 @@
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import Text, Uuid, create_engine, text
+from sqlalchemy.dialects import postgresql
+
+from app import db, models
+
+
+def test_uuid7_fields():
+    before = models.time.time_ns() // 1_000_000
+    u = models.uuid7()
+    assert u.version == 7
+    assert u.variant == uuid.RFC_4122
+    assert before <= u.int >> 80 <= before + 1000
+
+
+def test_uuid7_is_monotonic_within_a_millisecond(monkeypatch):
+    monkeypatch.setattr(models.time, "time_ns", lambda: 1_760_000_000_000 * 1_000_000)
+    ids = [models.uuid7() for _ in range(5000)]  # more than the 12-bit counter holds
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
+    assert all(u.version == 7 for u in ids)
+    assert ids[-1].int >> 80 > 1_760_000_000_000  # borrowed later milliseconds
+
+
+def test_uuid7_survives_clock_going_back(monkeypatch):
+    now = [1_760_000_000_500]
+    monkeypatch.setattr(models.time, "time_ns", lambda: now[0] * 1_000_000)
+    a = models.uuid7()
+    now[0] -= 400
+    assert models.uuid7() > a
+
+
+def test_uuid7_sorts_by_time():
+    ids = []
+    for _ in range(3):
+        ids.append(models.uuid7())
+        models.time.sleep(0.002)
+    assert ids == sorted(ids) == sorted(ids, key=str)
+
+
+def test_gen_uuid_follows_setting(monkeypatch):
+    monkeypatch.setattr(models.settings, "UUID_VERSION", 4)
+    assert models.gen_uuid().version == 4
+    monkeypatch.setattr(models.settings, "UUID_VERSION", 7)
+    assert models.gen_uuid().version == 7
+
+
+def _inspector(tables, id_type):
+    return SimpleNamespace(
+        get_table_names=lambda: tables,
+        get_columns=lambda table: [{"name": "id", "type": id_type}, {"name": "user_id", "type": id_type}],
+    )
+
+
+@pytest.mark.parametrize("id_type", [postgresql.UUID(), Uuid()])
+def test_check_uuid_keys_accepts_uuid_ids(monkeypatch, id_type):
+    monkeypatch.setattr(db, "inspect", lambda engine: _inspector(["users", "plans"], id_type))
+    db._check_uuid_keys()
+
+
+def test_check_uuid_keys_ignores_empty_database(monkeypatch):
+    monkeypatch.setattr(db, "inspect", lambda engine: _inspector([], Text()))
+    db._check_uuid_keys()
+
+
+def test_check_uuid_keys_rejects_text_ids(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE plans (id TEXT PRIMARY KEY, user_id TEXT)"))
+    monkeypatch.setattr(db, "engine", engine)
+    with pytest.raises(RuntimeError, match="alembic upgrade head"):
+        db._check_uuid_keys()
+    engine.dispose()
@@ -0,0 +1,152 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("chromadb")
+
+from app.services import vector_store  # noqa: E402
+from app.services.chroma_client import get_client, hnsw_metadata  # noqa: E402
+from app.services.vector_store import ChromaStore, NumpyStore  # noqa: E402
+
+DIM = 16
+LEVELS = ["beginner", "intermediate", "advanced"]
+
+
+def _data(n, seed=0):
+    rng = np.random.default_rng(seed)
+    vecs = rng.normal(size=(n, DIM)).astype(np.float32)
+    ids = [f"r{i}" for i in range(n)]
+    metas = [{"level": LEVELS[i % 3], "lang": "hi" if i % 20 == 0 else "en"} for i in range(n)]
+    return ids, vecs, metas
+
+
+def _brute(vecs, metas, query, k, where=None):
+    unit = vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
+    sims = unit @ (query / np.linalg.norm(query))
+    rows = [i for i, m in enumerate(metas) if all(m.get(f) == v for f, v in (where or {}).items())]
+    return [f"r{i}" for i in sorted(rows, key=lambda i: -sims[i])[:k]]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return NumpyStore(str(tmp_path / "idx"), "test_collection", "test-model")
+
+
+@pytest.fixture
+def filled(store):
+    ids, vecs, metas = _data(300)
+    store.upsert(ids, vecs, [f"doc {i}" for i in ids], metas)
+    return store, vecs, metas
+
+
+def test_empty_store(store):
+    assert store.count() == 0
+    assert store.query(np.ones((2, DIM)), 5) == [[], []]
+    assert store.query([], 5) == []
+
+
+def test_query_is_exact_top_k(filled):
+    store, vecs, metas = filled
+    queries = np.random.default_rng(1).normal(size=(4, DIM))
+    for q, hits in zip(queries, store.query(queries, 7)):
+        assert [h[0] for h in hits] == _brute(vecs, metas, q, 7)
+        scores = [h[1] for h in hits]
+        assert scores == sorted(scores, reverse=True) and scores[0] <= 1.0 + 1e-6
+        assert hits[0][2] == metas[int(hits[0][0][1:])]
+
+
+def test_k_larger_than_index(filled):
+    store, *_ = filled
+    assert len(store.query(np.ones((1, DIM)), 1000)[0]) == 300
+
+
+@pytest.mark.parametrize("where", [
+    {"level": "advanced"},                  # broad: scored with a mask
+    {"lang": "hi"},                         # selective: scored on the matching rows only
+    {"level": "beginner", "lang": "hi"},    # ANDed
+    {"level": "expert"},                    # matches nothing
+])
+def test_where_filters(filled, where):
+    store, vecs, metas = filled
+    q = np.random.default_rng(2).normal(size=DIM)
+    hits = store.query([q], 10, where=where)[0]
+    assert [h[0] for h in hits] == _brute(vecs, metas, q, 10, where)
+    assert all(all(h[2][f] == v for f, v in where.items()) for h in hits)
+
+
+def test_upsert_updates_in_place_and_invalidates_masks(filled):
+    store, vecs, _ = filled
+    assert len(store.query([vecs[0]], 300, where={"level": "expert"})[0]) == 0
+    target = -vecs[5]
+    store.upsert(["r5", "r5"], np.stack([vecs[5], target]), ["old", "new"], [{"level": "x"}, {"level": "expert"}])
+    assert store.count() == 300
+    hits = store.query([target], 1, where={"level": "expert"})[0]
+    assert hits[0][0] == "r5" and hits[0][1] == pytest.approx(1.0, abs=1e-5)
+    assert store.query([target], 1)[0][0][0] == "r5"
+
+
+def test_upsert_rejects_other_dimension(filled):
+    store, *_ = filled
+    with pytest.raises(ValueError, match="dim"):
+        store.upsert(["x"], np.ones((1, DIM + 1)), [""], [{}])
+
+
+def test_growth_past_capacity(store):
+    ids, vecs, metas = _data(1500)
+    for start in range(0, 1500, 500):
+        store.upsert(ids[start : start + 500], vecs[start : start + 500], [""] * 500, metas[start : start + 500])
+    assert store.count() == 1500
+    assert store.query([vecs[1234]], 1)[0][0][0] == "r1234"
+
+
+def test_delete(filled):
+    store, vecs, metas = filled
+    store.delete(["r0", "r1", "missing"])
+    assert store.count() == 298
+    assert "r0" not in store.ids()
+    q = vecs[0]
+    assert "r0" not in [h[0] for h in store.query([q], 300)[0]]
+    store.delete(["missing"])  # nothing to do
+    assert store.count() == 298
+    # rows after the deleted ones still map to their own vectors
+    assert store.query([vecs[299]], 1)[0][0][0] == "r299"
+
+
+def test_other_instance_sees_committed_manifest(filled, tmp_path):
+    store, vecs, _ = filled
+    reader = NumpyStore(store.path, store.name)
+    assert reader.count() == 300
+    store.upsert(["new"], np.ones((1, DIM)), ["n"], [{"level": "beginner"}])  # appended
+    assert reader.count() == 301
+    assert reader.query(np.ones((1, DIM)), 1)[0][0][0] == "new"
+    store.delete(["new", "r3"])  # rewritten
+    assert reader.count() == 299
+    manifest, matrix, records = vector_store.read_index_dir(store.path)
+    assert manifest["count"] == len(records) == len(matrix) == 299
+    assert manifest["embedding_model"] == "test-model"
+
+
+def test_uncommitted_records_are_ignored(filled):
+    store, *_ = filled
+    with open(f"{store.path}/{vector_store.RECORDS}", "a") as f:
+        f.write('{"id": "torn", "document": "", "metadata": {}}\n')
+    assert NumpyStore(store.path, store.name).count() == 300
+
+
+def test_chroma_parity(filled, tmp_path):
+    store, vecs, metas = filled
+    client = get_client(str(tmp_path / "chroma"))
+    # a wide search beam makes HNSW exact on 300 rows; ChromaStore keeps the collection's params
+    client.create_collection("parity_collection", metadata=hnsw_metadata(ef_search=300))
+    chroma = ChromaStore("parity_collection", client)
+    chroma.upsert(store.ids(), vecs, ["doc"] * 300, metas)
+    assert chroma.count() == 300
+
+    queries = np.random.default_rng(3).normal(size=(5, DIM))
+    for where in (None, {"level": "advanced"}, {"level": "beginner", "lang": "hi"}):
+        for exact, approx in zip(store.query(queries, 5, where), chroma.query(queries, 5, where)):
+            assert [h[0] for h in approx] == [h[0] for h in exact]
+            assert [h[1] for h in approx] == pytest.approx([h[1] for h in exact], abs=1e-4)
+
+    chroma.delete(["r0", "r1"])
+    store.delete(["r0", "r1"])
+    assert sorted(chroma.ids()) == sorted(store.ids())
@@ -134,6 +134,7 @@ export default function SystemStatus() {
           goal: 'HEALTHCHECK',
           current_skills: [],
           duration_weeks: 2,
+          use_templates: false, // must actually reach Ollama
         },
         120000 // 120s timeout
       )
@@ -1,4 +1,4 @@
-import { useState } from 'react'
+import { useRef, useState } from 'react'
 import { motion } from 'framer-motion'
 import { Card, CardHeader, CardTitle, CardDescription, CardContent, CardFooter } from '../components/Card'
 import Button from '../components/Button'
@@ -7,6 +7,7 @@ import TagInput from '../components/TagInput'
 import api from '../lib/axios'
 import { useToast } from '../hooks/useToast'
 import { useNavigate } from 'react-router-dom'
+import { randomId } from '../utils/id'
 
 const PRESETS = [
   'Data Scientist',
@@ -44,6 +45,9 @@ export default function AutoPlan() {
   const [errors, setErrors] = useState<Record<string, string>>({})
   const { showToast } = useToast()
   const navigate = useNavigate()
+  // Reused while the same payload is retried, so the backend returns the
+  // plan from the first attempt instead of generating a duplicate
+  const idempotency = useRef<{ payload: string; key: string } | null>(null)
 
   const submit = async (e: React.FormEvent) => {
     e.preventDefault()
@@ -55,18 +59,24 @@ export default function AutoPlan() {
 
     setErrors({})
     setLoading(true)
+    const body = {
+      goal: goal.trim(),
+      current_skills: skills,
+      duration_weeks: weeks
+    }
+    const payload = JSON.stringify(body)
+    if (idempotency.current?.payload !== payload) {
+      idempotency.current = { payload, key: randomId() }
+    }
+    const idempotencyKey = idempotency.current.key
     try {
       // POST /plans/auto with 120s timeout
       // Smoke test: /plans/auto timeout 120s and friendly 502 message
-      const res = await api.post(
-        '/plans/auto',
-        {
-          goal: goal.trim(),
-          current_skills: skills,
-          duration_weeks: weeks
-        },
-        { timeout: 120000 }
-      )
+      const res = await api.post('/plans/auto', body, {
+        timeout: 120000,
+        headers: { 'Idempotency-Key': idempotencyKey }
+      })
+      idempotency.current = null
       showToast('Plan created successfully', 'success')
       const id = res.data.plan_id
       navigate(`/plans/${id}`)